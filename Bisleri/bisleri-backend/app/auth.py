@@ -51,3 +51,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     if user is None:
         raise credentials_exception
     return user
+
+async def get_current_admin(current_user: UsersMaster = Depends(get_current_user)):
+    """get_current_user, restricted to Admin users (403 for everyone else)"""
+    if (current_user.role or "").lower() != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
@@ -12,6 +12,47 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 720  
 
+    # In-process document sync scheduler
+    SYNC_SCHEDULER_ENABLED: bool = True
+    SYNC_INTERVAL_MINUTES: int = 10
+    SYNC_JITTER_SECONDS: int = 30
+    SYNC_RETRY_BASE_SECONDS: int = 60
+    SYNC_MAX_BACKOFF_MINUTES: int = 60
+    SYNC_INCREMENTAL: bool = True
+    SYNC_PARALLEL: bool = False
+
+    # Event-driven micro-batch sync (LISTEN/NOTIFY on the mfabric tables)
+    SYNC_LISTEN_ENABLED: bool = True
+    SYNC_LISTEN_DEBOUNCE_SECONDS: float = 2.0
+    SYNC_LISTEN_MAX_BATCH_SECONDS: float = 10.0
+
+    # Zone the gate writes' naive insights_data date/time are recorded in (used to derive moved_at)
+    MOVEMENT_TIMEZONE: str = "Asia/Kolkata"
+
+    # Idempotency-Key replay store for gate-entry / operational-data writes
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    IDEMPOTENCY_MAX_KEYS_PER_USER: int = 1000
+    IDEMPOTENCY_PROCESSING_LEASE_SECONDS: int = 60  # A claim older than this (worker gone) can be taken over
+
+    # Fuzzy vehicle search (pg_trgm word similarity, 0-1)
+    VEHICLE_SEARCH_SIMILARITY_THRESHOLD: float = 0.5
+    VEHICLE_SEARCH_MAX_MATCHES: int = 10
+
+    # Staging lifecycle: move consolidated mfabric rows to the *_archive tables after each sync
+    STAGING_ARCHIVE_ENABLED: bool = True
+    STAGING_ARCHIVE_BATCH_SIZE: int = 10000
+    STAGING_ARCHIVE_MAX_BATCHES: int = 10
+
+    # Monthly range partitions (created ahead by the sync leader; 0 retention = keep all)
+    # Retention action for expired partitions: detach | archive | drop
+    DOCUMENT_DATA_PARTITION_MONTHS_AHEAD: int = 3
+    DOCUMENT_DATA_RETENTION_MONTHS: int = 0
+    DOCUMENT_DATA_RETENTION_ACTION: str = "detach"
+    INSIGHTS_DATA_PARTITION_MONTHS_AHEAD: int = 3
+    INSIGHTS_DATA_RETENTION_MONTHS: int = 0
+    INSIGHTS_DATA_RETENTION_ACTION: str = "archive"
+    PARTITION_ARCHIVE_SCHEMA: str = "archive"
+
     class Config:
         env_file = ".env"
 
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+import re
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -15,4 +16,22 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+_PLACEHOLDER = re.compile(r"(?<!:):(\w+)")
+
+def prepared_statement(db, name: str, sql: str):
+    """EXECUTE clause for a server-side prepared statement, PREPAREd once per pooled connection
+
+    sql uses :name placeholders. psycopg2 sends every statement as plain text,
+    so only a prepared statement lets Postgres reuse (and eventually cache a
+    generic) plan across calls. Prepared statements outlive transactions, so
+    which ones exist is tracked in the DBAPI connection's info dict.
+    """
+    names = list(dict.fromkeys(_PLACEHOLDER.findall(sql)))
+    conn = db.connection()
+    prepared = conn.info.setdefault("prepared_statements", set())
+    if name not in prepared:
+        body = _PLACEHOLDER.sub(lambda match: f"${names.index(match.group(1)) + 1}", sql)
+        conn.exec_driver_sql(f"PREPARE {name} AS {body}")
+        prepared.add(name)
+    return text(f"EXECUTE {name}({', '.join(':' + param for param in names)})")
@@ -1,37 +1,16 @@
-import schedule
-import time
-from datetime import datetime
-from app.services.db_service import DBService
+# Standalone document_data consolidation for deployments without the API process.
+# Runs the same leader-elected, single-flight SyncScheduler the API starts in its lifespan hook,
+# so running both at once is safe: only one process will schedule cycles.
+import logging
+from app.config import settings
+from app.scheduler import scheduler, change_listener
 
-LOG_FILE = "document_sync_log.txt"
-
-def log(msg):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(LOG_FILE, "a") as f:
-        f.write(f"[{timestamp}] {msg}\n")
-    print(f"[{timestamp}] {msg}")
-
-def job():
-    log("🚀 Running document_data consolidation...")
+logging.basicConfig(level=logging.INFO)
 
+if __name__ == "__main__":
+    if settings.SYNC_LISTEN_ENABLED:
+        change_listener.start()
     try:
-        db_service = DBService()
-        result = db_service.push_to_document_data()
-        if result:
-            count = db_service.get_document_data_count()
-            log(f"✅ Consolidation successful. Total document_data rows: {count}")
-        else:
-            log("⚠️ Consolidation failed.")
-    except Exception as e:
-        log(f"❌ Error during consolidation: {str(e)}")
-
-# Run once immediately
-job()
-
-# Then every 20 minutes
-schedule.every(20).minutes.do(job)
-log("⏱️ Scheduler started. Will run every 20 minutes.")
-
-while True:
-    schedule.run_pending()
-    time.sleep(10)
+        scheduler.run_forever()
+    finally:
+        change_listener.stop()
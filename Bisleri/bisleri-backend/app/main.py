@@ -2,7 +2,9 @@ from fastapi import FastAPI
 from contextlib import asynccontextmanager
 import logging
 from app.routers import auth, documents, gate, insights, ping, admin, sync
-from app.scheduler import scheduler
+from app.scheduler import scheduler, change_listener
+from app.config import settings
+from app.services import operational_rollup  # Registers the warehouse_daily_rollup flush hook
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,8 +15,13 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up FastAPI application...")
     try:
-        # Start the data sync scheduler
-        scheduler.start()
+        # Start the data sync scheduler (runs on a background thread;
+        # only the leader worker actually executes cycles)
+        if settings.SYNC_SCHEDULER_ENABLED:
+            scheduler.start()
+        # Consolidate staging inserts within seconds instead of waiting for the next cycle
+        if settings.SYNC_LISTEN_ENABLED:
+            change_listener.start()
         logger.info("Application startup complete")
     except Exception as e:
         logger.error(f"Error during startup: {str(e)}")
@@ -24,7 +31,8 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down FastAPI application...")
     try:
-        # Stop the scheduler
+        # Stop the event listener and the scheduler
+        change_listener.stop()
         scheduler.stop()
         logger.info("Application shutdown complete")
     except Exception as e:
@@ -56,5 +64,7 @@ async def health_check():
     return {
         "status": "healthy",
         "scheduler_status": scheduler_status,
-        "active_jobs": len(scheduler.get_jobs()) if scheduler.is_running else 0
+        "active_jobs": len(scheduler.get_jobs()) if scheduler.is_running else 0,
+        "sync": scheduler.get_status(),
+        "sync_listener": change_listener.get_status()
     }
\ No newline at end of file
@@ -1,3 +1,5 @@
 from .documents import DocumentData, MfabricDeliveryChallanData, MfabricInvoiceData, MfabricTransferOrderRGPData
 from .users import UsersMaster, LocationMaster
-from .insights import InsightsData
\ No newline at end of file
+from .insights import InsightsData, WarehouseDailyRollup, VehicleGateState
+from .sync import SyncWatermark, SyncRun, SyncBackfillProgress
+from .idempotency import IdempotencyKey
@@ -1,12 +1,20 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Index, text
+from sqlalchemy.orm import validates
 from app.database import Base
+from app.utils.helpers import vehicle_key
+
+# Mfabric tables - staging tables for client data, keyed by a surrogate id.
+# load_xact_id records the transaction that loaded each row: ids are assigned at
+# insert time, not in commit order, so sync tracks transactions instead (NULL for
+# rows loaded before it did).
+LOAD_XACT_ID_DEFAULT = text("(pg_current_xact_id()::text::bigint)")
 
-# Mfabric tables - NO PRIMARY KEYS (staging tables for client data)
 class MfabricDeliveryChallanData(Base):
     __tablename__ = "mfabric_deliverychallan_data"
     
+    id = Column(Integer, primary_key=True, autoincrement=True)  # Surrogate key (sync watermark of rows without load_xact_id)
     document_type = Column(String(255))
-    document_no = Column(String(255), primary_key=True)  # Fake primary key for SQLAlchemy only
+    document_no = Column(String(255), nullable=False, index=True)
     document_date = Column(DateTime(timezone=True))
     e_way_bill_no = Column(String(255))
     transporter_name = Column(String(255))
@@ -16,12 +24,14 @@ class MfabricDeliveryChallanData(Base):
     total_quantity = Column(Integer)
     site = Column(String(255))
     customer_code = Column(String(255))
+    load_xact_id = Column(BigInteger, index=True, server_default=LOAD_XACT_ID_DEFAULT)  # Loading transaction, the sync watermark
 
 class MfabricInvoiceData(Base):
     __tablename__ = "mfabric_invoice_data"
     
+    id = Column(Integer, primary_key=True, autoincrement=True)  # Surrogate key (sync watermark of rows without load_xact_id)
     document_type = Column(String(255))
-    document_no = Column(String(255), primary_key=True)  # Fake primary key for SQLAlchemy only
+    document_no = Column(String(255), nullable=False, index=True)
     document_date = Column(DateTime(timezone=True))
     e_way_bill_no = Column(String(255))
     transporter_name = Column(String(255))
@@ -31,13 +41,15 @@ class MfabricInvoiceData(Base):
     customer_name = Column(String(255))
     total_quantity = Column(Integer)
     site = Column(String(255))
+    load_xact_id = Column(BigInteger, index=True, server_default=LOAD_XACT_ID_DEFAULT)  # Loading transaction, the sync watermark
 
 class MfabricTransferOrderRGPData(Base):
     __tablename__ = "mfabric_transferorder_rgp_data"
     
+    id = Column(Integer, primary_key=True, autoincrement=True)  # Surrogate key (sync watermark of rows without load_xact_id)
     document_type = Column(String(255))
     sub_document_type = Column(String(255))
-    document_no = Column(String(255), primary_key=True)  # Fake primary key for SQLAlchemy only
+    document_no = Column(String(255), nullable=False, index=True)
     document_date = Column(DateTime(timezone=True))
     e_way_bill_no = Column(String(255))
     transporter_name = Column(String(255))
@@ -50,17 +62,27 @@ class MfabricTransferOrderRGPData(Base):
     site = Column(String(255))
     direct_dispatch = Column(String(255))
     salesman = Column(String(255))
+    load_xact_id = Column(BigInteger, index=True, server_default=LOAD_XACT_ID_DEFAULT)  # Loading transaction, the sync watermark
 
 # Keep DocumentData as is - this is your consolidated table with proper PK
 class DocumentData(Base):
     __tablename__ = "document_data"
+    __table_args__ = (
+        Index("ix_document_data_vehicle_key_document_date", "vehicle_key", "document_date"),
+        Index("ix_document_data_vehicle_key_trgm", "vehicle_key", postgresql_using="gin", postgresql_ops={"vehicle_key": "gin_trgm_ops"}),
+    )
+    # Range-partitioned by document_date (monthly), so the partition key is part of the PK.
+    # document_no is still one row per document: consolidation moves a document between
+    # partitions when its date changes and checks for duplicates before committing, and
+    # every partition has a unique index on document_no (app.services.partition_service).
     document_no = Column(String(100), primary_key=True)
     site = Column(String(100))
     document_type = Column(String(100))
-    document_date = Column(DateTime)
+    document_date = Column(DateTime, primary_key=True)
     e_way_bill_no = Column(String(100))
     transporter_name = Column(String(100))
     vehicle_no = Column(String(100))
+    vehicle_key = Column(String(100))  # clean_vehicle_number(vehicle_no); all vehicle lookups match on it
     irn_no = Column(String(100))
     warehouse_code = Column(String(100))
     warehouse_name = Column(String(100))
@@ -74,4 +96,9 @@ class DocumentData(Base):
     from_warehouse_code = Column(String(100))
     to_warehouse_code = Column(String(100))
     sub_document_type = Column(String(100))
-    salesman = Column(String(100))
\ No newline at end of file
+    salesman = Column(String(100))
+    
+    @validates("vehicle_no")
+    def _set_vehicle_key(self, key, value):
+        self.vehicle_key = vehicle_key(value)
+        return value
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from app.database import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+        Index("ix_idempotency_keys_scope_created_at", "scope", "created_at"),
+    )
+    
+    scope = Column(String(255), primary_key=True)            # Username the key belongs to
+    idempotency_key = Column(String(255), primary_key=True)  # Client-chosen Idempotency-Key header
+    endpoint = Column(String(100))
+    request_hash = Column(String(64))           # sha256 of endpoint + request arguments
+    status = Column(String(20))                 # processing / completed
+    status_code = Column(Integer)               # Stored response, replayed for retries
+    response = Column(JSONB)
+    created_at = Column(DateTime)
+    claimed_at = Column(DateTime)               # Start of the current claim (its processing lease)
+    expires_at = Column(DateTime)
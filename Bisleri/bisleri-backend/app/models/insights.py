@@ -1,17 +1,73 @@
 # app/models/insights.py - UPDATED WITH OPERATIONAL FIELDS
-from sqlalchemy import Column, Integer, String, DateTime, Text, Time
+from sqlalchemy import Column, Integer, String, DateTime, Date, Text, Time, Index
+from datetime import timedelta
+from sqlalchemy.orm import validates
 from app.database import Base
+from app.utils.helpers import vehicle_key, movement_instant
+
+# ✅ Operational edit rules (3-color system). The model methods below and the SQL
+# aggregates (app/services/edit_statistics.py, /filtered-movements) both build on these.
+OPERATIONAL_FIELDS = ("driver_name", "km_reading", "loader_names")
+EDIT_WINDOW = timedelta(hours=24)
+
+def is_blank(value) -> bool:
+    """A missing operational field: NULL or whitespace only"""
+    return not (value and value.strip())
+
+def blank_sql(column: str) -> str:
+    """SQL twin of is_blank"""
+    return f"({column} IS NULL OR {column} !~ '\\S')"
+
+OPERATIONAL_COMPLETE_SQL = " AND ".join(f"NOT {blank_sql(name)}" for name in OPERATIONAL_FIELDS)
+
+# get_edit_status as SQL; :now is the (aware) instant the status is evaluated at
+EDIT_STATUS_SQL = f"""CASE
+    WHEN date IS NULL OR time IS NULL THEN 'expired'
+    WHEN CAST(:now AS timestamptz) - moved_at > INTERVAL '{int(EDIT_WINDOW.total_seconds())} seconds' THEN 'expired'
+    WHEN NOT ({OPERATIONAL_COMPLETE_SQL}) THEN 'needs_completion'
+    ELSE 'editable'
+END"""
+
+# Counters of warehouse_daily_rollup (WarehouseDailyRollup)
+ROLLUP_COUNTERS = (
+    "movements", "complete_operational", "missing_driver", "missing_km",
+    "missing_loaders", "edited", "multiple_edits", "total_edits",
+)
+
+def rollup_counts(values) -> dict:
+    """What one movement (a mapping of its column values) adds to its warehouse_daily_rollup row"""
+    missing = {name: is_blank(values[name]) for name in OPERATIONAL_FIELDS}
+    edit_count = values["edit_count"] or 0
+    return {
+        "movements": 1,
+        "complete_operational": int(not any(missing.values())),
+        "missing_driver": int(missing["driver_name"]),
+        "missing_km": int(missing["km_reading"]),
+        "missing_loaders": int(missing["loader_names"]),
+        "edited": int(edit_count > 0),
+        "multiple_edits": int(edit_count > 1),
+        "total_edits": edit_count,
+    }
 
 class InsightsData(Base):
     __tablename__ = "insights_data" 
+    __table_args__ = (
+        Index("ix_insights_data_vehicle_key_moved_at", "vehicle_key", "moved_at", "id"),
+        Index("ix_insights_data_warehouse_code_moved_at", "warehouse_code", "moved_at", "id"),
+        Index("ix_insights_data_gate_entry_no", "gate_entry_no"),
+        Index("ix_insights_data_vehicle_key_trgm", "vehicle_key", postgresql_using="gin", postgresql_ops={"vehicle_key": "gin_trgm_ops"}),
+        Index("ix_insights_data_moved_at", "moved_at", "id"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     gate_entry_no = Column(String(50))
     document_type = Column(String(50))
     sub_document_type = Column(String(50))
     vehicle_no = Column(String(50))
+    vehicle_key = Column(String(50))  # clean_vehicle_number(vehicle_no), kept in sync by _set_vehicle_key
     warehouse_name = Column(String(100))
-    date = Column(DateTime)
+    date = Column(DateTime, primary_key=True)  # Movement date; insights_data is range-partitioned by month on it
     time = Column(Time)
+    moved_at = Column(DateTime(timezone=True), nullable=False)  # date + time as one instant, kept in sync by _set_moved_at
     movement_type = Column(String(20))
     remarks = Column(Text)
     warehouse_code = Column(String(50))
@@ -27,31 +83,43 @@ class InsightsData(Base):
     last_edited_at = Column(DateTime)           # Track edit timestamps
     edit_count = Column(Integer, default=0)     # Track number of edits
     
+    @validates("vehicle_no")
+    def _set_vehicle_key(self, key, value):
+        self.vehicle_key = vehicle_key(value)
+        return value
+    
+    @validates("date", "time")
+    def _set_moved_at(self, key, value):
+        if key == "date":
+            self.moved_at = movement_instant(value, self.time)
+        else:
+            self.moved_at = movement_instant(self.date, value)
+        return value
+    
+    def movement_datetime(self):
+        """Aware instant of the movement"""
+        return self.moved_at
+    
     def __repr__(self):
         return f"<InsightsData(gate_entry_no='{self.gate_entry_no}', vehicle_no='{self.vehicle_no}')>"
     
     # ✅ NEW: Helper methods for edit status
     def is_operational_data_complete(self):
         """Check if all required operational fields are filled"""
-        return all([
-            self.driver_name and self.driver_name.strip(),
-            self.km_reading and self.km_reading.strip(),
-            self.loader_names and self.loader_names.strip()
-        ])
+        return not any(is_blank(getattr(self, name)) for name in OPERATIONAL_FIELDS)
     
     def get_edit_status(self):
-        """Get the current edit status for the 3-color system"""
-        from datetime import datetime, timedelta
+        """Get the current edit status for the 3-color system (EDIT_STATUS_SQL in SQL)"""
+        from datetime import datetime, timezone
         
         if not self.date or not self.time:
             return 'expired'
             
         # Calculate time since record creation
-        record_datetime = datetime.combine(self.date, self.time)
-        time_elapsed = datetime.now() - record_datetime
+        time_elapsed = datetime.now(timezone.utc) - self.movement_datetime()
         
         # Check if 24-hour window has passed
-        if time_elapsed > timedelta(hours=24):
+        if time_elapsed > EDIT_WINDOW:
             return 'expired'  # BLACK button
         
         # Check if operational data is complete
@@ -63,14 +131,13 @@ class InsightsData(Base):
     
     def get_time_remaining(self):
         """Get remaining time in the 24-hour edit window"""
-        from datetime import datetime, timedelta
+        from datetime import datetime, timezone
         
         if not self.date or not self.time:
             return None
             
-        record_datetime = datetime.combine(self.date, self.time)
-        time_elapsed = datetime.now() - record_datetime
-        time_remaining = timedelta(hours=24) - time_elapsed
+        time_elapsed = datetime.now(timezone.utc) - self.movement_datetime()
+        time_remaining = EDIT_WINDOW - time_elapsed
         
         if time_remaining.total_seconds() <= 0:
             return None
@@ -95,18 +162,7 @@ class InsightsData(Base):
     
     def get_missing_operational_fields(self):
         """Get list of missing operational fields"""
-        missing = []
-        
-        if not (self.driver_name and self.driver_name.strip()):
-            missing.append('driver_name')
-        
-        if not (self.km_reading and self.km_reading.strip()):
-            missing.append('km_reading')
-        
-        if not (self.loader_names and self.loader_names.strip()):
-            missing.append('loader_names')
-        
-        return missing
+        return [name for name in OPERATIONAL_FIELDS if is_blank(getattr(self, name))]
     
     def get_edit_button_config(self, current_user_username, current_user_role):
         """Get the complete button configuration for frontend"""
@@ -155,4 +211,42 @@ class InsightsData(Base):
             'message': f'All data complete | {time_remaining} remaining',
             'action': 'edit_optional',
             'edit_count': self.edit_count or 0
-        }
\ No newline at end of file
+        }
+class WarehouseDailyRollup(Base):
+    """Per-warehouse, per-day movement counters (see ROLLUP_COUNTERS)
+
+    Maintained incrementally in the transaction of every InsightsData write
+    (app/services/operational_rollup.py), so summaries read a few rows
+    instead of scanning insights_data. warehouse_code is '' for movements
+    recorded without one.
+    """
+    __tablename__ = "warehouse_daily_rollup"
+    
+    warehouse_code = Column(String(50), primary_key=True)
+    day = Column(Date, primary_key=True)        # insights_data.date (local movement day)
+    movements = Column(Integer, nullable=False, default=0)
+    complete_operational = Column(Integer, nullable=False, default=0)
+    missing_driver = Column(Integer, nullable=False, default=0)
+    missing_km = Column(Integer, nullable=False, default=0)
+    missing_loaders = Column(Integer, nullable=False, default=0)
+    edited = Column(Integer, nullable=False, default=0)           # movements edited at least once
+    multiple_edits = Column(Integer, nullable=False, default=0)   # movements edited more than once
+    total_edits = Column(Integer, nullable=False, default=0)      # sum of edit_count
+    updated_at = Column(DateTime)
+
+class VehicleGateState(Base):
+    """Latest gate movement of each vehicle, one row per vehicle_key
+
+    Gate entries lock the vehicle's row (app/services/gate_state.py) before
+    checking the Gate-In / Gate-Out sequence and update it in the same
+    transaction as the movement insert.
+    """
+    __tablename__ = "vehicle_gate_state"
+    
+    vehicle_key = Column(String(50), primary_key=True)
+    vehicle_no = Column(String(50))
+    movement_type = Column(String(20))          # NULL until the vehicle's first movement commits
+    gate_entry_no = Column(String(50))
+    warehouse_code = Column(String(50))
+    moved_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime)
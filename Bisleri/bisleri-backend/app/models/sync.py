@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, JSON
+from app.database import Base
+
+class SyncWatermark(Base):
+    __tablename__ = "sync_watermarks"
+    
+    source_table = Column(String(100), primary_key=True)  # mfabric staging table name
+    last_id = Column(Integer, nullable=False, default=0)  # Highest staging id consolidated (rows without load_xact_id)
+    last_xact_id = Column(BigInteger)           # Staging rows loaded by transactions below this are consolidated
+    updated_at = Column(DateTime)
+
+class SyncRun(Base):
+    __tablename__ = "sync_runs"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    trigger = Column(String(50))                # scheduler / manual / consolidate_documents
+    mode = Column(String(20))                   # full / incremental (+ _parallel) / backfill
+    status = Column(String(20))                 # running / success / partial / failed
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    duration_ms = Column(Integer)
+    rows_scanned = Column(Integer, default=0)
+    rows_inserted = Column(Integer, default=0)
+    rows_updated = Column(Integer, default=0)
+    stage_timings = Column(JSON)                # {stage: duration_ms}
+    source_stats = Column(JSON)                 # {source: {duration_ms, rows_scanned, inserts, updates, error}}
+    error = Column(Text)
+
+class SyncBackfillProgress(Base):
+    __tablename__ = "sync_backfill_progress"
+    
+    source_table = Column(String(100), primary_key=True)
+    status = Column(String(20))                 # running / completed
+    last_document_no = Column(String(255))      # Keyset checkpoint: last document_no committed
+    high_id = Column(Integer)                   # Staging id snapshot taken when the backfill started
+    high_xact_id = Column(BigInteger)           # Oldest transaction still running when the backfill started
+    documents_done = Column(Integer, default=0)
+    rows_done = Column(Integer, default=0)
+    chunks_done = Column(Integer, default=0)
+    started_at = Column(DateTime)
+    updated_at = Column(DateTime)
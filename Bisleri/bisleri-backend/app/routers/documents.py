@@ -2,6 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from app.auth import get_current_user
 from app.models import UsersMaster
 from app.services.db_service import DBService
+from app.scheduler import sync_service
+from app.services.sync_coordination import sync_coordinator
 
 router = APIRouter(tags=["Document Management"])
 
@@ -11,10 +13,15 @@ def consolidate_document_data(current_user: UsersMaster = Depends(get_current_us
         raise HTTPException(status_code=403, detail="Only admins can trigger consolidation")
 
     db_service = DBService()
-    success = db_service.push_to_document_data()
+    result = sync_coordinator.run(sync_service.push_to_document_data, trigger="consolidate_documents")
     
-    if success:
+    if result["success"]:
         count = db_service.get_document_data_count()
-        return {"status": "success", "message": "Data consolidated", "document_data_rows": count}
+        return {
+            "status": "success",
+            "message": "Data consolidated",
+            "document_data_rows": count,
+            "joined_in_flight_run": result["joined"]
+        }
     else:
         raise HTTPException(status_code=500, detail="Failed to consolidate document data")
\ No newline at end of file
@@ -1,12 +1,17 @@
 # app/routers/gate.py - COMPLETE ENHANCED VERSION WITH OPERATIONAL DATA
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 from app.database import get_db
 from app.schemas import GateEntryCreate, GateEntryResponse
-from app.models import DocumentData, InsightsData, UsersMaster
+from app.models import InsightsData, UsersMaster
 from app.auth import get_current_user
-from app.utils.helpers import generate_gate_entry_no_for_user, fetch_user_details
+from app.utils.helpers import generate_gate_entry_no_for_user, fetch_user_details, vehicle_key, movement_now, local_movement_time
+from app.services.vehicle_search import RECENT_DOCUMENTS_SQL, match_vehicle_numbers, vehicle_documents_query, vehicle_movements_query
+from app.services.gate_state import GateSequenceError, begin_transition, complete_transition, get_vehicle_state
+from app.services.bulk_gate_entry import create_document_movements
+from app.services.idempotency import idempotent
+from app.services import operational_rollup
+from app.utils.pagination import encode_cursor, decode_cursor, fetch_movement_page
 from datetime import datetime, timedelta
 from typing import List, Optional
 from pydantic import BaseModel
@@ -70,6 +75,13 @@ class BatchGateEntryCreate(BaseModel):
     document_nos: List[str]
     remarks: Optional[str] = None
 
+def check_gate_sequence(db: Session, vehicle_no: str, gate_type: str):
+    """Lock the vehicle's gate state and enforce the Gate-In / Gate-Out sequence (400 when violated)"""
+    try:
+        return begin_transition(db, vehicle_no, gate_type)
+    except GateSequenceError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/search-recent-documents/{vehicle_no}")
 def search_recent_documents(
     vehicle_no: str,
@@ -84,14 +96,7 @@ def search_recent_documents(
     clean_vehicle_no = vehicle_no.strip().upper()
     
     try:
-        query = text("""
-            SELECT * FROM document_data
-            WHERE vehicle_no = :vehicle_no
-            AND document_date >= (CURRENT_TIMESTAMP AT TIME ZONE 'UTC') - INTERVAL '18 hours'
-            ORDER BY document_date DESC
-        """)
-        
-        result = db.execute(query, {"vehicle_no": clean_vehicle_no})
+        result = db.execute(RECENT_DOCUMENTS_SQL, {"vehicle_key": vehicle_key(vehicle_no)})
         documents = result.fetchall()
         
         if not documents:
@@ -148,13 +153,11 @@ def get_vehicle_status(
     db: Session = Depends(get_db),
     current_user: UsersMaster = Depends(get_current_user)
 ):
-    """Get current gate status of a vehicle"""
+    """Get current gate status of a vehicle (primary-key lookup on vehicle_gate_state)"""
     
     clean_vehicle_no = vehicle_no.strip().upper()
     
-    last_entry = db.query(InsightsData).filter(
-        InsightsData.vehicle_no == clean_vehicle_no
-    ).order_by(InsightsData.date.desc(), InsightsData.time.desc()).first()
+    last_entry = get_vehicle_state(db, vehicle_no)
     
     if not last_entry:
         return {
@@ -168,22 +171,25 @@ def get_vehicle_status(
     
     can_gate_in = last_entry.movement_type == "Gate-Out"
     can_gate_out = last_entry.movement_type == "Gate-In"
+    moved_at = local_movement_time(last_entry.moved_at)
+    moved_on = datetime.combine(moved_at.date(), datetime.min.time())
     
     return {
         "vehicle_no": clean_vehicle_no,
         "status": "active",
         "last_movement": {
             "type": last_entry.movement_type,
-            "date": last_entry.date.isoformat(),
-            "time": last_entry.time.isoformat(),
+            "date": moved_on.isoformat(),
+            "time": moved_at.time().isoformat(),
             "gate_entry_no": last_entry.gate_entry_no
         },
         "can_gate_in": can_gate_in,
         "can_gate_out": can_gate_out,
-        "message": f"Last movement: {last_entry.movement_type} on {last_entry.date}"
+        "message": f"Last movement: {last_entry.movement_type} on {moved_on}"
     }
 
 @router.post("/enhanced-batch-gate-entry")
+@idempotent
 def create_enhanced_batch_gate_entry(
     entry: EnhancedGateEntryCreate,
     db: Session = Depends(get_db),
@@ -197,23 +203,8 @@ def create_enhanced_batch_gate_entry(
         
         vehicle_no = entry.vehicle_no.strip().upper()
         
-        # Check GATE IN/OUT SEQUENCE VALIDATION
-        last_entry = db.query(InsightsData).filter(
-            InsightsData.vehicle_no == vehicle_no
-        ).order_by(InsightsData.date.desc(), InsightsData.time.desc()).first()
-        
-        if last_entry:
-            if last_entry.movement_type == entry.gate_type:
-                if entry.gate_type == "Gate-In":
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Vehicle {vehicle_no} already has Gate-In on {last_entry.date}. Must do Gate-Out first."
-                    )
-                else:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Vehicle {vehicle_no} already has Gate-Out on {last_entry.date}. Must do Gate-In first."
-                    )
+        # Check GATE IN/OUT SEQUENCE VALIDATION (locks the vehicle's gate state until commit)
+        gate_state = check_gate_sequence(db, vehicle_no, entry.gate_type)
         
         # Generate gate entry number
         gate_entry_no = generate_gate_entry_no_for_user(current_user.username)
@@ -230,7 +221,7 @@ def create_enhanced_batch_gate_entry(
                     detail="Failed to generate gate entry number. Please check user warehouse assignment."
                 )
         
-        now = datetime.now()
+        now = movement_now()
         security_name = f"{current_user.first_name} {current_user.last_name}"
         security_username = current_user.username
         
@@ -258,63 +249,14 @@ def create_enhanced_batch_gate_entry(
                 raise HTTPException(status_code=400, detail="Maximum 10 loader names allowed")
             operational_data['loader_names'] = ', '.join(names)
         
-        # Process documents if provided
+        # Process documents if provided (one fetch, one multi-row insert, one update)
+        missing_documents = []
         if entry.document_nos:
-            for document_no in entry.document_nos:
-                try:
-                    document = db.query(DocumentData).filter(
-                        DocumentData.document_no == document_no
-                    ).first()
-                    
-                    if not document:
-                        print(f"Document {document_no} not found, skipping...")
-                        continue
-                    
-                    # UPDATE document_data with gate_entry_no
-                    document.gate_entry_no = gate_entry_no
-                    
-                    # CREATE insights_data entry with operational data
-                    insight_record = InsightsData(
-                        gate_entry_no=gate_entry_no,
-                        document_type=document.document_type or "",
-                        sub_document_type=document.sub_document_type or "",
-                        vehicle_no=document.vehicle_no or vehicle_no,
-                        warehouse_name=document.warehouse_name or current_user.warehouse_code,
-                        date=now.date(),
-                        time=now.time(),
-                        movement_type=entry.gate_type,
-                        remarks=entry.remarks or f"Gate entry for {document_no}",
-                        warehouse_code=current_user.warehouse_code,
-                        site_code=current_user.site_code,
-                        security_name=security_name,
-                        security_username=security_username,
-                        document_date=document.document_date,
-                        # NEW: Include operational data if provided
-                        driver_name=operational_data.get('driver_name'),
-                        km_reading=operational_data.get('km_reading'),
-                        loader_names=operational_data.get('loader_names'),
-                        edit_count=0,
-                        last_edited_at=now if operational_data else None
-                    )
-                    
-                    db.add(insight_record)
-                    records_processed += 1
-                    
-                    processed_documents.append({
-                        "document_no": document.document_no,
-                        "document_type": document.document_type,
-                        "vehicle_no": document.vehicle_no,
-                        "status": "success"
-                    })
-                    
-                except Exception as doc_error:
-                    print(f"Error processing document {document_no}: {str(doc_error)}")
-                    processed_documents.append({
-                        "document_no": document_no,
-                        "status": "error",
-                        "error": str(doc_error)
-                    })
-                    continue
+            processed_documents, missing_documents = create_document_movements(
+                db, entry.document_nos, gate_entry_no, vehicle_no, entry.gate_type,
+                entry.remarks, now, current_user, operational_data
+            )
+            records_processed = len(processed_documents) - len(missing_documents)
         else:
             # No documents - create single insights entry for empty vehicle
             insight_record = InsightsData(
@@ -336,13 +278,17 @@ def create_enhanced_batch_gate_entry(
                 km_reading=operational_data.get('km_reading'),
                 loader_names=operational_data.get('loader_names'),
                 edit_count=0,
-                last_edited_at=now if operational_data else None
+                last_edited_at=local_movement_time(now) if operational_data else None
             )
             
             db.add(insight_record)
             records_processed = 1
         
         if records_processed > 0:
+            complete_transition(
+                gate_state, vehicle_no, entry.gate_type, gate_entry_no,
+                current_user.warehouse_code, now
+            )
             db.commit()
             
             # NEW: Calculate operational completeness
@@ -359,6 +305,7 @@ def create_enhanced_batch_gate_entry(
                 "records_processed": records_processed,
                 "total_requested": len(entry.document_nos) if entry.document_nos else 1,
                 "processed_documents": processed_documents,
+                "missing_documents": missing_documents,
                 "date": now.isoformat(),
                 "vehicle_no": vehicle_no,
                 "movement_type": entry.gate_type,
@@ -376,6 +323,7 @@ def create_enhanced_batch_gate_entry(
             raise HTTPException(
                 status_code=400,
                 detail="No documents were processed successfully"
+                + (f". Not found: {', '.join(missing_documents)}" if missing_documents else "")
             )
             
     except HTTPException:
@@ -389,6 +337,7 @@ def create_enhanced_batch_gate_entry(
         )
 
 @router.post("/batch-gate-entry")
+@idempotent
 def create_batch_gate_entry(
     entry: BatchGateEntryCreate,
     db: Session = Depends(get_db),
@@ -402,23 +351,8 @@ def create_batch_gate_entry(
         
         vehicle_no = entry.vehicle_no.strip().upper()
         
-        # Check GATE IN/OUT SEQUENCE VALIDATION
-        last_entry = db.query(InsightsData).filter(
-            InsightsData.vehicle_no == vehicle_no
-        ).order_by(InsightsData.date.desc(), InsightsData.time.desc()).first()
-        
-        if last_entry:
-            if last_entry.movement_type == entry.gate_type:
-                if entry.gate_type == "Gate-In":
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Vehicle {vehicle_no} already has Gate-In on {last_entry.date}. Must do Gate-Out first."
-                    )
-                else:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Vehicle {vehicle_no} already has Gate-Out on {last_entry.date}. Must do Gate-In first."
-                    )
+        # Check GATE IN/OUT SEQUENCE VALIDATION (locks the vehicle's gate state until commit)
+        gate_state = check_gate_sequence(db, vehicle_no, entry.gate_type)
         
         # RAW SQL: Generate gate entry number using fresh database data
         gate_entry_no = generate_gate_entry_no_for_user(current_user.username)
@@ -436,68 +370,20 @@ def create_batch_gate_entry(
                     detail="Failed to generate gate entry number. Please check user warehouse assignment."
                 )
         
-        now = datetime.now()
-        
-        # Get user details for security logging
-        security_name = f"{current_user.first_name} {current_user.last_name}"
-        security_username = current_user.username
-        
-        records_processed = 0
-        processed_documents = []
+        now = movement_now()
         
-        # Process each selected document
-        for document_no in entry.document_nos:
-            try:
-                document = db.query(DocumentData).filter(
-                    DocumentData.document_no == document_no
-                ).first()
-                
-                if not document:
-                    print(f"Document {document_no} not found, skipping...")
-                    continue
-                
-                # UPDATE document_data with gate_entry_no
-                document.gate_entry_no = gate_entry_no
-                
-                # CREATE insights_data entry
-                insight_record = InsightsData(
-                    gate_entry_no=gate_entry_no,
-                    document_type=document.document_type or "",
-                    sub_document_type=document.sub_document_type or "",
-                    vehicle_no=document.vehicle_no or vehicle_no,
-                    warehouse_name=document.warehouse_name or current_user.warehouse_code,
-                    date=now.date(),
-                    time=now.time(),
-                    movement_type=entry.gate_type,
-                    remarks=entry.remarks or f"Gate entry for {document_no}",
-                    warehouse_code=current_user.warehouse_code,
-                    site_code=current_user.site_code,
-                    security_name=security_name,
-                    security_username=security_username,
-                    document_date=document.document_date,
-                    edit_count=0
-                )
-                
-                db.add(insight_record)
-                records_processed += 1
-                
-                processed_documents.append({
-                    "document_no": document.document_no,
-                    "document_type": document.document_type,
-                    "vehicle_no": document.vehicle_no,
-                    "status": "success"
-                })
-                
-            except Exception as doc_error:
-                print(f"Error processing document {document_no}: {str(doc_error)}")
-                processed_documents.append({
-                    "document_no": document_no,
-                    "status": "error",
-                    "error": str(doc_error)
-                })
-                continue
+        # Process the selected documents (one fetch, one multi-row insert, one update)
+        processed_documents, missing_documents = create_document_movements(
+            db, entry.document_nos, gate_entry_no, vehicle_no, entry.gate_type,
+            entry.remarks, now, current_user
+        )
+        records_processed = len(processed_documents) - len(missing_documents)
         
         if records_processed > 0:
+            complete_transition(
+                gate_state, vehicle_no, entry.gate_type, gate_entry_no,
+                current_user.warehouse_code, now
+            )
             db.commit()
             
             return {
@@ -506,6 +392,7 @@ def create_batch_gate_entry(
                 "records_processed": records_processed,
                 "total_requested": len(entry.document_nos),
                 "processed_documents": processed_documents,
+                "missing_documents": missing_documents,
                 "date": now.isoformat(),
                 "vehicle_no": vehicle_no,
                 "movement_type": entry.gate_type
@@ -515,6 +402,7 @@ def create_batch_gate_entry(
             raise HTTPException(
                 status_code=400,
                 detail="No documents were processed successfully"
+                + (f". Not found: {', '.join(missing_documents)}" if missing_documents else "")
             )
             
     except HTTPException:
@@ -528,6 +416,7 @@ def create_batch_gate_entry(
         )
 
 @router.post("/enhanced-manual-gate-entry", response_model=GateEntryResponse)
+@idempotent
 def create_enhanced_manual_gate_entry(
     entry: EnhancedManualGateEntryCreate,
     db: Session = Depends(get_db),
@@ -541,23 +430,8 @@ def create_enhanced_manual_gate_entry(
         
         vehicle_no = entry.vehicle_no.strip().upper()
         
-        # Check GATE IN/OUT SEQUENCE VALIDATION
-        last_entry = db.query(InsightsData).filter(
-            InsightsData.vehicle_no == vehicle_no
-        ).order_by(InsightsData.date.desc(), InsightsData.time.desc()).first()
-        
-        if last_entry:
-            if last_entry.movement_type == entry.gate_type:
-                if entry.gate_type == "Gate-In":
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Vehicle {vehicle_no} already has Gate-In. Must do Gate-Out first."
-                    )
-                else:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Vehicle {vehicle_no} already has Gate-Out. Must do Gate-In first."
-                    )
+        # Check GATE IN/OUT SEQUENCE VALIDATION (locks the vehicle's gate state until commit)
+        gate_state = check_gate_sequence(db, vehicle_no, entry.gate_type)
         
         # Generate gate entry number
         gate_entry_no = generate_gate_entry_no_for_user(current_user.username)
@@ -574,7 +448,7 @@ def create_enhanced_manual_gate_entry(
                     detail="Failed to generate gate entry number. Please check user warehouse assignment."
                 )
         
-        now = datetime.now()
+        now = movement_now()
         warehouse_name = getattr(current_user, 'warehouse_name', f"Warehouse-{current_user.warehouse_code}")
         
         # NEW: Process operational data
@@ -610,10 +484,14 @@ def create_enhanced_manual_gate_entry(
             km_reading=operational_data.get('km_reading'),
             loader_names=operational_data.get('loader_names'),
             edit_count=0,
-            last_edited_at=now if operational_data else None
+            last_edited_at=local_movement_time(now) if operational_data else None
         )
         
         db.add(insight_record)
+        complete_transition(
+            gate_state, vehicle_no, entry.gate_type, gate_entry_no,
+            current_user.warehouse_code, insight_record.moved_at
+        )
         db.commit()
         
         return GateEntryResponse(
@@ -637,6 +515,7 @@ def create_enhanced_manual_gate_entry(
         )
 
 @router.post("/manual-gate-entry", response_model=GateEntryResponse)
+@idempotent
 def create_manual_gate_entry(
     entry: ManualGateEntryCreate,
     db: Session = Depends(get_db),
@@ -650,23 +529,8 @@ def create_manual_gate_entry(
         
         vehicle_no = entry.vehicle_no.strip().upper()
         
-        # Check GATE IN/OUT SEQUENCE VALIDATION
-        last_entry = db.query(InsightsData).filter(
-            InsightsData.vehicle_no == vehicle_no
-        ).order_by(InsightsData.date.desc(), InsightsData.time.desc()).first()
-        
-        if last_entry:
-            if last_entry.movement_type == entry.gate_type:
-                if entry.gate_type == "Gate-In":
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Vehicle {vehicle_no} already has Gate-In. Must do Gate-Out first."
-                    )
-                else:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Vehicle {vehicle_no} already has Gate-Out. Must do Gate-In first."
-                    )
+        # Check GATE IN/OUT SEQUENCE VALIDATION (locks the vehicle's gate state until commit)
+        gate_state = check_gate_sequence(db, vehicle_no, entry.gate_type)
         
         # RAW SQL: Generate gate entry number using fresh database data
         gate_entry_no = generate_gate_entry_no_for_user(current_user.username)
@@ -684,7 +548,7 @@ def create_manual_gate_entry(
                     detail="Failed to generate gate entry number. Please check user warehouse assignment."
                 )
         
-        now = datetime.now()
+        now = movement_now()
         
         # Get warehouse name safely
         warehouse_name = getattr(current_user, 'warehouse_name', f"Warehouse-{current_user.warehouse_code}")
@@ -708,6 +572,10 @@ def create_manual_gate_entry(
         )
         
         db.add(insight_record)
+        complete_transition(
+            gate_state, vehicle_no, entry.gate_type, gate_entry_no,
+            current_user.warehouse_code, insight_record.moved_at
+        )
         db.commit()
         
         return GateEntryResponse(
@@ -736,25 +604,27 @@ def get_documents_by_vehicle(
     db: Session = Depends(get_db),
     current_user: UsersMaster = Depends(get_current_user)
 ):
-    """Enhanced document search by vehicle number"""
+    """Enhanced document search by vehicle number (partial / fuzzy plates, best match first)"""
     
     if not vehicle_no.strip():
         raise HTTPException(status_code=400, detail="Vehicle number cannot be empty")
     
-    clean_vehicle_no = vehicle_no.strip().upper()
-    
-    documents = db.query(DocumentData).filter(
-        DocumentData.vehicle_no.ilike(f"%{clean_vehicle_no}%")
-    ).all()
-    
-    if not documents:
+    matches = match_vehicle_numbers(db, "document_data", vehicle_no)
+    if not matches:
         raise HTTPException(
             status_code=404, 
             detail=f"No documents found for vehicle: {vehicle_no}"
         )
     
+    scores = {match["vehicle_key"]: match["score"] for match in matches}
+    rank = {match["vehicle_key"]: index for index, match in enumerate(matches)}
+    documents = vehicle_documents_query(db, list(scores)).all()
+    # Best matching vehicle first, newest documents first within a vehicle
+    documents.sort(key=lambda doc: rank[doc.vehicle_key])
+    
     return [
         {
+            "match_score": scores[doc.vehicle_key],
             "document_no": doc.document_no,
             "document_type": doc.document_type,
             "sub_document_type": doc.sub_document_type,
@@ -779,28 +649,67 @@ def get_documents_by_vehicle(
 @router.get("/vehicle-history/{vehicle_no}")
 def get_vehicle_history(
     vehicle_no: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: UsersMaster = Depends(get_current_user)
 ):
-    """Get complete movement history for a vehicle"""
+    """Get movement history for a vehicle (partial / fuzzy plates, best match first)
+
+    Paged: best matching vehicle first, newest movements first within a
+    vehicle. Pass the returned next_cursor back as ?cursor= to continue; the
+    cursor carries the vehicle matches, so later pages skip the fuzzy search.
+    """
     
     clean_vehicle_no = vehicle_no.strip().upper()
     
-    movements = db.query(InsightsData).filter(
-        InsightsData.vehicle_no.ilike(f"%{clean_vehicle_no}%")
-    ).order_by(InsightsData.date.desc(), InsightsData.time.desc()).all()
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+            matches = position["matches"]
+            vehicle_index = int(position["vehicle"])
+            after = position.get("after")
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    else:
+        matches = match_vehicle_numbers(db, "insights_data", vehicle_no)
+        if not matches:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No movement history found for vehicle: {vehicle_no}"
+            )
+        vehicle_index, after = 0, None
     
-    if not movements:
-        raise HTTPException(
-            status_code=404,
-            detail=f"No movement history found for vehicle: {vehicle_no}"
-        )
+    # Each vehicle is a keyset range scan on (vehicle_key, moved_at, id)
+    history = []
+    while vehicle_index < len(matches) and len(history) < limit:
+        match = matches[vehicle_index]
+        try:
+            movements, after = fetch_movement_page(
+                vehicle_movements_query(db, match["vehicle_key"]),
+                after,
+                limit - len(history)
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        history.extend((match, move) for move in movements)
+        if after is None:
+            vehicle_index += 1
+    
+    next_cursor = None
+    if vehicle_index < len(matches):
+        next_cursor = encode_cursor({"matches": matches, "vehicle": vehicle_index, "after": after})
     
     return {
         "vehicle_no": clean_vehicle_no,
-        "total_movements": len(movements),
+        "matched_vehicles": matches,
+        "count": len(history),
+        "has_more": next_cursor is not None,
+        "next_cursor": next_cursor,
         "history": [
             {
+                "vehicle_no": move.vehicle_no,
+                "match_score": match["score"],
                 "gate_entry_no": move.gate_entry_no,
                 "date": move.date,
                 "time": move.time,
@@ -815,7 +724,7 @@ def get_vehicle_history(
                 "loader_names": move.loader_names,
                 "edit_count": move.edit_count or 0
             }
-            for move in movements
+            for match, move in history
         ]
     }
 
@@ -824,54 +733,29 @@ def get_operational_data_summary(
     db: Session = Depends(get_db),
     current_user: UsersMaster = Depends(get_current_user)
 ):
-    """Get summary of operational data completion rates"""
+    """Get summary of operational data completion rates (last 7 days, from warehouse_daily_rollup)"""
     try:
-        # Base query with warehouse filter
-        base_query = db.query(InsightsData)
-        if current_user.role != "Admin":
-            base_query = base_query.filter(
-                InsightsData.warehouse_code == current_user.warehouse_code
-            )
-        
-        # Get records from last 7 days
         seven_days_ago = datetime.now() - timedelta(days=7)
-        recent_records = base_query.filter(
-            InsightsData.date >= seven_days_ago.date()
-        ).all()
+        totals = operational_rollup.get_rollup_totals(
+            db,
+            since=seven_days_ago.date(),
+            warehouse_code=current_user.warehouse_code,
+            scoped=current_user.role != "Admin"  # Warehouse filter for non-admins
+        )
         
-        if not recent_records:
+        total_records = totals["movements"]
+        if not total_records:
             return {
                 "total_records": 0,
                 "completion_stats": {},
                 "recommendations": []
             }
         
-        # Calculate completion statistics
-        total_records = len(recent_records)
-        complete_operational = 0
-        missing_driver = 0
-        missing_km = 0
-        missing_loaders = 0
-        multiple_edits = 0
-        
-        for record in recent_records:
-            # Check operational completeness
-            if (record.driver_name and record.driver_name.strip() and
-                record.km_reading and record.km_reading.strip() and
-                record.loader_names and record.loader_names.strip()):
-                complete_operational += 1
-            
-            # Count missing fields
-            if not (record.driver_name and record.driver_name.strip()):
-                missing_driver += 1
-            if not (record.km_reading and record.km_reading.strip()):
-                missing_km += 1
-            if not (record.loader_names and record.loader_names.strip()):
-                missing_loaders += 1
-            
-            # Count records with multiple edits
-            if (record.edit_count or 0) > 1:
-                multiple_edits += 1
+        complete_operational = totals["complete_operational"]
+        missing_driver = totals["missing_driver"]
+        missing_km = totals["missing_km"]
+        missing_loaders = totals["missing_loaders"]
+        multiple_edits = totals["multiple_edits"]
         
         completion_percentage = (complete_operational / total_records * 100) if total_records > 0 else 0
         
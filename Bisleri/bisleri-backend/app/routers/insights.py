@@ -2,12 +2,17 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 from app.database import get_db
 from app.models import InsightsData, DocumentData
-from app.schemas import InsightsFilter, OperationalDataEdit, EnhancedMovementResponse, EditStatistics, KMReadingContext
+from app.schemas import MovementFilter, OperationalDataEdit, EnhancedMovementResponse, EditStatistics, KMReadingContext
 from app.auth import get_current_user
 from app.models import UsersMaster 
+from app.utils.pagination import encode_cursor
+from app.services.movement_filters import fetch_filtered_movements
+from app.services import edit_statistics
+from app.services.idempotency import idempotent
+from app.utils.helpers import movement_now, local_movement_time
 from pydantic import BaseModel
 from typing import Optional, List
 
@@ -15,39 +20,30 @@ router = APIRouter(tags=["Insights"])
 
 @router.post("/filtered-movements")
 def get_enhanced_filtered_movements(
-    filters: dict,
+    filters: MovementFilter,
     db: Session = Depends(get_db),
     current_user: UsersMaster = Depends(get_current_user)
 ):
-    """Get filtered movements with enhanced operational edit status"""
+    """Get filtered movements with enhanced operational edit status
+
+    Paged newest first: pass the returned next_cursor back as "cursor" (with
+    the same filters) to continue; "limit" sets the page size.
+    """
     try:
-        # Build dynamic query
-        query = db.query(InsightsData)
-        
-        # Date filters
-        if filters.get('from_date'):
-            query = query.filter(InsightsData.date >= filters['from_date'])
-        if filters.get('to_date'):
-            query = query.filter(InsightsData.date <= filters['to_date'])
-            
-        # Vehicle number filter
-        if filters.get('vehicle_no'):
-            vehicle_filter = f"%{filters['vehicle_no'].upper()}%"
-            query = query.filter(InsightsData.vehicle_no.ilike(vehicle_filter))
-            
-        # Movement type filter
-        if filters.get('movement_type'):
-            query = query.filter(InsightsData.movement_type == filters['movement_type'])
-        
         # Security filter for non-admins
+        warehouse_scope = None
         if current_user.role != "Admin":
-            query = query.filter(InsightsData.warehouse_code == current_user.warehouse_code)
-        
-        # Execute query
-        movements = query.order_by(
-            InsightsData.date.desc(), 
-            InsightsData.time.desc()
-        ).limit(500).all()
+            if not current_user.warehouse_code:
+                raise HTTPException(status_code=403, detail="No warehouse assigned to user")
+            if filters.warehouse_code and filters.warehouse_code != current_user.warehouse_code:
+                raise HTTPException(status_code=403, detail="Access denied to other warehouse movements")
+            warehouse_scope = current_user.warehouse_code
+        
+        # Execute query (one keyset page)
+        try:
+            movements, last_position = fetch_filtered_movements(db, filters, warehouse_scope)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
         
         # ✅ NEW: Enhanced response with operational edit status
         result_list = []
@@ -103,14 +99,19 @@ def get_enhanced_filtered_movements(
         return {
             "count": len(result_list),
             "results": result_list,
-            "filters_applied": filters
+            "has_more": last_position is not None,
+            "next_cursor": encode_cursor({"after": last_position}) if last_position else None,
+            "filters_applied": filters.dict(exclude_none=True, exclude={"cursor"})
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in enhanced filtered movements: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Filter error: {str(e)}")
 
 @router.put("/update-operational-data")
+@idempotent
 def update_operational_data(
     edit_data: OperationalDataEdit,
     db: Session = Depends(get_db),
@@ -119,16 +120,13 @@ def update_operational_data(
     """Update operational fields with enhanced 24-hour window logic"""
     try:
         # Find the insights record
-        insights_record = db.query(InsightsData).filter(
-            InsightsData.gate_entry_no == edit_data.gate_entry_no
-        ).first()
+        insights_record = edit_statistics.gate_entry_movement_query(db, edit_data.gate_entry_no).first()
         
         if not insights_record:
             raise HTTPException(status_code=404, detail="Gate entry not found")
         
         # ✅ NEW: Check 24-hour edit window (extended from 12)
-        entry_datetime = datetime.combine(insights_record.date, insights_record.time)
-        time_elapsed = datetime.now() - entry_datetime
+        time_elapsed = datetime.now(timezone.utc) - insights_record.movement_datetime()
         
         if time_elapsed.total_seconds() > 24 * 60 * 60:  # 24 hours in seconds
             raise HTTPException(
@@ -163,7 +161,7 @@ def update_operational_data(
             fields_updated.append('remarks')
         
         # ✅ NEW: Update edit tracking
-        insights_record.last_edited_at = datetime.now()
+        insights_record.last_edited_at = local_movement_time(movement_now())
         insights_record.edit_count = (insights_record.edit_count or 0) + 1
         
         # Commit changes
@@ -199,116 +197,14 @@ def get_edit_statistics(
     db: Session = Depends(get_db),
     current_user: UsersMaster = Depends(get_current_user)
 ):
-    """Get statistics about record completion and edit status"""
+    """Get statistics about record completion and edit status (last 30 days, one aggregate query)"""
     try:
-        base_query = db.query(InsightsData)
-        
         # Filter by warehouse for non-admins
-        if current_user.role != "Admin":
-            base_query = base_query.filter(
-                InsightsData.warehouse_code == current_user.warehouse_code
-            )
-        
-        # Get all records from last 30 days
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        records = base_query.filter(InsightsData.date >= thirty_days_ago.date()).all()
-        
-        if not records:
-            return EditStatistics(
-                total_records=0, needs_completion=0, complete_and_editable=0,
-                expired=0, completion_percentage=0.0, within_6_hours=0,
-                within_12_hours=0, within_24_hours=0, missing_driver=0,
-                missing_km=0, missing_loaders=0, edited_today=0,
-                most_edited_record=None, avg_edits_per_record=0.0
-            )
-        
-        # Calculate statistics
-        total_records = len(records)
-        needs_completion = 0
-        complete_and_editable = 0
-        expired = 0
-        
-        within_6_hours = 0
-        within_12_hours = 0
-        within_24_hours = 0
-        
-        missing_driver = 0
-        missing_km = 0
-        missing_loaders = 0
-        
-        edited_today = 0
-        edit_counts = []
-        max_edits = 0
-        most_edited_record = None
-        
-        today = datetime.now().date()
-        
-        for record in records:
-            edit_status = record.get_edit_status()
-            
-            # Count by edit status
-            if edit_status == 'needs_completion':
-                needs_completion += 1
-            elif edit_status == 'editable':
-                complete_and_editable += 1
-            elif edit_status == 'expired':
-                expired += 1
-            
-            # Count missing fields
-            missing_fields = record.get_missing_operational_fields()
-            if 'driver_name' in missing_fields:
-                missing_driver += 1
-            if 'km_reading' in missing_fields:
-                missing_km += 1
-            if 'loader_names' in missing_fields:
-                missing_loaders += 1
-            
-            # Time-based counting
-            if record.date and record.time:
-                record_datetime = datetime.combine(record.date, record.time)
-                time_elapsed = datetime.now() - record_datetime
-                
-                if time_elapsed <= timedelta(hours=6):
-                    within_6_hours += 1
-                elif time_elapsed <= timedelta(hours=12):
-                    within_12_hours += 1
-                elif time_elapsed <= timedelta(hours=24):
-                    within_24_hours += 1
-            
-            # Edit tracking
-            edit_count = record.edit_count or 0
-            edit_counts.append(edit_count)
-            
-            if edit_count > max_edits:
-                max_edits = edit_count
-                most_edited_record = record.gate_entry_no
-            
-            if record.last_edited_at and record.last_edited_at.date() == today:
-                edited_today += 1
-        
-        # Calculate completion percentage
-        operational_complete = complete_and_editable + expired  # Expired records are assumed complete
-        completion_percentage = (operational_complete / total_records * 100) if total_records > 0 else 0.0
-        
-        # Calculate average edits
-        avg_edits = sum(edit_counts) / len(edit_counts) if edit_counts else 0.0
-        
-        return EditStatistics(
-            total_records=total_records,
-            needs_completion=needs_completion,
-            complete_and_editable=complete_and_editable,
-            expired=expired,
-            completion_percentage=round(completion_percentage, 1),
-            within_6_hours=within_6_hours,
-            within_12_hours=within_12_hours,
-            within_24_hours=within_24_hours,
-            missing_driver=missing_driver,
-            missing_km=missing_km,
-            missing_loaders=missing_loaders,
-            edited_today=edited_today,
-            most_edited_record=most_edited_record,
-            avg_edits_per_record=round(avg_edits, 1)
+        scoped = current_user.role != "Admin"
+        stats = edit_statistics.get_edit_statistics(
+            db, warehouse_code=current_user.warehouse_code, scoped=scoped
         )
+        return EditStatistics(**stats)
         
     except Exception as e:
         print(f"Error getting edit statistics: {str(e)}")
@@ -323,21 +219,15 @@ def get_km_reading_context(
     """Get context for KM reading input (previous readings, suggested range)"""
     try:
         # Get the target record
-        record = db.query(InsightsData).filter(
-            InsightsData.gate_entry_no == gate_entry_no
-        ).first()
+        record = edit_statistics.gate_entry_movement_query(db, gate_entry_no).first()
         
         if not record:
             raise HTTPException(status_code=404, detail="Gate entry not found")
         
         # Get previous KM reading for this vehicle
         previous_reading = None
-        if record.vehicle_no:
-            previous_record = db.query(InsightsData).filter(
-                InsightsData.vehicle_no == record.vehicle_no,
-                InsightsData.date < record.date,
-                InsightsData.km_reading.isnot(None)
-            ).order_by(InsightsData.date.desc(), InsightsData.time.desc()).first()
+        if record.vehicle_key:
+            previous_record = edit_statistics.previous_km_reading_query(db, record).first()
             
             if previous_record and previous_record.km_reading:
                 previous_reading = previous_record.km_reading
@@ -377,39 +267,29 @@ def get_records_needing_completion(
 ):
     """Get all records that need operational data completion (YELLOW button candidates)"""
     try:
-        base_query = db.query(InsightsData)
-        
-        # Filter by warehouse for non-admins
-        if current_user.role != "Admin":
-            base_query = base_query.filter(
-                InsightsData.warehouse_code == current_user.warehouse_code
-            )
-        
-        # Only get records within 24-hour edit window
-        twenty_four_hours_ago = datetime.now() - timedelta(hours=24)
-        recent_records = base_query.filter(
-            InsightsData.date >= twenty_four_hours_ago.date()
-        ).all()
+        # Only records inside the 24-hour edit window with missing operational data
+        # are read (filtered in SQL); non-admins see their own warehouse only
+        recent_records = edit_statistics.get_records_needing_completion(
+            db, warehouse_code=current_user.warehouse_code, scoped=current_user.role != "Admin"
+        )
         
-        # Filter records that need completion
         needing_completion = []
         for record in recent_records:
-            if record.get_edit_status() == 'needs_completion':
-                button_config = record.get_edit_button_config(
-                    current_user.username, 
-                    current_user.role
-                )
-                
-                needing_completion.append({
-                    "gate_entry_no": record.gate_entry_no,
-                    "vehicle_no": record.vehicle_no,
-                    "date": record.date.isoformat(),
-                    "time": record.time.isoformat(),
-                    "movement_type": record.movement_type,
-                    "missing_fields": record.get_missing_operational_fields(),
-                    "time_remaining": record.get_time_remaining(),
-                    "button_config": button_config
-                })
+            button_config = record.get_edit_button_config(
+                current_user.username, 
+                current_user.role
+            )
+            
+            needing_completion.append({
+                "gate_entry_no": record.gate_entry_no,
+                "vehicle_no": record.vehicle_no,
+                "date": record.date.isoformat(),
+                "time": record.time.isoformat(),
+                "movement_type": record.movement_type,
+                "missing_fields": record.get_missing_operational_fields(),
+                "time_remaining": record.get_time_remaining(),
+                "button_config": button_config
+            })
         
         return {
             "count": len(needing_completion),
@@ -422,6 +302,7 @@ def get_records_needing_completion(
 
 # ✅ BACKWARD COMPATIBILITY: Keep the old edit endpoint for gradual migration
 @router.put("/update-gate-entry")
+@idempotent
 def update_gate_entry_legacy(
     edit_data: dict,
     db: Session = Depends(get_db),
@@ -1,15 +1,54 @@
-from fastapi import APIRouter, HTTPException
-from app.services.data_sync_service import data_sync_service
+import asyncio
+import json
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+from app.services.ingest_service import ingest_service, ChunkQueueReader, STAGING_MODELS
+from app.services.sync_run_service import get_recent_sync_runs, get_sync_run
+from app.services.sync_coordination import sync_coordinator
+from app.scheduler import sync_service
+from app.services.consolidation import SYNC_SOURCES
+from app.services.partition_service import maintain_partitions, get_partition_status
+from app.auth import get_current_admin
+from app.models import UsersMaster
 
 router = APIRouter(prefix="/sync", tags=["sync"])
 
 @router.post("/manual")
-async def manual_sync():
-    """Manually trigger data sync from mfabric tables to document_data"""
+async def manual_sync(
+    dry_run: bool = False,
+    incremental: bool = False,
+    sample_size: int = Query(10, ge=0, le=100),
+    current_user: UsersMaster = Depends(get_current_admin)
+):
+    """Manually trigger data sync from mfabric tables to document_data
+
+    If a sync is already running (here or in another worker) this call joins it
+    and returns its outcome instead of starting a duplicate run.
+    With dry_run=true nothing is written: the response lists how many documents
+    would be inserted/updated, which columns change, and a sample of the diffs.
+    With incremental=true (both modes) only documents with new staging rows are
+    consolidated.
+    """
+    if dry_run:
+        try:
+            return await run_in_threadpool(
+                sync_service.preview_sync, incremental=incremental, sample_size=sample_size
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Dry run error: {str(e)}")
+
     try:
-        success = data_sync_service.push_to_document_data()
-        if success:
-            return {"message": "Data sync completed successfully", "status": "success"}
+        # Blocking DB work runs off the event loop so concurrent callers can join it
+        result = await run_in_threadpool(
+            sync_coordinator.run, sync_service.push_to_document_data, incremental=incremental, trigger="manual"
+        )
+        if result["success"]:
+            return {
+                "message": "Data sync completed successfully",
+                "status": "success",
+                "joined_in_flight_run": result["joined"]
+            }
         else:
             raise HTTPException(status_code=500, detail="Data sync failed")
     except Exception as e:
@@ -19,7 +58,7 @@ async def manual_sync():
 async def sync_status():
     """Get current sync status and record counts"""
     try:
-        status = data_sync_service.get_sync_status()
+        status = sync_service.get_sync_status()
         if status:
             return status
         else:
@@ -38,4 +77,127 @@ async def get_sync_logs():
     except FileNotFoundError:
         return {"logs": ["No logs available yet"]}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading logs: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error reading logs: {str(e)}")
+
+@router.get("/runs")
+async def list_sync_runs(
+    limit: int = Query(50, ge=1, le=500),
+    trigger: Optional[str] = None,
+    status: Optional[str] = None,
+    current_user: UsersMaster = Depends(get_current_admin)
+):
+    """Get sync run history (newest first) with per-stage and per-source timings"""
+    try:
+        runs = get_recent_sync_runs(limit=limit, trigger=trigger, status=status)
+        return {"count": len(runs), "runs": runs}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading sync runs: {str(e)}")
+
+@router.get("/runs/{run_id}")
+async def sync_run_detail(run_id: int, current_user: UsersMaster = Depends(get_current_admin)):
+    """Get a single sync run"""
+    try:
+        run = get_sync_run(run_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading sync run: {str(e)}")
+    if not run:
+        raise HTTPException(status_code=404, detail=f"Sync run {run_id} not found")
+    return run
+
+
+@router.post("/backfill", status_code=202)
+async def start_backfill(
+    background_tasks: BackgroundTasks,
+    chunk_size: int = Query(5000, ge=100, le=100000),
+    restart: bool = False,
+    source: Optional[str] = None,
+    current_user: UsersMaster = Depends(get_current_admin)
+):
+    """Start a chunked, resumable backfill in the background (progress via GET /sync/backfill)"""
+    if source and source not in [s['table'] for s in SYNC_SOURCES]:
+        raise HTTPException(status_code=400, detail=f"Unknown staging table: {source}")
+    sources = [source] if source else None
+    background_tasks.add_task(
+        sync_coordinator.run,
+        sync_service.backfill_to_document_data,
+        chunk_size=chunk_size,
+        restart=restart,
+        sources=sources,
+        trigger="backfill"
+    )
+    return {"message": "Backfill started", "status": "accepted", "chunk_size": chunk_size, "restart": restart}
+
+@router.get("/backfill")
+async def backfill_progress(current_user: UsersMaster = Depends(get_current_admin)):
+    """Get backfill checkpoints per staging table"""
+    try:
+        return {"progress": sync_service.get_backfill_progress()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading backfill progress: {str(e)}")
+@router.get("/partitions")
+async def partition_status(current_user: UsersMaster = Depends(get_current_admin)):
+    """Get attached monthly partitions of the partitioned tables"""
+    try:
+        return {"tables": get_partition_status()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading partitions: {str(e)}")
+
+@router.post("/partitions/maintain")
+async def run_partition_maintenance(current_user: UsersMaster = Depends(get_current_admin)):
+    """Create upcoming partitions and detach expired ones now (the sync leader also does this daily)"""
+    return {"tables": await run_in_threadpool(maintain_partitions)}
+
+@router.post("/ingest/{table}")
+async def ingest_staging_data(
+    table: str,
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    mapping: Optional[str] = Query(None, description='JSON object of input field -> staging column'),
+    on_error: str = Query("abort", pattern="^(abort|skip)$"),
+    consolidate: bool = False,
+    current_user: UsersMaster = Depends(get_current_admin)
+):
+    """Bulk load a CSV (with header) or NDJSON request body into a staging table via COPY (Admin only)
+
+    The body is streamed straight into COPY and never held in memory as a whole.
+    With consolidate=true an incremental sync of that table runs after the load.
+    """
+    if table not in STAGING_MODELS:
+        raise HTTPException(status_code=400, detail=f"Unknown staging table: {table}")
+    try:
+        column_mapping = json.loads(mapping) if mapping else None
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="mapping must be a JSON object")
+    if column_mapping is not None and not isinstance(column_mapping, dict):
+        raise HTTPException(status_code=400, detail="mapping must be a JSON object")
+
+    # COPY runs in a worker thread, reading the body as this coroutine receives it
+    reader = ChunkQueueReader()
+    load = asyncio.ensure_future(run_in_threadpool(
+        ingest_service.ingest, table, reader, format, column_mapping, on_error
+    ))
+    try:
+        async for chunk in request.stream():
+            if chunk and not await run_in_threadpool(reader.feed, chunk):
+                break  # loader stopped early (validation / database error)
+    finally:
+        await run_in_threadpool(reader.feed, None)
+
+    try:
+        result = await load
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Ingest rejected: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ingest error: {str(e)}")
+
+    result["consolidated"] = None
+    if consolidate and result["rows_loaded"]:
+        sync_result = await run_in_threadpool(
+            sync_coordinator.run,
+            sync_service.push_to_document_data,
+            incremental=True,
+            sources=[table],
+            trigger="ingest"
+        )
+        result["consolidated"] = sync_result["success"]
+    return result
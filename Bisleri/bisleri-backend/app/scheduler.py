@@ -1,24 +1,36 @@
 import logging
-import os
-from datetime import datetime
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 from sqlalchemy import text
 from app.database import engine
 from app.config import settings
+from app.services.sync_run_service import SyncRunRecorder, SYNC_LOG_FILE, get_sync_file_logger
+from app.services.sync_coordination import LeaderElection, sync_coordinator
+from app.services.sync_events import MfabricChangeListener
+from app.services.consolidation import (
+    SYNC_SOURCES, archive_table, build_overlap_check_sql, build_preview_sql, check_exclusive_documents,
+    check_unique_documents, run_consolidation
+)
+from app.services.partition_service import maintain_partitions
+from app.services.ingest_service import STAGING_MODELS
 
 logger = logging.getLogger(__name__)
 
 class DataSyncService:
     def __init__(self):
-        self.log_file = "sync_log.txt"
+        self.log_file = SYNC_LOG_FILE
+        self.file_logger = get_sync_file_logger()
     
     def log_message(self, message: str):
-        """Log messages to both file and console"""
+        """Log messages to both the rotating sync log file and console"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_entry = f"[{timestamp}] {message}"
         
-        # Write to file
-        with open(self.log_file, "a") as f:
-            f.write(log_entry + "\n")
+        # Write to file (rotated, kept across cycles)
+        self.file_logger.info(message)
         
         # Also log using logger
         logger.info(message)
@@ -127,29 +139,554 @@ class DataSyncService:
             self.log_message(f"Error checking target table: {str(e)}")
             return 0
 
-    def clear_log_file(self):
-        """Clear the log file to start fresh for each sync cycle"""
+    def get_watermark(self, conn, table: str) -> tuple:
+        """Get the (last_id, last_xact_id) already consolidated for a source table
+
+        last_xact_id covers every staging row loaded by an older transaction;
+        last_id the rows loaded before load_xact_id was recorded (NULL there).
+        """
+        result = conn.execute(
+            text("SELECT last_id, last_xact_id FROM sync_watermarks WHERE source_table = :table"),
+            {"table": table}
+        ).fetchone()
+        return (result.last_id, result.last_xact_id or 0) if result else (0, 0)
+
+    def set_watermark(self, conn, table: str, last_id: int, last_xact_id: int):
+        """Persist the high-water marks for a source table (they never move back)"""
+        conn.execute(text("""
+            INSERT INTO sync_watermarks (source_table, last_id, last_xact_id, updated_at)
+            VALUES (:table, :last_id, :last_xact_id, NOW())
+            ON CONFLICT (source_table) DO UPDATE SET
+                last_id = GREATEST(sync_watermarks.last_id, EXCLUDED.last_id),
+                last_xact_id = GREATEST(sync_watermarks.last_xact_id, EXCLUDED.last_xact_id),
+                updated_at = EXCLUDED.updated_at
+        """), {"table": table, "last_id": last_id, "last_xact_id": last_xact_id})
+
+    def get_high_watermark(self, conn, table: str) -> tuple:
+        """(last_id, last_xact_id) a pass over the source's current staging rows can advance to
+
+        Ids are taken at insert time, not in commit order, so a MAX(id) would
+        move past the lower ids of a load that is still running. The
+        transaction bound is the oldest transaction still running instead:
+        every load below it has finished, so nothing can still appear under
+        the watermark. Loads from that transaction on wait for a later pass.
+        """
+        high_id = conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {table}")).scalar()
+        high_xact_id = conn.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")).scalar()
+        return high_id, high_xact_id
+
+    def get_incremental_filter(self, conn, table: str, key: str = ""):
+        """Get (low, high, pending, document_filter, params) for an incremental pass over a source
+
+        low and high are (last_id, last_xact_id) watermarks; pending says
+        whether any staging row lies between them. The filter selects every
+        document_no with such rows; key prefixes its bind parameters so several
+        sources can share one statement. First incremental run has no watermark
+        yet: no filter, aggregate everything once.
+        """
+        low = self.get_watermark(conn, table)
+        high = self.get_high_watermark(conn, table)
+        if low == (0, 0):
+            pending = conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {table})")).scalar()
+            return low, high, pending, "", {}
+        
+        # Rows loaded before load_xact_id was recorded have all committed, so their ids are safe
+        pending_rows = f"""
+            (load_xact_id IS NULL AND id > :{key}low_id AND id <= :{key}high_id)
+            OR (load_xact_id >= :{key}low_xact_id AND load_xact_id < :{key}high_xact_id)
+        """
+        params = {
+            f"{key}low_id": low[0], f"{key}high_id": high[0],
+            f"{key}low_xact_id": low[1], f"{key}high_xact_id": high[1],
+        }
+        pending = conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {table} WHERE {pending_rows})"), params).scalar()
+        document_filter = f"""
+            WHERE document_no IN (
+                SELECT document_no FROM {table}
+                WHERE {pending_rows}
+            )
+        """
+        return low, high, pending, document_filter, params
+
+    def select_sources(self, conn, sources: list, source_counts: dict = None, incremental: bool = False):
+        """Build the (source, document_filter) selections, bind params and new watermarks for a pass
+
+        Sources with nothing to do (empty in a full run, no new rows in an
+        incremental one) are left out.
+        """
+        selections, params, watermarks = [], {}, {}
+        for index, source in enumerate(sources):
+            label = source['label']
+            table = source['table']
+            
+            if not incremental:
+                if source_counts is not None and source_counts.get(table, 0) == 0:
+                    self.log_message(f"⚠ Skipping {label} - no source data")
+                    continue
+                selections.append((source, ""))
+                continue
+            
+            low, high, pending, document_filter, source_params = self.get_incremental_filter(
+                conn, table, key=f"s{index}_"
+            )
+            if not pending:
+                self.log_message(f"⚠ Skipping {label} - no new committed rows since id {low[0]} / transaction {low[1]}")
+                continue
+            
+            self.log_message(f"  {label} watermark: id {low[0]} → {high[0]}, transaction {low[1]} → {high[1]}")
+            selections.append((source, document_filter))
+            params.update(source_params)
+            watermarks[table] = high
+        return selections, params, watermarks
+
+    def consolidate(self, conn, sources: list, source_counts: dict = None, incremental: bool = False,
+                    skip_unchanged: bool = True, exclusive: bool = False) -> dict:
+        """Aggregate the given sources into document_data in one pass, inside a savepoint
+
+        All sources are scanned and upserted in a single pass (see
+        app.services.consolidation). In incremental mode only document_nos with
+        staging rows above each stored watermark are re-aggregated (over all of
+        their rows), and the watermarks are advanced in the same savepoint so a
+        failed upsert never skips data. With exclusive (a source consolidated
+        alongside others in their own transactions) documents another source
+        also stages fail the pass instead. Returns stats per source label; the
+        sources share one duration and, on failure, one error.
+        """
+        results = {
+            source['label']: {'inserts': 0, 'updates': 0, 'unchanged': 0, 'rows_scanned': 0,
+                              'duration_ms': 0, 'error': None}
+            for source in sources
+        }
+        start = time.perf_counter()
+        self.log_message(f"Processing {', '.join(results)} data...")
+        
+        try:
+            with conn.begin_nested():
+                selections, params, watermarks = self.select_sources(conn, sources, source_counts, incremental)
+                if exclusive and selections:
+                    check_exclusive_documents(conn, selections, params)
+                rows = []
+                if selections:
+                    # Counts come back as one row per source; nothing per-document is pulled into Python
+                    rows = run_consolidation(conn, selections, params, skip_unchanged)
+                    # A duplicate rolls back the savepoint (and watermarks); the next run heals it
+                    check_unique_documents(conn, selections, params)
+                
+                for table, (last_id, last_xact_id) in watermarks.items():
+                    self.set_watermark(conn, table, last_id, last_xact_id)
+            
+            for counts in rows:
+                stats = results[counts.source_label]
+                stats['rows_scanned'] = counts.rows_scanned
+                stats['inserts'] = counts.inserts
+                stats['updates'] = counts.updates
+                stats['unchanged'] = counts.documents - counts.inserts - counts.updates
+                self.log_message(
+                    f"✓ {counts.source_label}: {stats['inserts']} inserted, {stats['updates']} updated, "
+                    f"{stats['unchanged']} unchanged ({stats['rows_scanned']} source rows)"
+                )
+                if counts.sample_documents:
+                    self.log_message(f"  Sample documents: {counts.sample_documents}")
+        
+        except Exception as e:
+            self.log_message(f"✗ Consolidation of {', '.join(results)} failed: {str(e)}")
+            for stats in results.values():
+                stats.update({'inserts': 0, 'updates': 0, 'error': str(e)})
+        
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        for stats in results.values():
+            stats['duration_ms'] = duration_ms
+        return results
+    
+    def consolidate_source_in_transaction(self, source: dict, source_counts: dict = None,
+                                          incremental: bool = False, skip_unchanged: bool = True) -> dict:
+        """Consolidate one source on its own pooled connection and commit it independently"""
         try:
-            if os.path.exists(self.log_file):
-                os.remove(self.log_file)
+            with engine.begin() as conn:
+                conn.execute(text("SET TIME ZONE 'UTC';"))
+                return self.consolidate(
+                    conn, [source], source_counts, incremental, skip_unchanged, exclusive=True
+                )[source['label']]
         except Exception as e:
-            print(f"Warning: Could not clear log file: {str(e)}")
+            # Connection/commit failures happen outside consolidate's savepoint
+            self.log_message(f"✗ {source['label']} transaction failed: {str(e)}")
+            return {'inserts': 0, 'updates': 0, 'unchanged': 0, 'rows_scanned': 0, 'duration_ms': 0, 'error': str(e)}
     
-    def push_to_document_data(self) -> bool:
-        """Enhanced push data from mfabric tables to document_data with aggregation and updates"""
+    def consolidate_sources_parallel(self, sources: list, source_counts: dict = None, incremental: bool = False,
+                                     skip_unchanged: bool = True) -> dict:
+        """Consolidate sources concurrently, one connection and transaction per source
+
+        A failing source rolls back only its own work (and its watermark); the
+        other sources still commit. Results are returned in SYNC_SOURCES order.
+        Each transaction only sees its own source, so while any document to
+        consolidate is staged by several sources they all run in one transaction
+        instead; a source whose documents start to overlap mid-run fails and is
+        retried (then in one transaction) next cycle.
+        """
+        overlapping = self.find_overlapping_documents(sources, incremental)
+        if overlapping:
+            self.log_message(
+                f"⚠ Documents staged by several sources (e.g. {overlapping}) - consolidating in one transaction"
+            )
+            with engine.begin() as conn:
+                conn.execute(text("SET TIME ZONE 'UTC';"))
+                return self.consolidate(conn, sources, source_counts, incremental, skip_unchanged)
+        
+        with ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="sync-source") as pool:
+            futures = [
+                (source, pool.submit(
+                    self.consolidate_source_in_transaction, source, source_counts, incremental, skip_unchanged
+                ))
+                for source in sources
+            ]
+            return {source['label']: future.result() for source, future in futures}
+    
+    def find_overlapping_documents(self, sources: list, incremental: bool = False) -> list:
+        """Sample of the document_nos a pass would consolidate that more than one source stages"""
+        with engine.connect() as conn:
+            selections, params = [], {}
+            for index, source in enumerate(sources):
+                if not incremental:
+                    selections.append((source, ""))
+                    continue
+                _, _, pending, document_filter, source_params = self.get_incremental_filter(
+                    conn, source['table'], key=f"s{index}_"
+                )
+                if pending:
+                    selections.append((source, document_filter))
+                    params.update(source_params)
+            if not selections:
+                return []
+            return conn.execute(build_overlap_check_sql(selections), params).scalars().all()
+    
+    def archive_staging_rows(self, sources: list) -> dict:
+        """Move consolidated staging rows into the source archive tables
+
+        Only rows below the source watermark (already consolidated) are moved,
+        never those of a load that was still running when it was taken, in id order and in bounded batches that each commit on their own.
+        Consolidation reads archived rows back for any document that gets new
+        staging rows, so aggregates stay complete while staging only holds the
+        unconsolidated working set. Returns rows archived per source label.
+        """
+        archived = {}
+        batch_size = settings.STAGING_ARCHIVE_BATCH_SIZE
+        for source in sources:
+            table = source['table']
+            columns = ", ".join(column.name for column in STAGING_MODELS[table].__table__.columns)
+            archived[source['label']] = 0
+            try:
+                for _ in range(settings.STAGING_ARCHIVE_MAX_BATCHES):
+                    with engine.begin() as conn:
+                        last_id, last_xact_id = self.get_watermark(conn, table)
+                        # Archive tables have the staging columns plus archived_at (defaults to NOW())
+                        moved = conn.execute(text(f"""
+                            WITH moved AS (
+                                DELETE FROM {table}
+                                WHERE id IN (
+                                    SELECT id FROM {table}
+                                    WHERE (load_xact_id IS NULL AND id <= :last_id)
+                                    OR load_xact_id < :last_xact_id
+                                    ORDER BY id
+                                    LIMIT :batch_size
+                                )
+                                RETURNING {columns}
+                            )
+                            INSERT INTO {archive_table(source)} ({columns})
+                            SELECT {columns} FROM moved
+                        """), {"last_id": last_id, "last_xact_id": last_xact_id, "batch_size": batch_size}).rowcount
+                    archived[source['label']] += moved
+                    if moved < batch_size:
+                        break
+                if archived[source['label']]:
+                    self.log_message(f"🗄 {source['label']}: archived {archived[source['label']]} consolidated staging rows")
+            except Exception as e:
+                self.log_message(f"✗ {source['label']} staging archive failed: {str(e)}")
+        return archived
+    
+    def start_backfill_progress(self, table: str, restart: bool = False):
+        """Load the backfill checkpoint for a source, or start a new one
+
+        Returns (after_document_no, high_id, high_xact_id). A completed or missing checkpoint
+        (or restart=True) starts a fresh pass from the first document_no.
+        """
+        with engine.begin() as conn:
+            progress = conn.execute(text("""
+                SELECT status, last_document_no, high_id, high_xact_id
+                FROM sync_backfill_progress
+                WHERE source_table = :table
+            """), {"table": table}).fetchone()
+            
+            if progress and progress.status == 'running' and not restart:
+                return progress.last_document_no, progress.high_id, progress.high_xact_id
+            
+            high_id, high_xact_id = self.get_high_watermark(conn, table)
+            conn.execute(text("""
+                INSERT INTO sync_backfill_progress (
+                    source_table, status, last_document_no, high_id, high_xact_id,
+                    documents_done, rows_done, chunks_done, started_at, updated_at
+                )
+                VALUES (:table, 'running', NULL, :high_id, :high_xact_id, 0, 0, 0, NOW(), NOW())
+                ON CONFLICT (source_table) DO UPDATE SET
+                    status = 'running',
+                    last_document_no = NULL,
+                    high_id = EXCLUDED.high_id,
+                    high_xact_id = EXCLUDED.high_xact_id,
+                    documents_done = 0,
+                    rows_done = 0,
+                    chunks_done = 0,
+                    started_at = EXCLUDED.started_at,
+                    updated_at = EXCLUDED.updated_at
+            """), {"table": table, "high_id": high_id, "high_xact_id": high_xact_id})
+            return None, high_id, high_xact_id
+    
+    def backfill_source(self, source: dict, chunk_size: int, restart: bool = False) -> dict:
+        """Consolidate one source in keyset-ordered document_no chunks
+
+        Each chunk re-aggregates a contiguous document_no range (all staging rows
+        of those documents) and commits together with its checkpoint, so locks
+        are held for one chunk only and a restart resumes after the last commit.
+        When the pass completes the source watermarks are advanced to the id and
+        transaction snapshot taken at the start, handing over to incremental sync.
+        """
+        label = source['label']
+        table = source['table']
+        stats = {'inserts': 0, 'updates': 0, 'unchanged': 0, 'rows_scanned': 0, 'duration_ms': 0, 'error': None}
+        source_start = time.perf_counter()
+        
         try:
-            # Clear log file at the start of each sync cycle
-            self.clear_log_file()
+            after, high_id, high_xact_id = self.start_backfill_progress(table, restart)
+            if after is None:
+                self.log_message(f"Backfilling {label} from the start (staging ids up to {high_id}, transactions before {high_xact_id})")
+            else:
+                self.log_message(f"Resuming {label} backfill after document_no {after}")
             
+            while True:
+                chunk_start = time.perf_counter()
+                with engine.begin() as conn:
+                    conn.execute(text("SET TIME ZONE 'UTC';"))
+                    
+                    after_filter = "WHERE document_no > :after" if after is not None else ""
+                    upper = conn.execute(text(f"""
+                        SELECT MAX(document_no) FROM (
+                            SELECT DISTINCT document_no FROM {table}
+                            {after_filter}
+                            ORDER BY document_no
+                            LIMIT :chunk_size
+                        ) chunk
+                    """), {"after": after, "chunk_size": chunk_size}).scalar()
+                    
+                    if upper is None:
+                        conn.execute(text("""
+                            UPDATE sync_backfill_progress
+                            SET status = 'completed', updated_at = NOW()
+                            WHERE source_table = :table
+                        """), {"table": table})
+                        conn.execute(text("""
+                            INSERT INTO sync_watermarks (source_table, last_id, last_xact_id, updated_at)
+                            VALUES (:table, :high_id, :high_xact_id, NOW())
+                            ON CONFLICT (source_table) DO UPDATE SET
+                                last_id = GREATEST(sync_watermarks.last_id, EXCLUDED.last_id),
+                                last_xact_id = GREATEST(sync_watermarks.last_xact_id, EXCLUDED.last_xact_id),
+                                updated_at = EXCLUDED.updated_at
+                        """), {"table": table, "high_id": high_id, "high_xact_id": high_xact_id})
+                        break
+                    
+                    range_filter = (
+                        "WHERE document_no > :after AND document_no <= :upper"
+                        if after is not None else "WHERE document_no <= :upper"
+                    )
+                    counts = run_consolidation(conn, [(source, range_filter)], {"after": after, "upper": upper})[0]
+                    check_unique_documents(conn, [(source, range_filter)], {"after": after, "upper": upper})
+                    
+                    conn.execute(text("""
+                        UPDATE sync_backfill_progress SET
+                            last_document_no = :upper,
+                            documents_done = documents_done + :documents,
+                            rows_done = rows_done + :rows_scanned,
+                            chunks_done = chunks_done + 1,
+                            updated_at = NOW()
+                        WHERE source_table = :table
+                    """), {
+                        "upper": upper,
+                        "documents": counts.documents,
+                        "rows_scanned": counts.rows_scanned,
+                        "table": table
+                    })
+                
+                stats['rows_scanned'] += counts.rows_scanned
+                stats['inserts'] += counts.inserts
+                stats['updates'] += counts.updates
+                stats['unchanged'] += counts.documents - counts.inserts - counts.updates
+                self.log_message(
+                    f"  {label} chunk up to {upper}: {counts.inserts} inserted, {counts.updates} updated "
+                    f"({counts.rows_scanned} rows, {int((time.perf_counter() - chunk_start) * 1000)} ms)"
+                )
+                after = upper
+            
+            self.log_message(f"✓ {label} backfill complete: {stats['inserts']} inserted, {stats['updates']} updated")
+        
+        except Exception as e:
+            self.log_message(f"✗ {label} backfill stopped (resumable from last checkpoint): {str(e)}")
+            stats['error'] = str(e)
+        
+        stats['duration_ms'] = int((time.perf_counter() - source_start) * 1000)
+        return stats
+    
+    def backfill_to_document_data(self, chunk_size: int = 5000, restart: bool = False,
+                                  sources: list = None, trigger: str = "backfill") -> bool:
+        """Chunked, resumable consolidation for large mfabric loads
+
+        Use instead of a full push when a large history dump lands in staging:
+        every chunk is its own bounded transaction and progress is checkpointed
+        in sync_backfill_progress, so a failure loses at most one chunk.
+        """
+        recorder = SyncRunRecorder(trigger=trigger, mode="backfill")
+        recorder.start()
+        
+        self.log_message("🚀 STARTING CHUNKED BACKFILL")
+        self.log_message(f"Chunk size: {chunk_size} documents | Restart: {restart} | Run: {recorder.run_id}")
+        self.log_message("=" * 60)
+        
+        with recorder.stage("backfill"):
+            for source in SYNC_SOURCES:
+                if sources is not None and source['table'] not in sources:
+                    continue
+                recorder.record_source(source['label'], self.backfill_source(source, chunk_size, restart))
+        
+        failed = [label for label, stats in recorder.source_stats.items() if stats.get('error')]
+        if failed:
+            self.log_message(f"🔥 BACKFILL INCOMPLETE for {', '.join(failed)} - rerun to resume")
+        else:
+            self.log_message("🏁 BACKFILL COMPLETED")
+        self.log_message("=" * 60)
+        recorder.finish("success")
+        return not failed
+    
+    def get_backfill_progress(self):
+        """Get backfill checkpoints for all sources"""
+        with engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT * FROM sync_backfill_progress ORDER BY source_table
+            """)).fetchall()
+        return [
+            {
+                "source_table": row.source_table,
+                "status": row.status,
+                "last_document_no": row.last_document_no,
+                "high_id": row.high_id,
+                "high_xact_id": row.high_xact_id,
+                "documents_done": row.documents_done,
+                "rows_done": row.rows_done,
+                "chunks_done": row.chunks_done,
+                "started_at": row.started_at.isoformat() if row.started_at else None,
+                "updated_at": row.updated_at.isoformat() if row.updated_at else None
+            }
+            for row in rows
+        ]
+    
+    def log_final_results(self, insertion_results: dict, initial_count: int = None, incremental: bool = False):
+        """Log cycle totals; full mode also logs table-wide counts and samples"""
+        self.log_message("=" * 60)
+        self.log_message("FINAL RESULTS")
+        self.log_message("=" * 60)
+        
+        total_inserts = sum(r['inserts'] for r in insertion_results.values())
+        total_updates = sum(r['updates'] for r in insertion_results.values())
+        
+        if incremental:
+            # Skip the full-table counts so cycle time tracks the change volume
+            self.log_message(f"Records inserted this cycle: {total_inserts}")
+            self.log_message(f"Records updated this cycle: {total_updates}")
+            self.log_message("Processing Summary:")
+            for doc_type, stats in insertion_results.items():
+                self.log_message(
+                    f"  {doc_type}: {stats['inserts']} inserts, {stats['updates']} updates, "
+                    f"{stats.get('unchanged', 0)} unchanged"
+                )
+            return
+        
+        try:
+            with engine.begin() as conn:
+                # Get final count
+                final_count_result = conn.execute(text("SELECT COUNT(*) FROM document_data"))
+                final_count = final_count_result.fetchone()[0]
+                
+                self.log_message(f"Initial record count: {initial_count}")
+                self.log_message(f"Records inserted this cycle: {total_inserts}")
+                self.log_message(f"Records updated this cycle: {total_updates}")
+                self.log_message(f"Final record count: {final_count}")
+                
+                # Show breakdown by document type
+                type_result = conn.execute(text("""
+                    SELECT document_type, COUNT(*) 
+                    FROM document_data 
+                    GROUP BY document_type
+                    ORDER BY document_type
+                """))
+                
+                self.log_message("Final document types breakdown:")
+                for doc_type, count in type_result.fetchall():
+                    self.log_message(f"  {doc_type}: {count} records")
+                
+                # Show sample aggregated quantities to verify aggregation worked
+                self.log_message("Sample total_quantity values (to verify aggregation):")
+                sample_result = conn.execute(text("""
+                    SELECT document_no, total_quantity, document_type 
+                    FROM document_data 
+                    WHERE total_quantity IS NOT NULL
+                    ORDER BY document_no DESC 
+                    LIMIT 5
+                """))
+                
+                for doc_no, qty, doc_type in sample_result.fetchall():
+                    self.log_message(f"  {doc_no} ({doc_type}): {qty}")
+                
+                # Show processing summary
+                self.log_message("Processing Summary:")
+                for doc_type, stats in insertion_results.items():
+                    self.log_message(f"  {doc_type}: {stats['inserts']} inserts, {stats['updates']} updates")
+                
+        except Exception as e:
+            self.log_message(f"Error in final results check: {str(e)}")
+    
+    def push_to_document_data(self, incremental: bool = False, trigger: str = "scheduler",
+                              skip_unchanged: bool = True, parallel: bool = False, sources: list = None) -> bool:
+        """Enhanced push data from mfabric tables to document_data with aggregation and updates
+
+        With incremental=True the full-table diagnostics are skipped and each source
+        only re-aggregates the document_nos touched since its last watermark.
+        With skip_unchanged=True (default) documents whose content is identical are
+        left untouched instead of being rewritten every cycle.
+        With parallel=True the sources run concurrently on separate connections and
+        commit independently; otherwise they share one transaction (with a savepoint
+        per source).
+        sources optionally limits the run to the given staging table names.
+        Every call is recorded in sync_runs with per-stage and per-source timings.
+        """
+        mode = "incremental" if incremental else "full"
+        recorder = SyncRunRecorder(trigger=trigger, mode=f"{mode}_parallel" if parallel else mode)
+        recorder.start()
+        
+        try:
             # Log sync start
             self.log_message("🚀 STARTING NEW DATA SYNC CYCLE")
             self.log_message(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}")
+            self.log_message(
+                f"Mode: {'INCREMENTAL (watermark)' if incremental else 'FULL'}"
+                f"{' / PARALLEL' if parallel else ''} | Trigger: {trigger} | Run: {recorder.run_id}"
+            )
             self.log_message("=" * 60)
-            # Check source tables first
-            source_counts = self.check_source_tables()
             
-            # Check target table before
-            initial_count = self.check_target_table_before()
+            source_counts = None
+            initial_count = None
+            if not incremental:
+                # Check source tables first
+                with recorder.stage("check_sources"):
+                    source_counts = self.check_source_tables()
+                
+                # Check target table before
+                with recorder.stage("check_target"):
+                    initial_count = self.check_target_table_before()
             
             self.log_message("=" * 60)
             self.log_message("STARTING AGGREGATED DATA INSERTION WITH UPDATES")
@@ -159,286 +696,106 @@ class DataSyncService:
             self.log_message("  - Transporter: Use first non-NULL transporter_name")
             self.log_message("  - Clean: Convert spaces to NULL")
             self.log_message("  - Data Type: Cast total_quantity to INTEGER")
-            self.log_message("  - Conflicts: UPDATE existing records (ON CONFLICT DO UPDATE)")
+            if skip_unchanged:
+                self.log_message("  - Conflicts: UPDATE existing records only when content changed")
+            else:
+                self.log_message("  - Conflicts: UPDATE existing records (ON CONFLICT DO UPDATE)")
             self.log_message("=" * 60)
             
             insertion_results = {}
+            selected_sources = [s for s in SYNC_SOURCES if sources is None or s['table'] in sources]
             
-            with engine.begin() as conn:
-                # Set UTC timezone
-                conn.execute(text("SET TIME ZONE 'UTC';"))
-                
-                # Process DeliveryChallan
-                self.log_message("Processing DeliveryChallan data...")
-                if source_counts.get('mfabric_deliverychallan_data', 0) > 0:
-                    try:
-                        result = conn.execute(text("""
-                            WITH aggregated_dc AS (
-                                SELECT 
-                                    document_no,
-                                    site, 
-                                    document_type, 
-                                    MAX(document_date) as document_date,
-                                    NULLIF(TRIM(MAX(e_way_bill_no)), '') as e_way_bill_no,
-                                    COALESCE(
-                                        NULLIF(TRIM(MAX(CASE WHEN transporter_name IS NOT NULL THEN transporter_name END)), ''),
-                                        NULL
-                                    ) as transporter_name,
-                                    NULLIF(TRIM(MAX(vehicle_no)), '') as vehicle_no,
-                                    NULLIF(TRIM(MAX(irn_no)), '') as irn_no,
-                                    NULLIF(TRIM(MAX(route_no)), '') as route_no,
-                                    MAX(customer_code) as customer_code,
-                                    SUM(COALESCE(total_quantity, 0)) as total_quantity
-                                FROM mfabric_deliverychallan_data
-                                GROUP BY document_no, site, document_type
-                            )
-                            INSERT INTO document_data (
-                                site, document_type, document_no, document_date,
-                                e_way_bill_no, transporter_name, vehicle_no, irn_no,
-                                route_no, customer_code, total_quantity
-                            )
-                            SELECT 
-                                site, document_type, document_no, document_date,
-                                e_way_bill_no, transporter_name, vehicle_no, irn_no,
-                                route_no, customer_code, total_quantity::text
-                            FROM aggregated_dc
-                            ON CONFLICT (document_no) DO UPDATE SET
-                                site = EXCLUDED.site,
-                                document_type = EXCLUDED.document_type,
-                                document_date = EXCLUDED.document_date,
-                                e_way_bill_no = EXCLUDED.e_way_bill_no,
-                                transporter_name = EXCLUDED.transporter_name,
-                                vehicle_no = EXCLUDED.vehicle_no,
-                                irn_no = EXCLUDED.irn_no,
-                                route_no = EXCLUDED.route_no,
-                                customer_code = EXCLUDED.customer_code,
-                                total_quantity = EXCLUDED.total_quantity
-                            RETURNING document_no, 
-                                CASE WHEN xmax = 0 THEN 'INSERT' ELSE 'UPDATE' END as action;
-                        """))
-                        
-                        results = result.fetchall()
-                        inserts = sum(1 for r in results if r[1] == 'INSERT')
-                        updates = sum(1 for r in results if r[1] == 'UPDATE')
-                        insertion_results['DeliveryChallan'] = {'inserts': inserts, 'updates': updates}
-                        
-                        self.log_message(f"✓ DeliveryChallan: {inserts} inserted, {updates} updated")
-                        
-                        if len(results) > 0:
-                            self.log_message(f"  Sample documents: {[r[0] for r in results[:3]]}")
-                    
-                    except Exception as e:
-                        self.log_message(f"✗ DeliveryChallan processing failed: {str(e)}")
-                        insertion_results['DeliveryChallan'] = {'inserts': 0, 'updates': 0}
+            with recorder.stage("consolidate"):
+                if parallel and selected_sources:
+                    insertion_results = self.consolidate_sources_parallel(
+                        selected_sources, source_counts, incremental, skip_unchanged
+                    )
                 else:
-                    self.log_message("⚠ Skipping DeliveryChallan - no source data")
-                    insertion_results['DeliveryChallan'] = {'inserts': 0, 'updates': 0}
-
-                # Process Invoice
-                self.log_message("Processing Invoice data...")
-                if source_counts.get('mfabric_invoice_data', 0) > 0:
-                    try:
-                        result = conn.execute(text("""
-                            WITH aggregated_inv AS (
-                                SELECT 
-                                    document_no,
-                                    site, 
-                                    document_type, 
-                                    MAX(document_date) as document_date,
-                                    MAX(e_way_bill_no) as e_way_bill_no,
-                                    COALESCE(
-                                        NULLIF(TRIM(MAX(CASE WHEN transporter_name IS NOT NULL THEN transporter_name END)), ''),
-                                        NULL
-                                    ) as transporter_name,
-                                    NULLIF(TRIM(MAX(vehicle_no)), '') as vehicle_no,
-                                    NULLIF(TRIM(MAX(irn_no)), '') as irn_no,
-                                    MAX(customer_code) as customer_code,
-                                    MAX(customer_name) as customer_name,
-                                    SUM(COALESCE(total_quantity, 0)) as total_quantity
-                                FROM mfabric_invoice_data
-                                GROUP BY document_no, site, document_type
-                            )
-                            INSERT INTO document_data (
-                                site, document_type, document_no, document_date,
-                                e_way_bill_no, transporter_name, vehicle_no, irn_no,
-                                customer_code, customer_name, total_quantity
-                            )
-                            SELECT 
-                                site, document_type, document_no, document_date,
-                                e_way_bill_no, transporter_name, vehicle_no, irn_no,
-                                customer_code, customer_name, total_quantity::text
-                            FROM aggregated_inv
-                            ON CONFLICT (document_no) DO UPDATE SET
-                                site = EXCLUDED.site,
-                                document_type = EXCLUDED.document_type,
-                                document_date = EXCLUDED.document_date,
-                                e_way_bill_no = EXCLUDED.e_way_bill_no,
-                                transporter_name = EXCLUDED.transporter_name,
-                                vehicle_no = EXCLUDED.vehicle_no,
-                                irn_no = EXCLUDED.irn_no,
-                                customer_code = EXCLUDED.customer_code,
-                                customer_name = EXCLUDED.customer_name,
-                                total_quantity = EXCLUDED.total_quantity
-                            RETURNING document_no, 
-                                CASE WHEN xmax = 0 THEN 'INSERT' ELSE 'UPDATE' END as action;
-                        """))
-                        
-                        results = result.fetchall()
-                        inserts = sum(1 for r in results if r[1] == 'INSERT')
-                        updates = sum(1 for r in results if r[1] == 'UPDATE')
-                        insertion_results['Invoice'] = {'inserts': inserts, 'updates': updates}
-                        
-                        self.log_message(f"✓ Invoice: {inserts} inserted, {updates} updated")
-                        
-                        if len(results) > 0:
-                            self.log_message(f"  Sample documents: {[r[0] for r in results[:3]]}")
-                    
-                    except Exception as e:
-                        self.log_message(f"✗ Invoice processing failed: {str(e)}")
-                        insertion_results['Invoice'] = {'inserts': 0, 'updates': 0}
-                else:
-                    self.log_message("⚠ Skipping Invoice - no source data")
-                    insertion_results['Invoice'] = {'inserts': 0, 'updates': 0}
-
-                # Process Transfer
-                self.log_message("Processing Transfer data...")
-                if source_counts.get('mfabric_transferorder_rgp_data', 0) > 0:
-                    try:
-                        result = conn.execute(text("""
-                            WITH aggregated_to AS (
-                                SELECT 
-                                    document_no,
-                                    site, 
-                                    document_type, 
-                                    MAX(document_date) as document_date,
-                                    NULLIF(TRIM(MAX(e_way_bill_no)), '') as e_way_bill_no,
-                                    COALESCE(
-                                        NULLIF(TRIM(MAX(CASE WHEN transporter_name IS NOT NULL THEN transporter_name END)), ''),
-                                        NULL
-                                    ) as transporter_name,
-                                    NULLIF(TRIM(MAX(vehicle_no)), '') as vehicle_no,
-                                    NULLIF(TRIM(MAX(irn_no)), '') as irn_no,
-                                    MAX(from_warehouse_code) as from_warehouse_code,
-                                    MAX(to_warehouse_code) as to_warehouse_code,
-                                    MAX(route_code) as route_code,
-                                    MAX(direct_dispatch) as direct_dispatch,
-                                    MAX(sub_document_type) as sub_document_type,
-                                    MAX(salesman) as salesman,
-                                    SUM(COALESCE(total_quantity, 0)) as total_quantity
-                                FROM mfabric_transferorder_rgp_data
-                                GROUP BY document_no, site, document_type
-                            )
-                            INSERT INTO document_data (
-                                site, document_type, document_no, document_date,
-                                e_way_bill_no, transporter_name, vehicle_no, irn_no,
-                                from_warehouse_code, to_warehouse_code, route_code,
-                                direct_dispatch, sub_document_type, salesman, total_quantity
-                            )
-                            SELECT 
-                                site, document_type, document_no, document_date,
-                                e_way_bill_no, transporter_name, vehicle_no, irn_no,
-                                from_warehouse_code, to_warehouse_code, route_code,
-                                direct_dispatch, sub_document_type, salesman, total_quantity::text
-                            FROM aggregated_to
-                            ON CONFLICT (document_no) DO UPDATE SET
-                                site = EXCLUDED.site,
-                                document_type = EXCLUDED.document_type,
-                                document_date = EXCLUDED.document_date,
-                                e_way_bill_no = EXCLUDED.e_way_bill_no,
-                                transporter_name = EXCLUDED.transporter_name,
-                                vehicle_no = EXCLUDED.vehicle_no,
-                                irn_no = EXCLUDED.irn_no,
-                                from_warehouse_code = EXCLUDED.from_warehouse_code,
-                                to_warehouse_code = EXCLUDED.to_warehouse_code,
-                                route_code = EXCLUDED.route_code,
-                                direct_dispatch = EXCLUDED.direct_dispatch,
-                                sub_document_type = EXCLUDED.sub_document_type,
-                                salesman = EXCLUDED.salesman,
-                                total_quantity = EXCLUDED.total_quantity
-                            RETURNING document_no, 
-                                CASE WHEN xmax = 0 THEN 'INSERT' ELSE 'UPDATE' END as action;
-                        """))
+                    with engine.begin() as conn:
+                        # Set UTC timezone
+                        conn.execute(text("SET TIME ZONE 'UTC';"))
                         
-                        results = result.fetchall()
-                        inserts = sum(1 for r in results if r[1] == 'INSERT')
-                        updates = sum(1 for r in results if r[1] == 'UPDATE')
-                        insertion_results['Transfer'] = {'inserts': inserts, 'updates': updates}
-                        
-                        self.log_message(f"✓ Transfer: {inserts} inserted, {updates} updated")
-                        
-                        if len(results) > 0:
-                            self.log_message(f"  Sample documents: {[r[0] for r in results[:3]]}")
-                    
-                    except Exception as e:
-                        self.log_message(f"✗ Transfer processing failed: {str(e)}")
-                        insertion_results['Transfer'] = {'inserts': 0, 'updates': 0}
-                else:
-                    self.log_message("⚠ Skipping Transfer - no source data")
-                    insertion_results['Transfer'] = {'inserts': 0, 'updates': 0}
-
-            # Final results check
-            self.log_message("=" * 60)
-            self.log_message("FINAL RESULTS")
-            self.log_message("=" * 60)
+                        insertion_results = self.consolidate(
+                            conn, selected_sources, source_counts, incremental, skip_unchanged
+                        )
             
-            try:
-                with engine.begin() as conn:
-                    # Get final count
-                    final_count_result = conn.execute(text("SELECT COUNT(*) FROM document_data"))
-                    final_count = final_count_result.fetchone()[0]
-                    
-                    total_inserts = sum(r['inserts'] for r in insertion_results.values())
-                    total_updates = sum(r['updates'] for r in insertion_results.values())
-                    
-                    self.log_message(f"Initial record count: {initial_count}")
-                    self.log_message(f"Records inserted this cycle: {total_inserts}")
-                    self.log_message(f"Records updated this cycle: {total_updates}")
-                    self.log_message(f"Final record count: {final_count}")
-                    
-                    # Show breakdown by document type
-                    type_result = conn.execute(text("""
-                        SELECT document_type, COUNT(*) 
-                        FROM document_data 
-                        GROUP BY document_type
-                        ORDER BY document_type
-                    """))
-                    
-                    self.log_message("Final document types breakdown:")
-                    for doc_type, count in type_result.fetchall():
-                        self.log_message(f"  {doc_type}: {count} records")
-                    
-                    # Show sample aggregated quantities to verify aggregation worked
-                    self.log_message("Sample total_quantity values (to verify aggregation):")
-                    sample_result = conn.execute(text("""
-                        SELECT document_no, total_quantity, document_type 
-                        FROM document_data 
-                        WHERE total_quantity IS NOT NULL
-                        ORDER BY document_no DESC 
-                        LIMIT 5
-                    """))
-                    
-                    for doc_no, qty, doc_type in sample_result.fetchall():
-                        self.log_message(f"  {doc_no} ({doc_type}): {qty}")
-                    
-                    # Show processing summary
-                    self.log_message("Processing Summary:")
-                    for doc_type, stats in insertion_results.items():
-                        self.log_message(f"  {doc_type}: {stats['inserts']} inserts, {stats['updates']} updates")
-                    
-            except Exception as e:
-                self.log_message(f"Error in final results check: {str(e)}")
+            # Staging lifecycle: consolidated rows leave the working set
+            if settings.STAGING_ARCHIVE_ENABLED:
+                with recorder.stage("archive_staging"):
+                    for label, count in self.archive_staging_rows(selected_sources).items():
+                        insertion_results.setdefault(label, {})['archived'] = count
+            
+            for label, stats in insertion_results.items():
+                recorder.record_source(label, stats)
+
+            with recorder.stage("final_results"):
+                self.log_final_results(insertion_results, initial_count, incremental)
 
             self.log_message("Successfully completed aggregated data push with updates to document_data.")
             self.log_message(f"🏁 SYNC CYCLE COMPLETED at {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}")
             self.log_message("=" * 60)
+            recorder.finish("success")
             return True
             
         except Exception as e:
             self.log_message(f"❌ CRITICAL ERROR: {str(e)}")
             self.log_message(f"🔥 SYNC CYCLE FAILED at {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}")
             self.log_message("=" * 60)
+            recorder.finish("failed", error=str(e))
             return False
     
+    def preview_sync(self, incremental: bool = False, sources: list = None, sample_size: int = 10) -> dict:
+        """Dry run: what push_to_document_data would insert/update, without writing anything
+
+        All sources are diffed by one statement in a READ ONLY, REPEATABLE READ transaction, so the
+        numbers come from a single snapshot. Plain reads take no row locks on
+        document_data and watermarks are not advanced, so this is safe at peak hours.
+        """
+        self.log_message(f"🔍 Sync dry run ({'incremental' if incremental else 'full'})")
+        selected_sources = [s for s in SYNC_SOURCES if sources is None or s['table'] in sources]
+        results = {}
+        
+        with engine.begin() as conn:
+            conn.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY;"))
+            conn.execute(text("SET TIME ZONE 'UTC';"))
+            
+            for source in selected_sources:
+                results[source['label']] = {
+                    'documents': 0, 'rows_scanned': 0, 'inserts': 0, 'updates': 0,
+                    'unchanged': 0, 'column_changes': {}, 'sample': []
+                }
+            
+            selections, params, _ = self.select_sources(conn, selected_sources, incremental=incremental)
+            rows = []
+            if selections:
+                rows = conn.execute(build_preview_sql(selections, sample_size), params).fetchall()
+            
+            for counts in rows:
+                results[counts.source_label] = {
+                    'documents': counts.documents,
+                    'rows_scanned': counts.rows_scanned,
+                    'inserts': counts.inserts,
+                    'updates': counts.updates,
+                    'unchanged': counts.documents - counts.inserts - counts.updates,
+                    'column_changes': counts.column_changes,
+                    'sample': counts.sample
+                }
+                self.log_message(
+                    f"  {counts.source_label}: would insert {counts.inserts}, update {counts.updates} "
+                    f"(columns: {counts.column_changes})"
+                )
+        
+        totals = {
+            key: sum(stats[key] for stats in results.values())
+            for key in ('documents', 'rows_scanned', 'inserts', 'updates', 'unchanged')
+        }
+        return {
+            "dry_run": True,
+            "mode": "incremental" if incremental else "full",
+            "totals": totals,
+            "sources": results
+        }
+    
     def get_sync_status(self):
         """Get current sync status and counts"""
         try:
@@ -460,5 +817,148 @@ class DataSyncService:
             self.log_message(f"Error getting sync status: {str(e)}")
             return None
 
-# Singleton instance
-scheduler = DataSyncService()
+class SyncScheduler:
+    """In-process periodic consolidation scheduler.
+
+    Runs on a daemon thread so sync jobs never block the event loop. Only the
+    process holding the leader advisory lock runs cycles (the others stay on
+    standby and retry leadership every interval), and every cycle goes through
+    the single-flight coordinator so it cannot overlap a manual trigger.
+    Failures back off exponentially; all delays get random jitter so workers
+    started together do not fire together.
+    """
+    JOB_ID = "document_sync"
+    
+    def __init__(self, sync_service: DataSyncService):
+        self.sync_service = sync_service
+        self.interval_seconds = settings.SYNC_INTERVAL_MINUTES * 60
+        self.jitter_seconds = settings.SYNC_JITTER_SECONDS
+        self.retry_base_seconds = settings.SYNC_RETRY_BASE_SECONDS
+        self.max_backoff_seconds = settings.SYNC_MAX_BACKOFF_MINUTES * 60
+        self.leader = LeaderElection()
+        
+        self._thread = None
+        self._stop_event = threading.Event()
+        
+        self.next_run_at = None
+        self.last_run_started_at = None
+        self.last_duration_seconds = None
+        self.last_result = None
+        self.consecutive_failures = 0
+        self.last_partition_maintenance = None
+    
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        """Start the background scheduler thread (no-op if already running)"""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="document-sync-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"Sync scheduler started - every {self.interval_seconds // 60} minutes")
+    
+    def stop(self, timeout: float = 30):
+        """Stop the scheduler, waiting for an in-progress cycle up to timeout seconds"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        self.next_run_at = None
+        self.leader.release()
+        logger.info("Sync scheduler stopped")
+    
+    def run_forever(self):
+        """Run the scheduler in the foreground (standalone deployments)"""
+        self.start()
+        try:
+            while self.is_running:
+                self._thread.join(1)
+        finally:
+            self.stop()
+    
+    def get_jobs(self):
+        """Scheduled jobs (a single consolidation job) with their status"""
+        return [self.get_status()] if self.is_running else []
+    
+    def get_status(self) -> dict:
+        return {
+            "id": self.JOB_ID,
+            "running": self.is_running,
+            "is_leader": self.leader.is_leader,
+            "in_flight": sync_coordinator.is_running,
+            "next_run_at": self.next_run_at.isoformat() if self.next_run_at else None,
+            "last_run_started_at": self.last_run_started_at.isoformat() if self.last_run_started_at else None,
+            "last_duration_seconds": self.last_duration_seconds,
+            "last_result": self.last_result,
+            "consecutive_failures": self.consecutive_failures,
+            "interval_minutes": self.interval_seconds // 60,
+            "mode": "incremental" if settings.SYNC_INCREMENTAL else "full",
+            "last_partition_maintenance": (
+                self.last_partition_maintenance.isoformat() if self.last_partition_maintenance else None
+            )
+        }
+    
+    def _next_delay(self) -> float:
+        if self.consecutive_failures:
+            delay = min(self.retry_base_seconds * 2 ** (self.consecutive_failures - 1), self.max_backoff_seconds)
+        else:
+            delay = self.interval_seconds
+        return delay + random.uniform(0, self.jitter_seconds)
+    
+    def _run_loop(self):
+        # First cycle shortly after startup, jittered so workers don't stampede
+        delay = random.uniform(0, self.jitter_seconds)
+        while True:
+            self.next_run_at = datetime.now() + timedelta(seconds=delay)
+            if self._stop_event.wait(delay):
+                break
+            self.run_once()
+            delay = self._next_delay()
+    
+    def run_once(self):
+        """Run one scheduled cycle if this process is the leader"""
+        try:
+            if not self.leader.try_acquire():
+                self.last_result = "standby"
+                return
+        except Exception as e:
+            logger.error(f"Sync leader election failed: {str(e)}")
+            self.last_result = "failed"
+            self.consecutive_failures += 1
+            return
+        
+        # Partition upkeep is cheap but needs doing only once a day, by the leader
+        if self.last_partition_maintenance != date.today():
+            maintain_partitions()
+            self.last_partition_maintenance = date.today()
+        
+        self.last_run_started_at = datetime.now()
+        cycle_start = time.perf_counter()
+        try:
+            result = sync_coordinator.run(
+                self.sync_service.push_to_document_data,
+                incremental=settings.SYNC_INCREMENTAL,
+                parallel=settings.SYNC_PARALLEL,
+                trigger="scheduler"
+            )
+            success = result["success"]
+            self.last_result = ("joined" if result["joined"] else "success") if success else "failed"
+        except Exception as e:
+            logger.error(f"Scheduled sync failed: {str(e)}")
+            success = False
+            self.last_result = "failed"
+        
+        self.last_duration_seconds = round(time.perf_counter() - cycle_start, 2)
+        self.consecutive_failures = 0 if success else self.consecutive_failures + 1
+
+# Singleton instances
+sync_service = DataSyncService()
+scheduler = SyncScheduler(sync_service)
+change_listener = MfabricChangeListener(
+    sync_service,
+    leader=scheduler.leader,
+    source_tables=[source['table'] for source in SYNC_SOURCES]
+)
@@ -1,7 +1,7 @@
 # app/schemas/gate_schemas.py - UPDATED WITH OPERATIONAL FIELDS
-from pydantic import BaseModel, validator
-from datetime import datetime
-from typing import Optional, List
+from pydantic import BaseModel, Field, validator
+from datetime import date, datetime
+from typing import Optional, List, Literal
 
 class GateEntryCreate(BaseModel):
     gate_type: str
@@ -25,6 +25,48 @@ class InsightsFilter(BaseModel):
     warehouse_code: Optional[str] = None
     movement_type: Optional[str] = None
 
+# Typed /filtered-movements request (compiled by app.services.movement_filters)
+class MovementFilter(BaseModel):
+    from_date: Optional[date] = None            # Inclusive
+    to_date: Optional[date] = None              # Inclusive (the whole day)
+    warehouse_code: Optional[str] = Field(None, max_length=50)
+    site_code: Optional[str] = Field(None, max_length=50)
+    vehicle_no: Optional[str] = Field(None, max_length=50)  # Partial plate, matched on vehicle_key
+    movement_type: Optional[Literal["Gate-In", "Gate-Out"]] = None
+    document_type: Optional[str] = Field(None, max_length=50)
+    completion_status: Optional[Literal["complete", "incomplete"]] = None
+    manual_only: bool = False                   # Only manual gate entries
+    needs_edit: bool = False                    # Shorthand for completion_status="incomplete"
+    cursor: Optional[str] = None                # next_cursor of the previous page
+    limit: int = Field(500, ge=1, le=500)
+    
+    class Config:
+        extra = "forbid"
+    
+    @validator('warehouse_code', 'site_code', 'document_type', 'vehicle_no')
+    def blank_to_none(cls, v):
+        if v is not None:
+            v = v.strip()
+        return v or None
+    
+    @validator('vehicle_no')
+    def validate_vehicle_no(cls, v):
+        if v is not None and not any(char.isascii() and char.isalnum() for char in v):
+            raise ValueError('Vehicle number must contain letters or digits')
+        return v
+    
+    @validator('to_date')
+    def validate_date_range(cls, v, values):
+        if v is not None and values.get('from_date') and v < values['from_date']:
+            raise ValueError('to_date must not be before from_date')
+        return v
+    
+    @validator('needs_edit')
+    def validate_needs_edit(cls, v, values):
+        if v and values.get('completion_status') == 'complete':
+            raise ValueError('needs_edit conflicts with completion_status="complete"')
+        return v
+
 # ✅ NEW: Enhanced edit schema for operational fields
 class OperationalDataEdit(BaseModel):
     gate_entry_no: str
@@ -0,0 +1,83 @@
+from sqlalchemy import update
+from app.models import DocumentData, InsightsData
+from app.utils.helpers import local_movement_time
+
+# Batch gate entries cost a fixed number of statements whatever the batch size:
+# one SELECT for all selected documents, one multi-row INSERT of their
+# movements (the ORM flush batches same-table inserts into INSERT ... VALUES
+# (...), (...) RETURNING) and one UPDATE of document_data.gate_entry_no.
+
+def unique_document_nos(document_nos) -> list:
+    """Requested document numbers without blanks and repeats, in request order"""
+    return list(dict.fromkeys(document_no.strip() for document_no in document_nos if document_no and document_no.strip()))
+
+def documents_query(db, document_nos: list):
+    """The documents of a batch, in one query"""
+    return db.query(DocumentData).filter(DocumentData.document_no.in_(document_nos))
+
+def fetch_documents(db, document_nos: list) -> dict:
+    """document_no -> DocumentData for those of document_nos that exist, in one query"""
+    documents = {}
+    for document in documents_query(db, document_nos):
+        documents.setdefault(document.document_no, document)
+    return documents
+
+def create_document_movements(db, document_nos, gate_entry_no: str, vehicle_no: str, gate_type: str,
+                              remarks: str, now, current_user, operational_data: dict = None):
+    """Stage the movements of a batch gate entry; committed by the caller
+
+    Adds one InsightsData per found document and stamps gate_entry_no on the
+    documents; now is the movement_now() instant of the entry. Returns (processed_documents, missing_documents): a status entry
+    per requested document, and the document numbers that do not exist.
+    """
+    operational_data = operational_data or {}
+    requested = unique_document_nos(document_nos)
+    documents = fetch_documents(db, requested)
+    found = [documents[document_no] for document_no in requested if document_no in documents]
+    missing = [document_no for document_no in requested if document_no not in documents]
+
+    db.add_all([
+        InsightsData(
+            gate_entry_no=gate_entry_no,
+            document_type=document.document_type or "",
+            sub_document_type=document.sub_document_type or "",
+            vehicle_no=document.vehicle_no or vehicle_no,
+            warehouse_name=document.warehouse_name or current_user.warehouse_code,
+            date=now.date(),
+            time=now.time(),
+            movement_type=gate_type,
+            remarks=remarks or f"Gate entry for {document.document_no}",
+            warehouse_code=current_user.warehouse_code,
+            site_code=current_user.site_code,
+            security_name=f"{current_user.first_name} {current_user.last_name}",
+            security_username=current_user.username,
+            document_date=document.document_date,
+            driver_name=operational_data.get('driver_name'),
+            km_reading=operational_data.get('km_reading'),
+            loader_names=operational_data.get('loader_names'),
+            edit_count=0,
+            last_edited_at=local_movement_time(now) if operational_data else None
+        )
+        for document in found
+    ])
+
+    if found:
+        db.execute(
+            update(DocumentData)
+            .where(DocumentData.document_no.in_([document.document_no for document in found]))
+            .values(gate_entry_no=gate_entry_no)
+        )
+
+    processed_documents = [
+        {
+            "document_no": document.document_no,
+            "document_type": document.document_type,
+            "vehicle_no": document.vehicle_no,
+            "status": "success"
+        }
+        for document in found
+    ] + [
+        {"document_no": document_no, "status": "not_found"}
+        for document_no in missing
+    ]
+    return processed_documents, missing
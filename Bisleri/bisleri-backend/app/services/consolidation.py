@@ -0,0 +1,474 @@
+from sqlalchemy import text
+from app.models import DocumentData
+from app.utils.helpers import VEHICLE_KEY_SQL
+
+# Declarative mfabric -> document_data mapping.
+#
+# COLUMN_RULES says how each consolidated document_data column is derived from
+# all staging rows of one document ("{column}" is the column being aggregated).
+# Each SYNC_SOURCES entry lists the document_data columns its staging table
+# provides; "column_map" renames staging columns where they differ from the
+# document_data name. Adding a staging table is one more entry below.
+
+TRIMMED = "NULLIF(TRIM(MAX({column})), '')"
+
+COLUMN_RULES = {
+    "document_date": "MAX({column})",
+    "e_way_bill_no": TRIMMED,
+    # First non-NULL transporter, blank strings collapsed to NULL
+    "transporter_name": "COALESCE(NULLIF(TRIM(MAX(CASE WHEN {column} IS NOT NULL THEN {column} END)), ''), NULL)",
+    "vehicle_no": TRIMMED,
+    "irn_no": TRIMMED,
+    "route_no": TRIMMED,
+    "route_code": "MAX({column})",
+    "customer_code": "MAX({column})",
+    "customer_name": "MAX({column})",
+    "from_warehouse_code": "MAX({column})",
+    "to_warehouse_code": "MAX({column})",
+    "direct_dispatch": "MAX({column})",
+    "sub_document_type": "MAX({column})",
+    "salesman": "MAX({column})",
+    "total_quantity": "SUM(COALESCE({column}, 0))::text",
+}
+
+# Columns computed from the consolidated values rather than aggregated from staging
+DERIVED_COLUMNS = {
+    "vehicle_key": VEHICLE_KEY_SQL.format(column="c.vehicle_no"),
+}
+
+# Grouping key of a consolidated document (taken from the staging row as is)
+KEY_COLUMNS = ["document_no", "site", "document_type"]
+
+# When the same document_no is staged by several sources, the later entry wins
+SYNC_SOURCES = [
+    {
+        "label": "DeliveryChallan",
+        "table": "mfabric_deliverychallan_data",
+        "columns": [
+            "document_date", "e_way_bill_no", "transporter_name", "vehicle_no", "irn_no",
+            "route_no", "customer_code", "total_quantity",
+        ],
+    },
+    {
+        "label": "Invoice",
+        "table": "mfabric_invoice_data",
+        "columns": [
+            "document_date", "e_way_bill_no", "transporter_name", "vehicle_no", "irn_no",
+            "customer_code", "customer_name", "total_quantity",
+        ],
+    },
+    {
+        "label": "Transfer",
+        "table": "mfabric_transferorder_rgp_data",
+        "columns": [
+            "document_date", "e_way_bill_no", "transporter_name", "vehicle_no", "irn_no",
+            "from_warehouse_code", "to_warehouse_code", "route_code", "direct_dispatch",
+            "sub_document_type", "salesman", "total_quantity",
+        ],
+    },
+]
+
+def _validate_sources():
+    for source in SYNC_SOURCES:
+        unknown = set(source["columns"]) - set(COLUMN_RULES)
+        if unknown:
+            raise ValueError(f"{source['label']}: no COLUMN_RULES entry for {', '.join(sorted(unknown))}")
+
+_validate_sources()
+
+# document_data columns written by consolidation (anything else, e.g. gate_entry_no, is never touched)
+MAPPED_COLUMNS = [
+    name for name in COLUMN_RULES
+    if any(name in source["columns"] for source in SYNC_SOURCES)
+]
+UPDATE_COLUMNS = ["site", "document_type"] + MAPPED_COLUMNS + list(DERIVED_COLUMNS)
+
+# Columns owned by other writers (gate entry etc.), carried over when a document
+# moves to another document_date partition
+PRESERVED_COLUMNS = [
+    column.name for column in DocumentData.__table__.columns
+    if column.name not in ["document_no"] + UPDATE_COLUMNS
+]
+
+class DuplicateDocumentError(ValueError):
+    """A document_no stored in more than one document_data row"""
+
+class OverlappingSourcesError(ValueError):
+    """Documents staged by more than one source, which must be consolidated in one statement"""
+
+def archive_table(source: dict) -> str:
+    """Table holding a source's consolidated staging rows once they are archived"""
+    return f"{source['table']}_archive"
+
+def get_source(table: str) -> dict:
+    """Look up a SYNC_SOURCES entry by staging table name"""
+    for source in SYNC_SOURCES:
+        if source["table"] == table:
+            return source
+    raise ValueError(f"Unknown staging table: {table}")
+
+def _staged_ctes(selections: list) -> str:
+    """Compile the shared staged -> aggregated -> consolidated -> resolved CTEs
+
+    selections is a list of (source, document_filter) pairs; every source is
+    read once (plus the archived rows of the documents it selects), its staging
+    columns projected onto the document_data names (NULL where the source has
+    no such column) and all of them aggregated in a single GROUP BY. consolidated keeps one row per document_no; resolved joins
+    the stored document to fix its document_date (the partition key: undated
+    documents keep their stored date, or the day they were first consolidated),
+    computes the DERIVED_COLUMNS and carries the preserved columns.
+    """
+    branches = []
+    for source, document_filter in selections:
+        rank = SYNC_SOURCES.index(source)
+        column_map = source.get("column_map", {})
+        projections = [f"{rank} AS source_rank", f"'{source['label']}' AS source_label"]
+        projections += [f"{column_map.get(name, name)} AS {name}" for name in KEY_COLUMNS]
+        projections += [
+            f"{column_map.get(name, name)} AS {name}" if name in source["columns"] else f"NULL AS {name}"
+            for name in MAPPED_COLUMNS
+        ]
+        document_no = column_map.get("document_no", "document_no")
+        branches.append(
+            f"SELECT {', '.join(projections)}\n"
+            f"            FROM {source['table']}\n"
+            f"            {document_filter}"
+        )
+        # Archived history of the same documents, so their aggregates stay complete
+        branches.append(
+            f"SELECT {', '.join(projections)}\n"
+            f"            FROM {archive_table(source)}\n"
+            f"            WHERE {document_no} IN (SELECT {document_no} FROM {source['table']} {document_filter})"
+        )
+    staged = "\n            UNION ALL\n            ".join(branches)
+    aggregates = ",\n                ".join(
+        f"{COLUMN_RULES[name].format(column=name)} AS {name}" for name in MAPPED_COLUMNS
+    )
+    expressions = dict(
+        DERIVED_COLUMNS,
+        document_date="COALESCE(c.document_date, stored.document_date, date_trunc('day', LOCALTIMESTAMP))"
+    )
+    resolved_columns = ",\n                ".join(
+        f"{expressions[name]} AS {name}" if name in expressions else f"c.{name}"
+        for name in ["source_rank", "source_label", "source_rows", "document_no"] + UPDATE_COLUMNS
+    )
+    preserved_columns = ",\n                ".join(f"stored.{name}" for name in PRESERVED_COLUMNS)
+    return f"""
+        staged AS (
+            {staged}
+        ),
+        aggregated AS (
+            SELECT
+                source_rank,
+                source_label,
+                document_no,
+                site,
+                document_type,
+                {aggregates},
+                COUNT(*) AS source_rows
+            FROM staged
+            GROUP BY source_rank, source_label, document_no, site, document_type
+        ),
+        consolidated AS (
+            SELECT DISTINCT ON (document_no) *
+            FROM aggregated
+            ORDER BY document_no, source_rank DESC, site, document_type
+        ),
+        resolved AS (
+            SELECT
+                {resolved_columns},
+                {preserved_columns}
+            FROM consolidated c
+            LEFT JOIN document_data stored ON stored.document_no = c.document_no
+        )"""
+
+def _selected_documents(selections: list) -> str:
+    """SELECT of every document_no the selections consolidate"""
+    return "\n                UNION\n                ".join(
+        f"SELECT {source.get('column_map', {}).get('document_no', 'document_no')} AS document_no "
+        f"FROM {source['table']} {document_filter}"
+        for source, document_filter in selections
+    )
+
+def build_dedupe_sql(selections: list):
+    """Compile the removal of extra stored rows of the selected documents
+
+    Keeps each document's row with the newest document_date, so the move and
+    the upsert that follow find at most one stored row per document_no.
+    """
+    return text(f"""
+        DELETE FROM document_data d
+        USING (
+            SELECT document_no, MAX(document_date) AS document_date
+            FROM document_data
+            WHERE document_no IN (
+                {_selected_documents(selections)}
+            )
+            GROUP BY document_no
+            HAVING COUNT(*) > 1
+        ) newest
+        WHERE d.document_no = newest.document_no
+        AND d.document_date < newest.document_date
+    """)
+
+def build_move_sql(selections: list):
+    """Compile the update of documents whose document_date (the partition key) changed
+
+    The stored row is updated in place, or moved to its new partition by
+    PostgreSQL, with all of the consolidated values; preserved columns stay on
+    it. Returns the document_no of every moved document.
+    """
+    assignments = ",\n            ".join(f"{name} = r.{name}" for name in UPDATE_COLUMNS)
+    return text(f"""
+        WITH {_staged_ctes(selections)}
+        UPDATE document_data d SET
+            {assignments}
+        FROM resolved r
+        WHERE d.document_no = r.document_no
+        AND d.document_date <> r.document_date
+        RETURNING d.document_no
+    """)
+
+def build_consolidation_sql(selections: list, skip_unchanged: bool = True):
+    """Compile the single-pass aggregate-and-upsert statement for the given sources
+
+    selections is a list of (source, document_filter) pairs; document_filter is
+    an optional WHERE clause on that source's staging rows (incremental sync and
+    backfill chunks use it to limit the document_nos), and its bind parameters
+    must be unique across selections.
+    With skip_unchanged the DO UPDATE only fires when a column actually differs,
+    so unchanged documents cost no new row version or WAL. Rows are upserted in
+    document_no order so concurrent runs lock shared documents in the same order.
+    Documents whose document_date changed are written beforehand by
+    build_move_sql and passed in as :moved_documents; they are skipped here and
+    counted as updates. Run the three statements through run_consolidation.
+    Returns one row of counts per source label (documents, rows_scanned,
+    inserts, updates, sample_documents) instead of one row per document.
+    """
+    target_columns = ", ".join(["document_no"] + UPDATE_COLUMNS + PRESERVED_COLUMNS)
+    updates = ",\n                ".join(
+        f"{name} = EXCLUDED.{name}" for name in UPDATE_COLUMNS if name != "document_date"
+    )
+
+    change_predicate = ""
+    if skip_unchanged:
+        current_values = ", ".join(f"document_data.{name}" for name in UPDATE_COLUMNS)
+        new_values = ", ".join(f"EXCLUDED.{name}" for name in UPDATE_COLUMNS)
+        change_predicate = f"WHERE ({current_values}) IS DISTINCT FROM ({new_values})"
+
+    return text(f"""
+        WITH {_staged_ctes(selections)},
+        moved AS (
+            SELECT unnest(CAST(:moved_documents AS text[])) AS document_no
+        ),
+        upserted AS (
+            INSERT INTO document_data ({target_columns})
+            SELECT {target_columns}
+            FROM resolved
+            WHERE document_no NOT IN (SELECT document_no FROM moved)
+            ORDER BY document_no
+            ON CONFLICT (document_no, document_date) DO UPDATE SET
+                {updates}
+            {change_predicate}
+            RETURNING document_no, (xmax = 0) AS inserted
+        ),
+        written AS (
+            SELECT
+                r.source_label,
+                COUNT(*) FILTER (WHERE u.inserted) AS inserts,
+                COUNT(*) FILTER (WHERE NOT COALESCE(u.inserted, FALSE)) AS updates,
+                (ARRAY_AGG(r.document_no ORDER BY r.document_no))[1:3] AS sample_documents
+            FROM resolved r
+            LEFT JOIN upserted u ON u.document_no = r.document_no
+            LEFT JOIN moved m ON m.document_no = r.document_no
+            WHERE u.document_no IS NOT NULL OR m.document_no IS NOT NULL
+            GROUP BY r.source_label
+        ),
+        scanned AS (
+            SELECT source_label, SUM(source_rows)::bigint AS rows_scanned
+            FROM aggregated
+            GROUP BY source_label
+        ),
+        documents AS (
+            SELECT source_label, COUNT(*) AS documents
+            FROM resolved
+            GROUP BY source_label
+        )
+        SELECT
+            s.source_label,
+            COALESCE(d.documents, 0) AS documents,
+            s.rows_scanned,
+            COALESCE(w.inserts, 0) AS inserts,
+            COALESCE(w.updates, 0) AS updates,
+            w.sample_documents
+        FROM scanned s
+        LEFT JOIN documents d ON d.source_label = s.source_label
+        LEFT JOIN written w ON w.source_label = s.source_label;
+    """)
+
+def run_consolidation(conn, selections: list, params: dict = None, skip_unchanged: bool = True) -> list:
+    """Consolidate the selections into document_data; returns the build_consolidation_sql count rows
+
+    Extra rows are removed, re-dated documents moved and the rest upserted in
+    separate statements of the caller's transaction: in one statement
+    PostgreSQL may run a data-modifying CTE's INSERT before its DELETE, which
+    breaks the per-partition unique index when a date changes within a month.
+    """
+    params = dict(params or {})
+    conn.execute(build_dedupe_sql(selections), params)
+    moved = conn.execute(build_move_sql(selections), params).scalars().all()
+    return conn.execute(
+        build_consolidation_sql(selections, skip_unchanged), dict(params, moved_documents=moved)
+    ).fetchall()
+
+def build_duplicate_check_sql(selections: list, sample_size: int = 5):
+    """Compile a check for document_nos of the given selections stored in more than one row
+
+    document_no is the document's identity, but document_data is keyed on
+    (document_no, document_date) so that it can be partitioned: the per-partition
+    unique indexes only cover one month each. Consolidation keeps it unique by
+    moving a document when its date changes (build_move_sql) and runs this check before
+    committing; it returns up to sample_size duplicated document_nos (none when
+    the invariant holds). Takes the same selections and bind parameters as
+    build_consolidation_sql.
+    """
+    return text(f"""
+        SELECT document_no
+        FROM document_data
+        WHERE document_no IN (
+                {_selected_documents(selections)}
+        )
+        GROUP BY document_no
+        HAVING COUNT(*) > 1
+        ORDER BY document_no
+        LIMIT {int(sample_size)}
+    """)
+
+def check_unique_documents(conn, selections: list, params: dict = None):
+    """Raise DuplicateDocumentError if consolidating the selections left a document_no in two rows"""
+    duplicates = conn.execute(build_duplicate_check_sql(selections), params or {}).scalars().all()
+    if duplicates:
+        raise DuplicateDocumentError(f"document_no stored in more than one document_data row: {duplicates}")
+
+def build_overlap_check_sql(selections: list, sample_size: int = 5):
+    """Compile a check for selected document_nos that another source stages too
+
+    Consolidating each source on its own (parallel sync) is only correct for
+    documents no other source has rows for, staged or archived: otherwise the
+    later source no longer wins and the transactions can file the same new
+    document under different dates. Returns up to sample_size such
+    document_nos; takes the same selections and bind parameters as
+    build_consolidation_sql.
+    """
+    branches = []
+    for source, document_filter in selections:
+        others = []
+        for other in SYNC_SOURCES:
+            if other is source:
+                continue
+            document_no = other.get("column_map", {}).get("document_no", "document_no")
+            for table in (other["table"], archive_table(other)):
+                others.append(f"EXISTS (SELECT 1 FROM {table} WHERE {document_no} = selected.document_no)")
+        branches.append(
+            f"SELECT selected.document_no FROM ({_selected_documents([(source, document_filter)])}) selected\n"
+            f"                WHERE {' OR '.join(others)}"
+        )
+    overlapping = "\n                UNION\n                ".join(branches)
+    return text(f"""
+        SELECT document_no
+        FROM (
+                {overlapping}
+        ) overlapping
+        ORDER BY document_no
+        LIMIT {int(sample_size)}
+    """)
+
+def check_exclusive_documents(conn, selections: list, params: dict = None):
+    """Raise OverlappingSourcesError if another source also stages a selected document_no"""
+    overlapping = conn.execute(build_overlap_check_sql(selections), params or {}).scalars().all()
+    if overlapping:
+        raise OverlappingSourcesError(f"document_no staged by more than one source: {overlapping}")
+
+def build_preview_sql(selections: list, sample_size: int = 10):
+    """Compile the dry-run counterpart of build_consolidation_sql
+
+    Runs the same aggregation and diffs it against document_data with a plain
+    LEFT JOIN (no upsert, no row locks). Returns one row per source label:
+    documents, rows_scanned, inserts, updates, column_changes ({column:
+    documents changed}) and a sample of up to sample_size documents with their
+    [current, new] values.
+    """
+    current_values = ", ".join(f"d.{name}" for name in UPDATE_COLUMNS)
+    new_values = ", ".join(f"c.{name}" for name in UPDATE_COLUMNS)
+    changes = ",\n                    ".join(
+        f"'{name}', CASE WHEN d.{name} IS DISTINCT FROM c.{name} "
+        f"THEN jsonb_build_array(d.{name}, c.{name}) END"
+        for name in UPDATE_COLUMNS
+    )
+
+    return text(f"""
+        WITH {_staged_ctes(selections)},
+        diffed AS (
+            SELECT
+                c.source_label,
+                c.document_no,
+                CASE
+                    WHEN d.document_no IS NULL THEN 'insert'
+                    WHEN ({current_values}) IS DISTINCT FROM ({new_values}) THEN 'update'
+                    ELSE 'unchanged'
+                END AS action,
+                CASE WHEN d.document_no IS NOT NULL THEN jsonb_strip_nulls(jsonb_build_object(
+                    {changes}
+                )) END AS changes
+            FROM resolved c
+            LEFT JOIN document_data d ON d.document_no = c.document_no
+        ),
+        column_counts AS (
+            SELECT source_label, jsonb_object_agg(column_name, documents) AS column_changes
+            FROM (
+                SELECT source_label, column_name, COUNT(*) AS documents
+                FROM diffed, jsonb_object_keys(diffed.changes) AS column_name
+                WHERE action = 'update'
+                GROUP BY source_label, column_name
+            ) per_column
+            GROUP BY source_label
+        ),
+        samples AS (
+            SELECT source_label, jsonb_agg(jsonb_build_object(
+                'document_no', document_no, 'action', action, 'changes', changes
+            ) ORDER BY document_no) AS sample
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY source_label ORDER BY document_no) AS sample_rank
+                FROM diffed
+                WHERE action <> 'unchanged'
+            ) ranked
+            WHERE sample_rank <= {int(sample_size)}
+            GROUP BY source_label
+        ),
+        scanned AS (
+            SELECT source_label, SUM(source_rows)::bigint AS rows_scanned
+            FROM aggregated
+            GROUP BY source_label
+        ),
+        per_source AS (
+            SELECT
+                source_label,
+                COUNT(*) AS documents,
+                COUNT(*) FILTER (WHERE action = 'insert') AS inserts,
+                COUNT(*) FILTER (WHERE action = 'update') AS updates
+            FROM diffed
+            GROUP BY source_label
+        )
+        SELECT
+            s.source_label,
+            COALESCE(p.documents, 0) AS documents,
+            s.rows_scanned,
+            COALESCE(p.inserts, 0) AS inserts,
+            COALESCE(p.updates, 0) AS updates,
+            COALESCE(cc.column_changes, '{{}}'::jsonb) AS column_changes,
+            COALESCE(sm.sample, '[]'::jsonb) AS sample
+        FROM scanned s
+        LEFT JOIN per_source p ON p.source_label = s.source_label
+        LEFT JOIN column_counts cc ON cc.source_label = s.source_label
+        LEFT JOIN samples sm ON sm.source_label = s.source_label;
+    """)
@@ -0,0 +1,136 @@
+import functools
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import select, text
+from app.config import settings
+from app.models import InsightsData
+from app.models.insights import EDIT_STATUS_SQL, EDIT_WINDOW, blank_sql
+
+# /edit-statistics and /records-needing-completion evaluate the edit rules of
+# app/models/insights.py in the database: one aggregate row (or only the
+# matching movements) instead of hydrating every movement of the window.
+
+STATISTICS_DAYS = 30
+
+# Age buckets of movements inside the edit window, each above the previous bound
+AGE_BUCKETS = [
+    ("within_6_hours", timedelta(hours=6)),
+    ("within_12_hours", timedelta(hours=12)),
+    ("within_24_hours", EDIT_WINDOW),
+]
+
+# Operational field -> EditStatistics counter of movements missing it
+MISSING_FIELD_COUNTERS = {
+    "driver_name": "missing_driver",
+    "km_reading": "missing_km",
+    "loader_names": "missing_loaders",
+}
+
+def _interval(delta: timedelta) -> str:
+    return f"INTERVAL '{int(delta.total_seconds())} seconds'"
+
+def _local_now(now: datetime) -> datetime:
+    """now as the naive local time the date / last_edited_at columns are written in"""
+    return now.astimezone(ZoneInfo(settings.MOVEMENT_TIMEZONE)).replace(tzinfo=None)
+
+@functools.lru_cache(maxsize=None)
+def build_edit_statistics_sql(scoped: bool):
+    """Single aggregate over the statistics window (scoped: one warehouse only)"""
+    buckets = []
+    lower = None
+    for name, upper in AGE_BUCKETS:
+        conditions = ["time IS NOT NULL", f"age <= {_interval(upper)}"]
+        if lower is not None:
+            conditions.insert(1, f"age > {_interval(lower)}")
+        buckets.append(f"COUNT(*) FILTER (WHERE {' AND '.join(conditions)}) AS {name}")
+        lower = upper
+    missing = [
+        f"COUNT(*) FILTER (WHERE {blank_sql(field)}) AS {counter}"
+        for field, counter in MISSING_FIELD_COUNTERS.items()
+    ]
+    aggregates = ",\n            ".join(buckets + missing)
+    warehouse_filter = "AND warehouse_code = :warehouse_code" if scoped else ""
+    return text(f"""
+        WITH scoped AS (
+            SELECT
+                id,
+                gate_entry_no,
+                time,
+                driver_name,
+                km_reading,
+                loader_names,
+                COALESCE(edit_count, 0) AS edit_count,
+                last_edited_at,
+                {EDIT_STATUS_SQL} AS edit_status,
+                CAST(:now AS timestamptz) - moved_at AS age
+            FROM insights_data
+            WHERE date >= :since
+            {warehouse_filter}
+        )
+        SELECT
+            COUNT(*) AS total_records,
+            COUNT(*) FILTER (WHERE edit_status = 'needs_completion') AS needs_completion,
+            COUNT(*) FILTER (WHERE edit_status = 'editable') AS complete_and_editable,
+            COUNT(*) FILTER (WHERE edit_status = 'expired') AS expired,
+            {aggregates},
+            COUNT(*) FILTER (WHERE last_edited_at >= :today AND last_edited_at < :tomorrow) AS edited_today,
+            (ARRAY_AGG(gate_entry_no ORDER BY edit_count DESC, id) FILTER (WHERE edit_count > 0))[1] AS most_edited_record,
+            COALESCE(AVG(edit_count), 0) AS avg_edits_per_record
+        FROM scoped
+    """)
+
+def get_edit_statistics(db, warehouse_code: str = None, scoped: bool = False, now: datetime = None) -> dict:
+    """EditStatistics fields for the last STATISTICS_DAYS days (scoped: warehouse_code only)"""
+    now = now or datetime.now(timezone.utc)
+    local_now = _local_now(now)
+    today = datetime.combine(local_now.date(), datetime.min.time())
+    row = db.execute(build_edit_statistics_sql(scoped), {
+        "now": now,
+        "since": datetime.combine((local_now - timedelta(days=STATISTICS_DAYS)).date(), datetime.min.time()),
+        "today": today,
+        "tomorrow": today + timedelta(days=1),
+        "warehouse_code": warehouse_code,
+    }).mappings().one()
+
+    stats = dict(row)
+    total = stats["total_records"]
+    # Expired records are assumed complete
+    operational_complete = stats["complete_and_editable"] + stats["expired"]
+    stats["completion_percentage"] = round(operational_complete / total * 100, 1) if total else 0.0
+    stats["avg_edits_per_record"] = round(float(stats["avg_edits_per_record"]), 1)
+    return stats
+
+@functools.lru_cache(maxsize=None)
+def build_records_needing_completion_sql(scoped: bool):
+    """Movements still inside the edit window whose operational data is incomplete, oldest first"""
+    warehouse_filter = "AND warehouse_code = :warehouse_code" if scoped else ""
+    return text(f"""
+        SELECT * FROM insights_data
+        WHERE date >= :since_day
+        AND moved_at >= CAST(:now AS timestamptz) - {_interval(EDIT_WINDOW)}
+        AND ({EDIT_STATUS_SQL}) = 'needs_completion'
+        {warehouse_filter}
+        ORDER BY moved_at, id
+    """)
+
+def get_records_needing_completion(db, warehouse_code: str = None, scoped: bool = False, now: datetime = None) -> list:
+    """InsightsData rows whose edit status is needs_completion (scoped: warehouse_code only)"""
+    now = now or datetime.now(timezone.utc)
+    statement = select(InsightsData).from_statement(build_records_needing_completion_sql(scoped))
+    return db.execute(statement, {
+        "now": now,
+        "since_day": datetime.combine((_local_now(now) - EDIT_WINDOW).date(), datetime.min.time()),
+        "warehouse_code": warehouse_code,
+    }).scalars().all()
+
+def gate_entry_movement_query(db, gate_entry_no: str):
+    """Movement of a gate entry (/update-operational-data, /km-reading-context)"""
+    return db.query(InsightsData).filter(InsightsData.gate_entry_no == gate_entry_no)
+
+def previous_km_reading_query(db, record: InsightsData):
+    """Latest earlier movement of the record's vehicle that has a KM reading"""
+    return db.query(InsightsData).filter(
+        InsightsData.vehicle_key == record.vehicle_key,
+        InsightsData.moved_at < record.movement_datetime(),
+        InsightsData.km_reading.isnot(None)
+    ).order_by(InsightsData.moved_at.desc(), InsightsData.id.desc())
@@ -0,0 +1,68 @@
+from datetime import datetime
+from sqlalchemy import text
+from app.models import VehicleGateState
+from app.utils.helpers import vehicle_key, local_movement_time
+
+# Gate-In / Gate-Out sequencing against vehicle_gate_state. A gate entry locks
+# the vehicle's row before checking the sequence and records the new movement
+# on it before committing, so concurrent entries for the same vehicle (two
+# guards at two gates) run one after the other and the second one sees the
+# first one's movement instead of the same stale "last movement".
+
+class GateSequenceError(ValueError):
+    """A movement that would repeat the vehicle's last movement type"""
+
+def lock_vehicle_state(db, key: str) -> VehicleGateState:
+    """Gate state row of a vehicle, locked FOR UPDATE until the session's transaction ends
+
+    Vehicles without a row get an empty one first, so even their first
+    movement has a row to lock; it disappears again if the transaction
+    rolls back.
+    """
+    db.execute(text("""
+        INSERT INTO vehicle_gate_state (vehicle_key)
+        VALUES (:vehicle_key)
+        ON CONFLICT (vehicle_key) DO NOTHING
+    """), {"vehicle_key": key})
+    return db.query(VehicleGateState).filter(
+        VehicleGateState.vehicle_key == key
+    ).with_for_update().populate_existing().one()
+
+def begin_transition(db, vehicle_no: str, gate_type: str) -> VehicleGateState:
+    """Lock the vehicle's gate state and check that gate_type may follow its last movement
+
+    Raises GateSequenceError when the vehicle already has a gate_type
+    movement (or the number has no usable characters).
+    """
+    key = vehicle_key(vehicle_no)
+    if not key:
+        raise GateSequenceError("Vehicle number is required")
+
+    state = lock_vehicle_state(db, key)
+    if state.movement_type == gate_type:
+        required = "Gate-Out" if gate_type == "Gate-In" else "Gate-In"
+        raise GateSequenceError(
+            f"Vehicle {vehicle_no} already has {gate_type} on {local_movement_time(state.moved_at).date()}. "
+            f"Must do {required} first."
+        )
+    return state
+
+def complete_transition(state: VehicleGateState, vehicle_no: str, gate_type: str,
+                        gate_entry_no: str, warehouse_code: str, moved_at: datetime):
+    """Record the movement on the locked gate state; flushed with the caller's commit"""
+    state.vehicle_no = vehicle_no
+    state.movement_type = gate_type
+    state.gate_entry_no = gate_entry_no
+    state.warehouse_code = warehouse_code
+    state.moved_at = moved_at
+    state.updated_at = datetime.now()
+
+def get_vehicle_state(db, vehicle_no: str):
+    """Committed gate state of a vehicle (primary-key lookup), None without movements"""
+    key = vehicle_key(vehicle_no)
+    if not key:
+        return None
+    state = db.get(VehicleGateState, key)
+    if state is None or state.movement_type is None:
+        return None
+    return state
@@ -0,0 +1,186 @@
+import functools
+import hashlib
+import inspect
+import json
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import Header, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from app.config import settings
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Idempotency-Key support for the gate-entry and operational-data writes.
+# The first request with a key claims it in idempotency_keys (its own short
+# transaction, so every worker sees the claim at once) and runs with its
+# commits deferred: the endpoint's writes and its stored response commit in
+# one transaction, so a key is either completed with its write or not written
+# at all. A retry with the same key gets the stored response back instead of
+# writing again; a claim left 'processing' by a request that died can be taken
+# over once its lease (IDEMPOTENCY_PROCESSING_LEASE_SECONDS) runs out. Keys are
+# scoped to the user, expire after IDEMPOTENCY_KEY_TTL_HOURS and each user
+# keeps at most IDEMPOTENCY_MAX_KEYS_PER_USER.
+
+MAX_KEY_LENGTH = 255
+
+# Request arguments that are not part of what the client sent
+UNHASHED_ARGUMENTS = ("db", "current_user")
+
+def request_fingerprint(endpoint: str, arguments: dict) -> str:
+    """Hash of the endpoint and its body/path arguments, to spot a key reused for another request"""
+    payload = {name: value for name, value in arguments.items() if name not in UNHASHED_ARGUMENTS}
+    raw = json.dumps([endpoint, jsonable_encoder(payload)], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def claim_key(scope: str, key: str, endpoint: str, request_hash: str):
+    """Claim a key for a new request: (claimed_at, None) when claimed, else (None, stored response to replay)
+
+    A 'processing' claim whose lease ran out is taken over. Raises 422 when
+    the key was used for a different request and 409 while the request that
+    claimed it may still be running.
+    """
+    now = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM idempotency_keys WHERE expires_at < :now"), {"now": now})
+
+        claimed = conn.execute(text("""
+            INSERT INTO idempotency_keys (scope, idempotency_key, endpoint, request_hash, status, created_at, claimed_at, expires_at)
+            VALUES (:scope, :key, :endpoint, :request_hash, 'processing', :now, :now, :expires_at)
+            ON CONFLICT (scope, idempotency_key) DO UPDATE SET claimed_at = EXCLUDED.claimed_at
+            WHERE idempotency_keys.status = 'processing'
+            AND idempotency_keys.request_hash = EXCLUDED.request_hash
+            AND idempotency_keys.claimed_at < :lease_cutoff
+            RETURNING claimed_at
+        """), {
+            "scope": scope, "key": key, "endpoint": endpoint, "request_hash": request_hash,
+            "now": now, "expires_at": now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+            "lease_cutoff": now - timedelta(seconds=settings.IDEMPOTENCY_PROCESSING_LEASE_SECONDS),
+        }).fetchone()
+
+        if claimed:
+            # Keep the user's store bounded: drop the oldest completed keys beyond the cap
+            conn.execute(text("""
+                DELETE FROM idempotency_keys
+                WHERE scope = :scope
+                AND idempotency_key IN (
+                    SELECT idempotency_key FROM idempotency_keys
+                    WHERE scope = :scope AND status = 'completed'
+                    ORDER BY created_at DESC
+                    OFFSET :max_keys
+                )
+            """), {"scope": scope, "max_keys": settings.IDEMPOTENCY_MAX_KEYS_PER_USER})
+            return claimed.claimed_at, None
+
+        stored = conn.execute(text("""
+            SELECT request_hash, status, status_code, response
+            FROM idempotency_keys
+            WHERE scope = :scope AND idempotency_key = :key
+        """), {"scope": scope, "key": key}).fetchone()
+
+    if stored is not None and stored.request_hash != request_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    if stored is None or stored.status != 'completed':
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still being processed")
+    return None, JSONResponse(status_code=stored.status_code, content=stored.response, headers={"Idempotent-Replayed": "true"})
+
+def complete_key(db, scope: str, key: str, claimed_at: datetime, status_code: int, response):
+    """Store the response a claimed key replays from now on and commit it with the endpoint's writes
+
+    Raises 409 (and rolls the writes back) when the claim's lease ran out and
+    another request took the key over, so only one of them ever commits.
+    """
+    completed = db.execute(text("""
+        UPDATE idempotency_keys
+        SET status = 'completed', status_code = :status_code, response = CAST(:response AS jsonb)
+        WHERE scope = :scope AND idempotency_key = :key
+        AND status = 'processing' AND claimed_at = :claimed_at
+    """), {
+        "scope": scope, "key": key, "claimed_at": claimed_at,
+        "status_code": status_code, "response": json.dumps(jsonable_encoder(response)),
+    }).rowcount
+    if not completed:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still being processed")
+    db.commit()
+
+def release_key(scope: str, key: str, claimed_at: datetime):
+    """Forget a claim whose request failed server-side, so the client can retry it"""
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("""
+                DELETE FROM idempotency_keys
+                WHERE scope = :scope AND idempotency_key = :key
+                AND status = 'processing' AND claimed_at = :claimed_at
+            """), {"scope": scope, "key": key, "claimed_at": claimed_at})
+    except Exception as e:
+        # The claim's lease runs out instead
+        logger.error(f"✗ Could not release Idempotency-Key {key}: {str(e)}")
+
+@contextmanager
+def deferred_commit(db):
+    """Turn the session's commits into flushes, so everything the endpoint writes stays in one open transaction"""
+    db.commit = db.flush
+    try:
+        yield db
+    finally:
+        del db.commit
+
+def idempotent(endpoint):
+    """Make a write endpoint honour an optional Idempotency-Key header
+
+    The endpoint must take db and current_user. Its commits are deferred until
+    the response (or a client error, 4xx) is stored, so both commit together;
+    server errors roll back and release the key. Direct calls (without the
+    header) run the endpoint as is.
+    """
+    signature = inspect.signature(endpoint)
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, idempotency_key: Optional[str] = None, **kwargs):
+        if not isinstance(idempotency_key, str) or not idempotency_key.strip():
+            return endpoint(*args, **kwargs)
+        key = idempotency_key.strip()
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+
+        arguments = signature.bind(*args, **kwargs).arguments
+        db = arguments["db"]
+        scope = arguments["current_user"].username
+        claimed_at, replay = claim_key(scope, key, endpoint.__name__, request_fingerprint(endpoint.__name__, arguments))
+        if replay is not None:
+            return replay
+
+        try:
+            try:
+                with deferred_commit(db):
+                    result = endpoint(*args, **kwargs)
+            except HTTPException as e:
+                if e.status_code >= 500:
+                    raise
+                # Client errors write nothing: only their response is stored
+                db.rollback()
+                complete_key(db, scope, key, claimed_at, e.status_code, {"detail": e.detail})
+                raise
+            complete_key(db, scope, key, claimed_at, 200, result)
+        except HTTPException as e:
+            if e.status_code >= 500:
+                db.rollback()
+                release_key(scope, key, claimed_at)
+            raise
+        except Exception:
+            db.rollback()
+            release_key(scope, key, claimed_at)
+            raise
+        return result
+
+    header = inspect.Parameter(
+        "idempotency_key", inspect.Parameter.KEYWORD_ONLY,
+        default=Header(None, alias="Idempotency-Key"), annotation=Optional[str]
+    )
+    wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), header])
+    return wrapper
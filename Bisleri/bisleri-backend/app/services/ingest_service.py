@@ -0,0 +1,275 @@
+import csv
+import io
+import json
+import logging
+import queue
+import time
+from datetime import datetime
+from sqlalchemy import Integer, DateTime, String
+from app.models import MfabricDeliveryChallanData, MfabricInvoiceData, MfabricTransferOrderRGPData
+from app.utils.helpers import get_connection
+
+logger = logging.getLogger(__name__)
+
+# Staging tables that accept bulk ingest, keyed by table name
+STAGING_MODELS = {
+    model.__tablename__: model
+    for model in (MfabricDeliveryChallanData, MfabricInvoiceData, MfabricTransferOrderRGPData)
+}
+
+INGEST_FORMATS = ("csv", "ndjson")
+
+# Rows are re-encoded for COPY in batches of this size
+COPY_BATCH_ROWS = 1000
+MAX_REPORTED_ERRORS = 20
+
+DATETIME_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+]
+
+class ChunkQueueReader(io.RawIOBase):
+    """Blocking file-like reader fed chunk by chunk from another thread.
+
+    The queue is bounded, so a fast producer (the HTTP body) waits for the
+    consumer (COPY) instead of buffering the whole upload in memory.
+    """
+    def __init__(self, max_chunks: int = 16):
+        super().__init__()
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._buffer = b""
+        self._eof = False
+        self.reader_closed = False
+    
+    def readable(self):
+        return True
+    
+    def feed(self, chunk) -> bool:
+        """Hand a chunk (None = end of stream) to the reader; False once the reader has stopped"""
+        while not self.reader_closed:
+            try:
+                self._queue.put(chunk, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def readinto(self, buffer):
+        while not self._buffer and not self._eof:
+            chunk = self._queue.get()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer = chunk
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+    
+    def close(self):
+        self.reader_closed = True
+        super().close()
+
+class _BytesIteratorReader(io.RawIOBase):
+    """File-like view over an iterator of bytes (what cursor.copy_expert reads from)"""
+    def __init__(self, chunks):
+        super().__init__()
+        self._chunks = iter(chunks)
+        self._buffer = b""
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+class MfabricIngestService:
+    """Streams CSV / NDJSON into the mfabric staging tables with PostgreSQL COPY.
+
+    Input is read, mapped, validated and re-encoded row by row and fed to a
+    single COPY statement, so memory use is bounded by one batch regardless of
+    file size. The whole load is one transaction: it is either fully loaded or
+    (on a database error, or a validation error with on_error="abort") not at all.
+    """
+    def get_columns(self, table: str) -> dict:
+        """Ingestable columns of a staging table -> SQLAlchemy column (database-assigned ones excluded)"""
+        model = STAGING_MODELS[table]
+        return {column.name: column for column in model.__table__.columns if column.name not in ("id", "load_xact_id")}
+    
+    def coerce_value(self, column, value):
+        """Validate and normalize a single value for a staging column (None = NULL)"""
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = value.strip()
+            if value == "":
+                return None
+        
+        if isinstance(column.type, Integer):
+            if isinstance(value, bool):
+                raise ValueError(f"{column.name}: expected an integer, got {value!r}")
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                pass
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                number = None
+            if number is None or not number.is_integer():
+                raise ValueError(f"{column.name}: expected an integer, got {value!r}")
+            return int(number)
+        
+        if isinstance(column.type, DateTime):
+            text_value = str(value)
+            try:
+                return datetime.fromisoformat(text_value).isoformat()
+            except ValueError:
+                pass
+            for fmt in DATETIME_FORMATS:
+                try:
+                    return datetime.strptime(text_value, fmt).isoformat()
+                except ValueError:
+                    continue
+            raise ValueError(f"{column.name}: unrecognized date {value!r}")
+        
+        text_value = str(value)
+        if isinstance(column.type, String) and column.type.length and len(text_value) > column.type.length:
+            raise ValueError(f"{column.name}: longer than {column.type.length} characters")
+        return text_value
+    
+    def _iter_records(self, text_stream, data_format: str):
+        """Yield (line_number, dict) from a CSV or NDJSON text stream"""
+        if data_format == "csv":
+            reader = csv.DictReader(text_stream)
+            for record in reader:
+                yield reader.line_num, record
+            return
+        
+        for line_number, line in enumerate(text_stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, ValueError(f"invalid JSON: {e.msg}")
+                continue
+            if not isinstance(record, dict):
+                yield line_number, ValueError("each NDJSON line must be a JSON object")
+                continue
+            yield line_number, record
+    
+    def ingest(self, table: str, byte_stream, data_format: str = "csv", mapping: dict = None,
+               on_error: str = "abort") -> dict:
+        """Stream a CSV/NDJSON byte stream into a staging table via COPY
+
+        mapping renames input fields to staging columns ({"Invoice No": "document_no"});
+        other fields are matched case-insensitively and unknown ones are ignored.
+        on_error="skip" drops invalid rows (reporting the first few) instead of aborting.
+        """
+        if table not in STAGING_MODELS:
+            raise ValueError(f"Unknown staging table: {table}")
+        if data_format not in INGEST_FORMATS:
+            raise ValueError(f"Unsupported format: {data_format}")
+        if on_error not in ("abort", "skip"):
+            raise ValueError("on_error must be 'abort' or 'skip'")
+        
+        columns = self.get_columns(table)
+        mapping = {key.strip().lower(): value for key, value in (mapping or {}).items()}
+        unknown_targets = set(mapping.values()) - set(columns)
+        if unknown_targets:
+            raise ValueError(f"Mapping targets unknown columns: {', '.join(sorted(unknown_targets))}")
+        
+        column_names = list(columns)
+        stats = {"rows_loaded": 0, "rows_rejected": 0, "errors": [], "ignored_fields": set()}
+        
+        def reject(line_number, error):
+            if on_error == "abort":
+                raise ValueError(f"line {line_number}: {error}")
+            stats["rows_rejected"] += 1
+            if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+                stats["errors"].append({"line": line_number, "error": str(error)})
+        
+        def resolve(field):
+            key = str(field).strip().lower()
+            if key in mapping:
+                return mapping[key]
+            return key if key in columns else None
+        
+        def copy_chunks():
+            text_stream = io.TextIOWrapper(io.BufferedReader(byte_stream), encoding="utf-8-sig", newline="")
+            out = io.StringIO()
+            writer = csv.writer(out)
+            pending = 0
+            for line_number, record in self._iter_records(text_stream, data_format):
+                if isinstance(record, Exception):
+                    reject(line_number, record)
+                    continue
+                try:
+                    values = {}
+                    for field, value in record.items():
+                        target = resolve(field) if field is not None else None
+                        if target is None:
+                            stats["ignored_fields"].add(str(field))
+                            continue
+                        values[target] = self.coerce_value(columns[target], value)
+                    if not values.get("document_no"):
+                        raise ValueError("document_no is required")
+                except (TypeError, ValueError) as e:
+                    reject(line_number, e)
+                    continue
+                
+                writer.writerow(["" if values.get(name) is None else values[name] for name in column_names])
+                stats["rows_loaded"] += 1
+                pending += 1
+                if pending >= COPY_BATCH_ROWS:
+                    yield out.getvalue().encode("utf-8")
+                    out.seek(0)
+                    out.truncate()
+                    pending = 0
+            if pending:
+                yield out.getvalue().encode("utf-8")
+        
+        copy_sql = (
+            f"COPY {table} ({', '.join(column_names)}) "
+            f"FROM STDIN WITH (FORMAT csv, NULL '')"
+        )
+        
+        started = time.perf_counter()
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.copy_expert(copy_sql, _BytesIteratorReader(copy_chunks()))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+            if hasattr(byte_stream, "close"):
+                byte_stream.close()
+        
+        logger.info(f"Ingested {stats['rows_loaded']} rows into {table} ({stats['rows_rejected']} rejected)")
+        return {
+            "table": table,
+            "format": data_format,
+            "rows_loaded": stats["rows_loaded"],
+            "rows_rejected": stats["rows_rejected"],
+            "errors": stats["errors"],
+            "ignored_fields": sorted(stats["ignored_fields"]),
+            "duration_ms": int((time.perf_counter() - started) * 1000)
+        }
+
+# Singleton instance
+ingest_service = MfabricIngestService()
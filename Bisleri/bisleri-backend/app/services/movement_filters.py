@@ -0,0 +1,110 @@
+import functools
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from app.database import prepared_statement
+from app.models import InsightsData
+from app.models.insights import OPERATIONAL_COMPLETE_SQL
+from app.utils.helpers import clean_vehicle_number, movement_instant
+from app.utils.pagination import decode_cursor, parse_position, movement_position
+
+# /filtered-movements compiles every MovementFilter into one of a fixed set of
+# statements: the access path (which index drives the scan) times first page /
+# continuation page. Every other filter is always present in the SQL and is
+# switched off by binding NULL, so each statement is PREPAREd once per
+# connection and Postgres reuses its plan instead of planning a new shape per
+# filter combination.
+
+# Date bounds bound when the range is left open (the date condition must always be there)
+OPEN_FROM = datetime(1900, 1, 1)
+OPEN_TO = datetime(9999, 12, 30)
+
+# Driving condition of each access path (and the index it is answered from)
+ACCESS_PATHS = {
+    # trigram index on vehicle_key
+    "vehicle": "vehicle_key LIKE :vehicle_pattern AND (CAST(:warehouse_code AS text) IS NULL OR warehouse_code = :warehouse_code)",
+    # (warehouse_code, moved_at, id)
+    "warehouse": "warehouse_code = :warehouse_code",
+    # (moved_at, id)
+    "all": None,
+}
+
+OPTIONAL_CONDITIONS = [
+    "(CAST(:site_code AS text) IS NULL OR site_code = :site_code)",
+    "(CAST(:movement_type AS text) IS NULL OR movement_type = :movement_type)",
+    "(CAST(:document_type AS text) IS NULL OR document_type = :document_type)",
+    "(CAST(:sub_document_type AS text) IS NULL OR sub_document_type = :sub_document_type)",
+    f"(CAST(:completion_status AS text) IS NULL OR ({OPERATIONAL_COMPLETE_SQL}) = (CAST(:completion_status AS text) = 'complete'))",
+]
+
+@functools.lru_cache(maxsize=None)
+def build_movement_sql(path: str, paged: bool) -> tuple:
+    """(prepared statement name, SQL) for one access path, newest first, fetching :limit rows"""
+    conditions = [ACCESS_PATHS[path]] if ACCESS_PATHS[path] else []
+    # date prunes partitions, moved_at (the same day bounds as instants) bounds the index range
+    conditions += [
+        "date >= :from_date", "date < :to_date",
+        "moved_at >= :from_instant", "moved_at < :to_instant",
+    ] + OPTIONAL_CONDITIONS
+    if paged:
+        conditions.append("(moved_at, id) < (:after_moved_at, :after_id)")
+    where = "\n            AND ".join(conditions)
+    name = f"filtered_movements_{path}{'_paged' if paged else ''}"
+    return name, f"""
+        SELECT * FROM insights_data
+        WHERE {where}
+        ORDER BY moved_at DESC, id DESC
+        LIMIT :limit
+    """
+
+def compile_movement_filter(filters, warehouse_code: str = None):
+    """Turn a validated MovementFilter into (statement name, SQL, params)
+
+    warehouse_code is the warehouse the caller is restricted to (None for
+    admins, who may pass their own filter). The statement fetches one row more
+    than filters.limit so the caller can tell whether another page follows.
+    Raises ValueError for a cursor that was not issued by this endpoint.
+    """
+    warehouse_code = warehouse_code or filters.warehouse_code
+    if filters.vehicle_no:
+        path = "vehicle"
+    elif warehouse_code:
+        path = "warehouse"
+    else:
+        path = "all"
+
+    after = None
+    if filters.cursor:
+        after = decode_cursor(filters.cursor).get("after")
+        if after is None:
+            raise ValueError("Invalid cursor")
+        after = parse_position(after)
+
+    completion_status = filters.completion_status or ("incomplete" if filters.needs_edit else None)
+    from_date = datetime.combine(filters.from_date, datetime.min.time()) if filters.from_date else OPEN_FROM
+    to_date = datetime.combine(filters.to_date + timedelta(days=1), datetime.min.time()) if filters.to_date else OPEN_TO
+    params = {
+        "vehicle_pattern": f"%{clean_vehicle_number(filters.vehicle_no)}%" if filters.vehicle_no else None,
+        "warehouse_code": warehouse_code,
+        "from_date": from_date,
+        "to_date": to_date,
+        "from_instant": movement_instant(from_date),
+        "to_instant": movement_instant(to_date),
+        "site_code": filters.site_code,
+        "movement_type": filters.movement_type,
+        "document_type": filters.document_type,
+        "sub_document_type": "Manual Entry" if filters.manual_only else None,
+        "completion_status": completion_status,
+        "limit": filters.limit + 1,
+    }
+    if after is not None:
+        params["after_moved_at"], params["after_id"] = after
+    return (*build_movement_sql(path, after is not None), params)
+
+def fetch_filtered_movements(db, filters, warehouse_code: str = None):
+    """One page of InsightsData matching filters: (movements, keyset position if more follow, else None)"""
+    name, sql, params = compile_movement_filter(filters, warehouse_code)
+    statement = select(InsightsData).from_statement(prepared_statement(db, name, sql))
+    movements = db.execute(statement, params).scalars().all()
+    if len(movements) > filters.limit:
+        return movements[:filters.limit], movement_position(movements[filters.limit - 1])
+    return movements, None
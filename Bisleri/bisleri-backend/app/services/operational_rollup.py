@@ -0,0 +1,109 @@
+import functools
+from collections import defaultdict
+from datetime import date
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+from app.models import InsightsData
+from app.models.insights import OPERATIONAL_FIELDS, ROLLUP_COUNTERS, rollup_counts
+
+# warehouse_daily_rollup is kept current from the ORM flush: whenever a session
+# flushes InsightsData inserts, updates or deletes, the counters they add or
+# remove are upserted into the affected (warehouse, day) rows on the same
+# connection, so they commit (or roll back) together with the movement.
+# Importing this module registers the hook.
+
+# Columns that decide which rollup row a movement counts in and what it adds there
+TRACKED_COLUMNS = ("warehouse_code", "date") + OPERATIONAL_FIELDS + ("edit_count",)
+
+def _keep_previous_value(target, value, oldvalue, initiator):
+    return value
+
+# Load the committed value before a tracked column is overwritten (even when it
+# was expired), so the flush always knows what the movement used to count as
+for _name in TRACKED_COLUMNS:
+    event.listen(getattr(InsightsData, _name), "set", _keep_previous_value, active_history=True)
+
+ROLLUP_UPSERT_SQL = text(f"""
+    INSERT INTO warehouse_daily_rollup (warehouse_code, day, {', '.join(ROLLUP_COUNTERS)}, updated_at)
+    VALUES (:warehouse_code, :day, {', '.join(':' + counter for counter in ROLLUP_COUNTERS)}, NOW())
+    ON CONFLICT (warehouse_code, day) DO UPDATE SET
+        {', '.join(f'{counter} = warehouse_daily_rollup.{counter} + EXCLUDED.{counter}' for counter in ROLLUP_COUNTERS)},
+        updated_at = EXCLUDED.updated_at
+""")
+
+def _row_values(record, previous: bool = False) -> dict:
+    """Tracked column values of a movement, as committed (previous) or as just flushed"""
+    state = inspect(record)
+    values = {}
+    for name in TRACKED_COLUMNS:
+        history = state.attrs[name].history
+        values[name] = history.deleted[0] if previous and history.deleted else getattr(record, name)
+    return values
+
+def _rollup_key(values) -> tuple:
+    day = values["date"]
+    return (values["warehouse_code"] or "", day.date() if hasattr(day, "date") else day)
+
+def collect_rollup_deltas(session) -> dict:
+    """(warehouse_code, day) -> counter changes caused by the InsightsData rows of a flush"""
+    deltas = defaultdict(lambda: dict.fromkeys(ROLLUP_COUNTERS, 0))
+
+    def add(values, sign):
+        if values["date"] is None:
+            return
+        delta = deltas[_rollup_key(values)]
+        for counter, count in rollup_counts(values).items():
+            delta[counter] += sign * count
+
+    for record in session.new:
+        if isinstance(record, InsightsData):
+            add(_row_values(record), 1)
+    for record in session.dirty:
+        if isinstance(record, InsightsData):
+            add(_row_values(record, previous=True), -1)
+            add(_row_values(record), 1)
+    for record in session.deleted:
+        if isinstance(record, InsightsData):
+            add(_row_values(record, previous=True), -1)
+
+    return {key: delta for key, delta in deltas.items() if any(delta.values())}
+
+def apply_rollup_deltas(conn, deltas: dict):
+    """Add counter changes to their rollup rows
+
+    Rows are upserted in key order, so concurrent writers lock the rollup rows
+    they share in the same order and cannot deadlock on them.
+    """
+    rows = [
+        {"warehouse_code": warehouse_code, "day": day, **delta}
+        for (warehouse_code, day), delta in sorted(deltas.items())
+    ]
+    if rows:
+        conn.execute(ROLLUP_UPSERT_SQL, rows)
+
+@event.listens_for(Session, "after_flush")
+def _maintain_rollup(session, flush_context):
+    deltas = collect_rollup_deltas(session)
+    if deltas:
+        apply_rollup_deltas(session.connection(), deltas)
+
+@functools.lru_cache(maxsize=None)
+def build_rollup_summary_sql(scoped: bool):
+    """Counter totals over the rollup rows since a day (scoped: one warehouse only)"""
+    totals = ",\n            ".join(f"COALESCE(SUM({counter}), 0) AS {counter}" for counter in ROLLUP_COUNTERS)
+    warehouse_filter = "AND warehouse_code = :warehouse_code" if scoped else ""
+    return text(f"""
+        SELECT
+            {totals}
+        FROM warehouse_daily_rollup
+        WHERE day >= :since
+        {warehouse_filter}
+    """)
+
+def get_rollup_totals(db, since: date, warehouse_code: str = None, scoped: bool = False) -> dict:
+    """ROLLUP_COUNTERS summed over the days since `since` (scoped: warehouse_code only)"""
+    row = db.execute(build_rollup_summary_sql(scoped), {
+        "since": since,
+        "warehouse_code": warehouse_code or "",
+    }).mappings().one()
+    return {counter: int(row[counter]) for counter in ROLLUP_COUNTERS}
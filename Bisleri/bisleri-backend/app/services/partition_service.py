@@ -0,0 +1,202 @@
+import logging
+import re
+from datetime import date
+from sqlalchemy import text
+from app.database import engine
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Range-partitioned tables (one partition per calendar month plus a DEFAULT
+# partition). Partitions are named {table}_yYYYYmMM; retention detaches whole
+# months instead of deleting rows, then applies the table's retention action:
+#   detach  - leave the detached partition as a standalone table
+#   archive - move it into the PARTITION_ARCHIVE_SCHEMA schema
+#   drop    - drop it
+# unique_per_partition lists columns unique on their own that the primary key
+# (which must include the partition key) cannot cover; every partition gets a
+# unique index on each, named {partition}_{column}_key.
+PARTITIONED_TABLES = {
+    "document_data": {
+        "months_ahead": lambda: settings.DOCUMENT_DATA_PARTITION_MONTHS_AHEAD,
+        "retention_months": lambda: settings.DOCUMENT_DATA_RETENTION_MONTHS,
+        "retention_action": lambda: settings.DOCUMENT_DATA_RETENTION_ACTION,
+        "unique_per_partition": ["document_no"],
+    },
+    "insights_data": {
+        "months_ahead": lambda: settings.INSIGHTS_DATA_PARTITION_MONTHS_AHEAD,
+        "retention_months": lambda: settings.INSIGHTS_DATA_RETENTION_MONTHS,
+        "retention_action": lambda: settings.INSIGHTS_DATA_RETENTION_ACTION,
+    },
+}
+
+RETENTION_ACTIONS = ("detach", "archive", "drop")
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month `months` after (or before) the given month"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+def get_partitions(conn, table: str) -> dict:
+    """Monthly partitions currently attached to a table: first day of month -> partition name"""
+    rows = conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+    """), {"table": table}).fetchall()
+    pattern = re.compile(rf"^{re.escape(table)}_y(\d{{4}})m(\d{{2}})$")
+    partitions = {}
+    for (name,) in rows:
+        match = pattern.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+def get_partition_key(conn, table: str) -> str:
+    """Partition key column of a range-partitioned table"""
+    return conn.execute(text("""
+        SELECT a.attname
+        FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        JOIN pg_attribute a ON a.attrelid = pt.partrelid AND a.attnum = pt.partattrs[0]
+        WHERE c.relname = :table
+    """), {"table": table}).scalar()
+
+def create_unique_indexes(conn, table: str, name: str):
+    """Create the table's unique_per_partition indexes on one partition"""
+    for column in PARTITIONED_TABLES.get(table, {}).get("unique_per_partition", []):
+        conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_{column}_key ON {name} ({column})"))
+
+def create_partition(conn, table: str, month: date) -> str:
+    """Create the partition for one month
+
+    Rows for that month that already landed in the DEFAULT partition are moved
+    into the new partition before it is attached (attaching would fail otherwise).
+    """
+    name = partition_name(table, month)
+    default = default_partition_name(table)
+    bounds = {"start": month, "end": add_months(month, 1)}
+    key = get_partition_key(conn, table)
+    
+    stray_rows = conn.execute(text(f"""
+        SELECT EXISTS (SELECT 1 FROM {default} WHERE {key} >= :start AND {key} < :end)
+    """), bounds).scalar()
+    
+    if not stray_rows:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table}
+            FOR VALUES FROM ('{bounds["start"]}') TO ('{bounds["end"]}')
+        """))
+        create_unique_indexes(conn, table, name)
+        return name
+    
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {default}
+            WHERE {key} >= :start AND {key} < :end
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), bounds)
+    create_unique_indexes(conn, table, name)
+    conn.execute(text(f"""
+        ALTER TABLE {table} ATTACH PARTITION {name}
+        FOR VALUES FROM ('{bounds["start"]}') TO ('{bounds["end"]}')
+    """))
+    logger.info(f"Moved {table} rows for {month:%Y-%m} out of {default}")
+    return name
+
+def ensure_partitions(table: str, months_ahead: int, today: date = None) -> list:
+    """Create any missing partitions from the current month to months_ahead months out"""
+    current = (today or date.today()).replace(day=1)
+    created = []
+    with engine.begin() as conn:
+        existing = get_partitions(conn, table)
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month not in existing:
+                created.append(create_partition(conn, table, month))
+    if created:
+        logger.info(f"Created {table} partitions: {', '.join(created)}")
+    return created
+
+def detach_expired_partitions(table: str, retention_months: int, action: str = "detach",
+                              today: date = None) -> list:
+    """Detach monthly partitions entirely older than the retention window
+
+    A detached partition is then kept in place, moved to the archive schema
+    (where it can be dumped or re-attached) or dropped, depending on action.
+    retention_months <= 0 keeps everything.
+    """
+    if retention_months <= 0:
+        return []
+    if action not in RETENTION_ACTIONS:
+        raise ValueError(f"Unknown retention action for {table}: {action}")
+    cutoff = add_months((today or date.today()).replace(day=1), -retention_months)
+    detached = []
+    with engine.begin() as conn:
+        for month, name in sorted(get_partitions(conn, table).items()):
+            if add_months(month, 1) > cutoff:
+                break
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            if action == "archive":
+                conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {settings.PARTITION_ARCHIVE_SCHEMA}"))
+                conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {settings.PARTITION_ARCHIVE_SCHEMA}"))
+            elif action == "drop":
+                conn.execute(text(f"DROP TABLE {name}"))
+            detached.append(name)
+    if detached:
+        logger.info(f"Detached expired {table} partitions ({action}): {', '.join(detached)}")
+    return detached
+
+def maintain_partitions() -> dict:
+    """Pre-create upcoming partitions and detach expired ones for every partitioned table
+
+    A failure on one table is logged and does not stop the others.
+    """
+    results = {}
+    for table, policy in PARTITIONED_TABLES.items():
+        try:
+            results[table] = {
+                "created": ensure_partitions(table, policy["months_ahead"]()),
+                "detached": detach_expired_partitions(
+                    table, policy["retention_months"](), policy["retention_action"]()
+                ),
+                "error": None
+            }
+        except Exception as e:
+            logger.error(f"Partition maintenance failed for {table}: {str(e)}")
+            results[table] = {"created": [], "detached": [], "error": str(e)}
+    return results
+
+def get_partition_status() -> list:
+    """Attached partitions per table with approximate row counts (from planner statistics)"""
+    status = []
+    with engine.connect() as conn:
+        for table in PARTITIONED_TABLES:
+            rows = conn.execute(text("""
+                SELECT child.relname AS partition, pg_get_expr(child.relpartbound, child.oid) AS bounds,
+                       GREATEST(child.reltuples, 0)::bigint AS approx_rows
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = :table
+                ORDER BY child.relname
+            """), {"table": table}).fetchall()
+            status.append({
+                "table": table,
+                "partitions": [
+                    {"partition": row.partition, "bounds": row.bounds, "approx_rows": row.approx_rows}
+                    for row in rows
+                ]
+            })
+    return status
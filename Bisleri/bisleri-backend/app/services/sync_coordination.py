@@ -0,0 +1,228 @@
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import Future
+from sqlalchemy import text
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL advisory lock keys (bigint, cluster-wide for this database)
+SYNC_RUN_LOCK_KEY = 7240001      # held while any consolidation runs
+SYNC_LEADER_LOCK_KEY = 7240002   # held by the one process that schedules syncs
+SYNC_REQUEST_LOCK_CLASS = 7240003  # (class, request hash) held next to the run lock: what the run does
+
+# How long a trigger waits for another process's in-flight run before giving up
+JOIN_WAIT_TIMEOUT_MS = 15 * 60 * 1000
+
+def _lock_connection():
+    """Dedicated autocommit connection so session locks never sit idle in a transaction"""
+    return engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+class LeaderElection:
+    """Leader election via a session-level advisory lock on a dedicated connection.
+
+    The lock lives as long as the connection: if the leader process dies or loses
+    its connection, PostgreSQL releases it and another process can take over on
+    its next try_acquire(). The scheduler and the change listener share one
+    instance from their own threads, so its connection is used under a lock.
+    """
+    def __init__(self, lock_key: int = SYNC_LEADER_LOCK_KEY):
+        self.lock_key = lock_key
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    @property
+    def is_leader(self) -> bool:
+        return self._conn is not None
+    
+    def try_acquire(self) -> bool:
+        """Become (or confirm we still are) the leader without blocking"""
+        with self._lock:
+            return self._try_acquire()
+    
+    def _try_acquire(self) -> bool:
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT 1"))
+                return True
+            except Exception as e:
+                logger.warning(f"Lost sync leader connection: {str(e)}")
+                self._discard_connection()
+        
+        conn = _lock_connection()
+        try:
+            acquired = conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+            ).scalar()
+        except Exception:
+            conn.close()
+            raise
+        
+        if acquired:
+            self._conn = conn
+            logger.info("This process is now the sync leader")
+            return True
+        
+        conn.close()
+        return False
+    
+    def release(self):
+        """Give up leadership"""
+        with self._lock:
+            self._release()
+    
+    def _release(self):
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key})
+            self._conn.close()
+        except Exception as e:
+            logger.warning(f"Error releasing sync leader lock: {str(e)}")
+            self._discard_connection()
+        self._conn = None
+    
+    def _discard_connection(self):
+        # Invalidate rather than return to the pool so the session (and its lock) ends
+        try:
+            self._conn.invalidate()
+        except Exception:
+            pass
+        self._conn = None
+
+def request_key(sync_func, args, kwargs) -> str:
+    """What a run does: the sync function and its arguments (trigger is only a label)"""
+    arguments = {name: value for name, value in kwargs.items() if name != "trigger"}
+    return json.dumps([sync_func.__qualname__, list(args), arguments], sort_keys=True, default=str)
+
+def request_lock_id(request: str) -> int:
+    """int4 advisory lock id of a request key"""
+    return int.from_bytes(hashlib.sha256(request.encode()).digest()[:4], "big", signed=True)
+
+class SyncCoordinator:
+    """Single-flight execution of document consolidation across threads and processes.
+
+    A caller asking for the same run as the one in flight (same sync function
+    and arguments, whatever the trigger) shares its result. Across processes,
+    the run holds SYNC_RUN_LOCK_KEY plus a lock on its request key; a caller
+    that finds the run lock taken with its own request waits for that run and
+    reports its recorded outcome instead of starting a duplicate. Callers
+    asking for something else (another mode or sources) wait for the run in
+    flight to finish and then start their own.
+    """
+    def __init__(self, lock_key: int = SYNC_RUN_LOCK_KEY):
+        self.lock_key = lock_key
+        self._lock = threading.Lock()
+        self._inflight = None
+    
+    @property
+    def is_running(self) -> bool:
+        return self._inflight is not None
+    
+    def run(self, sync_func, *args, **kwargs) -> dict:
+        """Run sync_func (returning bool) unless the same run is already in flight.
+
+        Returns {"success": bool, "joined": bool}; joined=True means this caller
+        did not start a run but waited for the same one that was already going.
+        """
+        request = request_key(sync_func, args, kwargs)
+        while True:
+            with self._lock:
+                if self._inflight is None:
+                    future, owner = Future(), True
+                    self._inflight = (request, future)
+                else:
+                    (inflight_request, future), owner = self._inflight, False
+            
+            if owner:
+                break
+            if inflight_request == request:
+                logger.info("Same sync already in flight in this process - joining it")
+                return {"success": future.result()["success"], "joined": True}
+            
+            logger.info("Another sync is in flight in this process - running after it")
+            try:
+                future.result()
+            except Exception:
+                pass
+        
+        try:
+            result = self._run_with_cluster_lock(request, sync_func, *args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight = None
+    
+    def _run_with_cluster_lock(self, request: str, sync_func, *args, **kwargs) -> dict:
+        conn = _lock_connection()
+        try:
+            acquired = conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+            ).scalar()
+            
+            if not acquired:
+                if self._request_in_flight(conn, request):
+                    return self._join_other_process(conn)
+                logger.info("Another sync is in flight in another process - running after it")
+                self._wait_for_run_lock(conn)
+            
+            # Taken after the run lock: a caller can only see it while this run holds that
+            request_params = {"lock_class": SYNC_REQUEST_LOCK_CLASS, "request_id": request_lock_id(request)}
+            conn.execute(text("SELECT pg_advisory_lock(:lock_class, :request_id)"), request_params)
+            try:
+                return {"success": bool(sync_func(*args, **kwargs)), "joined": False}
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:lock_class, :request_id)"), request_params)
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key})
+        except Exception:
+            # A connection we cannot unlock must not go back to the pool holding the lock
+            conn.invalidate()
+            raise
+        finally:
+            conn.close()
+    
+    def _request_in_flight(self, conn, request: str) -> bool:
+        """Whether the run holding the run lock (in another process) is doing this request
+
+        A run that has not taken its request lock yet reads as another
+        request, which only costs a second run after it.
+        """
+        request_params = {"lock_class": SYNC_REQUEST_LOCK_CLASS, "request_id": request_lock_id(request)}
+        free = conn.execute(text("SELECT pg_try_advisory_lock(:lock_class, :request_id)"), request_params).scalar()
+        if free:
+            conn.execute(text("SELECT pg_advisory_unlock(:lock_class, :request_id)"), request_params)
+        return not free
+    
+    def _wait_for_run_lock(self, conn):
+        """Block until the run lock is ours, for at most JOIN_WAIT_TIMEOUT_MS"""
+        conn.execute(
+            text("SELECT set_config('lock_timeout', :timeout, false)"),
+            {"timeout": f"{JOIN_WAIT_TIMEOUT_MS}ms"}
+        )
+        try:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": self.lock_key})
+        finally:
+            conn.execute(text("RESET lock_timeout"))
+    
+    def _join_other_process(self, conn) -> dict:
+        """Wait for another process's run of the same request to release the lock, then report its outcome"""
+        logger.info("Same sync already in flight in another process - waiting for it")
+        self._wait_for_run_lock(conn)
+        conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key})
+        
+        status = conn.execute(text("""
+            SELECT status FROM sync_runs
+            WHERE finished_at IS NOT NULL
+            ORDER BY started_at DESC
+            LIMIT 1
+        """)).scalar()
+        return {"success": status in ("success", "partial"), "joined": True}
+
+# Singleton instance
+sync_coordinator = SyncCoordinator()
@@ -0,0 +1,154 @@
+import logging
+import select
+import threading
+import time
+from datetime import datetime
+import psycopg2.extensions
+from app.config import settings
+from app.utils.helpers import get_connection
+from app.services.sync_coordination import sync_coordinator
+
+logger = logging.getLogger(__name__)
+
+# Channel raised by the notify_mfabric_change() statement trigger on the staging tables
+MFABRIC_CHANGE_CHANNEL = "mfabric_changes"
+
+# How often the listener wakes up to check for shutdown when idle
+IDLE_POLL_SECONDS = 5.0
+
+class MfabricChangeListener:
+    """Event-driven micro-batch sync driven by LISTEN/NOTIFY on the mfabric tables.
+
+    Each INSERT statement on a staging table notifies with the table name.
+    Notifications are debounced (SYNC_LISTEN_DEBOUNCE_SECONDS of quiet, capped at
+    SYNC_LISTEN_MAX_BATCH_SECONDS from the first event) and the notified sources
+    are then consolidated incrementally, so only the new document_nos are touched.
+    Only the sync leader acts on events (the listener takes leadership itself, so
+    it works without the periodic scheduler and right after a failover); a notification that lands while another
+    run is in flight is retried after that run instead of being dropped. Missed
+    events (listener down, reconnect) are picked up by the periodic scheduler via
+    the watermarks.
+    """
+    def __init__(self, sync_service, leader, source_tables: list):
+        self.sync_service = sync_service
+        self.leader = leader
+        self.source_tables = set(source_tables)
+        self.debounce_seconds = settings.SYNC_LISTEN_DEBOUNCE_SECONDS
+        self.max_batch_seconds = settings.SYNC_LISTEN_MAX_BATCH_SECONDS
+        
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.last_batch_at = None
+        self.batches_run = 0
+    
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        """Start listening on a background thread (no-op if already running)"""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="mfabric-change-listener", daemon=True)
+        self._thread.start()
+        logger.info(f"Listening for mfabric changes on channel {MFABRIC_CHANGE_CHANNEL}")
+    
+    def stop(self, timeout: float = 30):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+    
+    def get_status(self) -> dict:
+        return {
+            "running": self.is_running,
+            "channel": MFABRIC_CHANGE_CHANNEL,
+            "batches_run": self.batches_run,
+            "last_batch_at": self.last_batch_at.isoformat() if self.last_batch_at else None
+        }
+    
+    def _run_loop(self):
+        backoff = 1
+        while not self._stop_event.is_set():
+            try:
+                self._listen()
+                backoff = 1
+            except Exception as e:
+                logger.error(f"mfabric change listener error, reconnecting in {backoff}s: {str(e)}")
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, 60)
+    
+    def _listen(self):
+        conn = get_connection()
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"LISTEN {MFABRIC_CHANGE_CHANNEL};")
+            cursor.close()
+            
+            pending = set()
+            batch_started = None
+            last_event = None
+            
+            while not self._stop_event.is_set():
+                if pending:
+                    due_at = min(last_event + self.debounce_seconds, batch_started + self.max_batch_seconds)
+                    timeout = max(0.0, due_at - time.monotonic())
+                else:
+                    timeout = IDLE_POLL_SECONDS
+                
+                if select.select([conn], [], [], timeout)[0]:
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        if notify.payload not in self.source_tables:
+                            continue
+                        now = time.monotonic()
+                        pending.add(notify.payload)
+                        batch_started = batch_started or now
+                        last_event = now
+                
+                if pending and self._batch_due(batch_started, last_event):
+                    if self._run_batch(sorted(pending)):
+                        pending = set()
+                        batch_started = None
+                    else:
+                        # Retry the same tables after another debounce window
+                        batch_started = last_event = time.monotonic()
+        finally:
+            conn.close()
+    
+    def _batch_due(self, batch_started: float, last_event: float) -> bool:
+        now = time.monotonic()
+        return now - last_event >= self.debounce_seconds or now - batch_started >= self.max_batch_seconds
+    
+    def _run_batch(self, tables: list) -> bool:
+        """Consolidate the notified sources; False means the batch should be retried"""
+        try:
+            is_leader = self.leader.try_acquire()
+        except Exception as e:
+            logger.error(f"Sync leader election failed: {str(e)}")
+            return False
+        if not is_leader:
+            # The leader process consolidates; standby workers just drain events
+            return True
+        
+        try:
+            result = sync_coordinator.run(
+                self.sync_service.push_to_document_data,
+                incremental=True,
+                sources=tables,
+                trigger="notify"
+            )
+        except Exception as e:
+            logger.error(f"Event-driven sync failed for {tables}: {str(e)}")
+            return True
+        
+        if result["joined"]:
+            # The run we joined may have started before these rows were committed
+            return False
+        
+        self.last_batch_at = datetime.now()
+        self.batches_run += 1
+        return True
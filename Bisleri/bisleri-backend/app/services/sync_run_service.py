@@ -0,0 +1,173 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from sqlalchemy import text
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+SYNC_LOG_FILE = "sync_log.txt"
+SYNC_LOG_MAX_BYTES = 5 * 1024 * 1024
+SYNC_LOG_BACKUP_COUNT = 5
+
+def get_sync_file_logger():
+    """Shared rotating file logger for sync_log.txt (keeps history across cycles)"""
+    file_logger = logging.getLogger("bisleri.sync_log")
+    if not file_logger.handlers:
+        handler = RotatingFileHandler(
+            SYNC_LOG_FILE,
+            maxBytes=SYNC_LOG_MAX_BYTES,
+            backupCount=SYNC_LOG_BACKUP_COUNT,
+            encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", "%Y-%m-%d %H:%M:%S"))
+        file_logger.addHandler(handler)
+        file_logger.setLevel(logging.INFO)
+        file_logger.propagate = False
+    return file_logger
+
+class SyncRunRecorder:
+    """Collects timings and row counts for one sync run and persists them to sync_runs.
+
+    Recording failures are logged and swallowed - history must never break a sync.
+    """
+    def __init__(self, trigger: str, mode: str = "full"):
+        self.trigger = trigger
+        self.mode = mode
+        self.run_id = None
+        self.started_at = None
+        self._start_clock = None
+        self.stage_timings = {}
+        self.source_stats = {}
+    
+    def start(self):
+        """Insert the run row in its own transaction so it is visible while running"""
+        self.started_at = datetime.now()
+        self._start_clock = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                self.run_id = conn.execute(text("""
+                    INSERT INTO sync_runs (trigger, mode, status, started_at)
+                    VALUES (:trigger, :mode, 'running', :started_at)
+                    RETURNING id
+                """), {
+                    "trigger": self.trigger,
+                    "mode": self.mode,
+                    "started_at": self.started_at
+                }).scalar()
+        except Exception as e:
+            logger.error(f"Could not record sync run start: {str(e)}")
+        return self.run_id
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Time a named stage of the run"""
+        stage_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_timings[name] = int((time.perf_counter() - stage_start) * 1000)
+    
+    def record_source(self, label: str, stats: dict):
+        """Record per-source results (duration_ms, rows_scanned, inserts, updates, unchanged, archived, error)"""
+        self.source_stats[label] = {
+            "duration_ms": stats.get('duration_ms', 0),
+            "rows_scanned": stats.get('rows_scanned', 0),
+            "inserts": stats.get('inserts', 0),
+            "updates": stats.get('updates', 0),
+            "unchanged": stats.get('unchanged', 0),
+            "archived": stats.get('archived', 0),
+            "error": stats.get('error')
+        }
+    
+    def finish(self, status: str, error: str = None):
+        """Close the run with final status, totals and timings"""
+        if self._start_clock is None:
+            return
+        
+        duration_ms = int((time.perf_counter() - self._start_clock) * 1000)
+        if status == "success" and any(s.get('error') for s in self.source_stats.values()):
+            status = "partial"
+        
+        if self.run_id is None:
+            return
+        
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("""
+                    UPDATE sync_runs SET
+                        status = :status,
+                        finished_at = :finished_at,
+                        duration_ms = :duration_ms,
+                        rows_scanned = :rows_scanned,
+                        rows_inserted = :rows_inserted,
+                        rows_updated = :rows_updated,
+                        stage_timings = CAST(:stage_timings AS JSON),
+                        source_stats = CAST(:source_stats AS JSON),
+                        error = :error
+                    WHERE id = :run_id
+                """), {
+                    "status": status,
+                    "finished_at": datetime.now(),
+                    "duration_ms": duration_ms,
+                    "rows_scanned": sum(s['rows_scanned'] for s in self.source_stats.values()),
+                    "rows_inserted": sum(s['inserts'] for s in self.source_stats.values()),
+                    "rows_updated": sum(s['updates'] for s in self.source_stats.values()),
+                    "stage_timings": json.dumps(self.stage_timings),
+                    "source_stats": json.dumps(self.source_stats),
+                    "error": error,
+                    "run_id": self.run_id
+                })
+        except Exception as e:
+            logger.error(f"Could not record sync run {self.run_id} result: {str(e)}")
+
+def serialize_sync_run(row) -> dict:
+    """Convert a sync_runs row into an API response dict"""
+    return {
+        "id": row.id,
+        "trigger": row.trigger,
+        "mode": row.mode,
+        "status": row.status,
+        "started_at": row.started_at.isoformat() if row.started_at else None,
+        "finished_at": row.finished_at.isoformat() if row.finished_at else None,
+        "duration_ms": row.duration_ms,
+        "rows_scanned": row.rows_scanned,
+        "rows_inserted": row.rows_inserted,
+        "rows_updated": row.rows_updated,
+        "stage_timings": row.stage_timings or {},
+        "source_stats": row.source_stats or {},
+        "error": row.error
+    }
+
+def get_recent_sync_runs(limit: int = 50, trigger: str = None, status: str = None):
+    """Get the most recent sync runs, newest first"""
+    conditions = []
+    params = {"limit": limit}
+    if trigger:
+        conditions.append("trigger = :trigger")
+        params["trigger"] = trigger
+    if status:
+        conditions.append("status = :status")
+        params["status"] = status
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"""
+            SELECT * FROM sync_runs
+            {where_clause}
+            ORDER BY started_at DESC
+            LIMIT :limit
+        """), params).fetchall()
+    return [serialize_sync_run(row) for row in rows]
+
+def get_sync_run(run_id: int):
+    """Get a single sync run by id"""
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT * FROM sync_runs WHERE id = :run_id"),
+            {"run_id": run_id}
+        ).fetchone()
+    return serialize_sync_run(row) if row else None
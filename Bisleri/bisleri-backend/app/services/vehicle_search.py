@@ -0,0 +1,94 @@
+import logging
+from sqlalchemy import text
+from app.config import settings
+from app.models import DocumentData, InsightsData
+from app.utils.helpers import clean_vehicle_number
+
+logger = logging.getLogger(__name__)
+
+# Tables searchable by vehicle number (each has a pg_trgm GIN index on vehicle_key)
+VEHICLE_SEARCH_TABLES = ("document_data", "insights_data")
+
+# Shortest term the trigram index can serve; shorter terms only match exactly
+MIN_FUZZY_LENGTH = 3
+
+# /search-recent-documents: documents of one vehicle from the last 18 hours, newest first
+RECENT_DOCUMENTS_SQL = text("""
+    SELECT * FROM document_data
+    WHERE vehicle_key = :vehicle_key
+    AND document_date >= (CURRENT_TIMESTAMP AT TIME ZONE 'UTC') - INTERVAL '18 hours'
+    ORDER BY document_date DESC
+""")
+
+def normalize_search_term(vehicle_no: str) -> str:
+    """Search terms are cleaned like the stored vehicle_key ("mh 12-ab" -> "MH12AB")"""
+    return clean_vehicle_number(vehicle_no)
+
+def build_vehicle_match_sql(table: str):
+    """Ranked distinct vehicle keys matching a (partial) plate
+
+    Matches substrings (LIKE) and near misses (pg_trgm word similarity above
+    the session's pg_trgm.word_similarity_threshold); both conditions are
+    answered from the trigram index. Exact matches rank first, then substring
+    matches, then by similarity.
+    """
+    if table not in VEHICLE_SEARCH_TABLES:
+        raise ValueError(f"Vehicle search not supported on {table}")
+    return text(f"""
+        SELECT
+            vehicle_key,
+            CASE WHEN vehicle_key = :term THEN 1.0
+                 ELSE word_similarity(:term, vehicle_key)
+            END AS score,
+            vehicle_key = :term AS exact,
+            vehicle_key LIKE :pattern AS substring_match
+        FROM {table}
+        WHERE vehicle_key LIKE :pattern
+        OR :term <% vehicle_key
+        GROUP BY vehicle_key
+        ORDER BY exact DESC, substring_match DESC, score DESC, vehicle_key
+        LIMIT :limit
+    """)
+
+def match_vehicle_numbers(db, table: str, vehicle_no: str, limit: int = None) -> list:
+    """Find the vehicle numbers in a table that best match what the guard typed
+
+    Returns [{"vehicle_key", "score", "exact"}] best first. Terms shorter than
+    MIN_FUZZY_LENGTH characters only match exactly (an indexed equality on vehicle_key).
+    """
+    term = normalize_search_term(vehicle_no)
+    if not term:
+        return []
+    limit = limit or settings.VEHICLE_SEARCH_MAX_MATCHES
+    
+    if len(term) < MIN_FUZZY_LENGTH:
+        found = db.execute(
+            text(f"SELECT 1 FROM {table} WHERE vehicle_key = :term LIMIT 1"), {"term": term}
+        ).scalar()
+        return [{"vehicle_key": term, "score": 1.0, "exact": True}] if found else []
+    
+    # Transaction-local, so pooled connections keep the default
+    db.execute(
+        text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+        {"threshold": str(settings.VEHICLE_SEARCH_SIMILARITY_THRESHOLD)}
+    )
+    # The cleaned term is alphanumeric, so it needs no LIKE escaping
+    rows = db.execute(build_vehicle_match_sql(table), {
+        "term": term,
+        "pattern": f"%{term}%",
+        "limit": limit
+    }).fetchall()
+    return [
+        {"vehicle_key": row.vehicle_key, "score": round(float(row.score), 3), "exact": row.exact}
+        for row in rows
+    ]
+
+def vehicle_documents_query(db, vehicle_keys: list):
+    """Documents of the matched vehicles, newest first"""
+    return db.query(DocumentData).filter(
+        DocumentData.vehicle_key.in_(vehicle_keys)
+    ).order_by(DocumentData.document_date.desc())
+
+def vehicle_movements_query(db, key: str):
+    """Movements of one matched vehicle (ordered and paged by app.utils.pagination)"""
+    return db.query(InsightsData).filter(InsightsData.vehicle_key == key)
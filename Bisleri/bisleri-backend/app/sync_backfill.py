@@ -0,0 +1,35 @@
+# Chunked, resumable backfill of document_data from the mfabric staging tables.
+# Usage: python -m app.sync_backfill [--chunk-size 5000] [--restart] [--source mfabric_invoice_data]
+import argparse
+import logging
+import sys
+from app.scheduler import sync_service
+from app.services.consolidation import SYNC_SOURCES
+from app.services.sync_coordination import sync_coordinator
+
+logging.basicConfig(level=logging.INFO)
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked, resumable document_data backfill")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="documents per committed chunk")
+    parser.add_argument("--restart", action="store_true", help="ignore checkpoints and start from the beginning")
+    parser.add_argument(
+        "--source", action="append", choices=[source['table'] for source in SYNC_SOURCES],
+        help="staging table to backfill (repeatable, default: all)"
+    )
+    args = parser.parse_args()
+
+    result = sync_coordinator.run(
+        sync_service.backfill_to_document_data,
+        chunk_size=args.chunk_size,
+        restart=args.restart,
+        sources=args.source,
+        trigger="backfill_cli"
+    )
+    for progress in sync_service.get_backfill_progress():
+        print(f"{progress['source_table']}: {progress['status']} "
+              f"({progress['documents_done']} documents, last {progress['last_document_no']})")
+    return 0 if result["success"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
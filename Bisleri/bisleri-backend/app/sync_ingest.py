@@ -0,0 +1,53 @@
+# Bulk load a CSV / NDJSON file into an mfabric staging table via COPY.
+# Usage: python -m app.sync_ingest mfabric_invoice_data invoices.csv [--format csv] [--map "Invoice No=document_no"] [--consolidate]
+import argparse
+import json
+import logging
+import sys
+from app.services.ingest_service import ingest_service, STAGING_MODELS, INGEST_FORMATS
+from app.services.sync_coordination import sync_coordinator
+
+logging.basicConfig(level=logging.INFO)
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a CSV/NDJSON file into an mfabric staging table")
+    parser.add_argument("table", choices=list(STAGING_MODELS))
+    parser.add_argument("path", help="input file, or - for stdin")
+    parser.add_argument("--format", choices=INGEST_FORMATS, help="default: from the file extension, else csv")
+    parser.add_argument(
+        "--map", action="append", default=[], metavar="FIELD=COLUMN",
+        help="rename an input field to a staging column (repeatable)"
+    )
+    parser.add_argument("--skip-invalid", action="store_true", help="skip invalid rows instead of aborting")
+    parser.add_argument("--consolidate", action="store_true", help="run an incremental sync of the table afterwards")
+    args = parser.parse_args()
+
+    data_format = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    mapping = {}
+    for item in args.map:
+        field, sep, column = item.rpartition("=")
+        if not sep or not field:
+            parser.error(f"--map expects FIELD=COLUMN, got {item!r}")
+        mapping[field] = column
+
+    stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    try:
+        result = ingest_service.ingest(
+            args.table, stream, data_format, mapping,
+            on_error="skip" if args.skip_invalid else "abort"
+        )
+    except ValueError as e:
+        print(f"Ingest rejected: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, indent=2))
+
+    if args.consolidate and result["rows_loaded"]:
+        from app.scheduler import sync_service
+        sync_result = sync_coordinator.run(
+            sync_service.push_to_document_data, incremental=True, sources=[args.table], trigger="ingest_cli"
+        )
+        return 0 if sync_result["success"] else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,8 @@
 # app/utils/helpers.py - RAW SQL IMPLEMENTATION
 import string
 import random
-from datetime import datetime
+from datetime import datetime, time
+from zoneinfo import ZoneInfo
 import psycopg2
 from app.config import settings
 
@@ -123,9 +124,34 @@ def clean_vehicle_number(vehicle_no: str) -> str:
         return ""
     
     cleaned = vehicle_no.strip().upper()
-    cleaned = ''.join(char for char in cleaned if char.isalnum())
+    cleaned = ''.join(char for char in cleaned if char.isascii() and char.isalnum())
     return cleaned
 
+# SQL twin of clean_vehicle_number, used for the vehicle_key columns ("{column}" is the vehicle_no expression)
+VEHICLE_KEY_SQL = "NULLIF(regexp_replace(UPPER({column}), '[^A-Z0-9]', '', 'g'), '')"
+
+def vehicle_key(vehicle_no: str):
+    """Canonical vehicle key stored next to vehicle_no (None when nothing is left after cleaning)"""
+    return clean_vehicle_number(vehicle_no) or None
+
+def movement_instant(moved_on, moved_time=None):
+    """Aware movement instant (insights_data.moved_at) from the naive date and time columns"""
+    if not moved_on:
+        return None
+    if isinstance(moved_on, datetime):
+        moved_on = moved_on.date()
+    return datetime.combine(moved_on, moved_time or time.min, tzinfo=ZoneInfo(settings.MOVEMENT_TIMEZONE))
+
+def movement_now():
+    """Current instant in MOVEMENT_TIMEZONE; gate writes take a movement's date, time and moved_at from it"""
+    return datetime.now(ZoneInfo(settings.MOVEMENT_TIMEZONE))
+
+def local_movement_time(instant):
+    """Inverse of movement_instant: the naive MOVEMENT_TIMEZONE date and time of an instant"""
+    if instant is None:
+        return None
+    return instant.astimezone(ZoneInfo(settings.MOVEMENT_TIMEZONE)).replace(tzinfo=None)
+
 def validate_vehicle_number(vehicle_no: str) -> bool:
     """Validate Indian vehicle number format"""
     if not vehicle_no:
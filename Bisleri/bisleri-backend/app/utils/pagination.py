@@ -0,0 +1,65 @@
+# app/utils/pagination.py - Keyset pagination for insights_data movement listings
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+from app.models import InsightsData
+
+# Newest first; id breaks ties between movements recorded at the same instant
+MOVEMENT_ORDER = (InsightsData.moved_at.desc(), InsightsData.id.desc())
+
+def encode_cursor(payload: dict) -> str:
+    """Opaque continuation token for a page boundary"""
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token: str) -> dict:
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid cursor")
+    return payload
+
+def movement_position(movement) -> list:
+    """Keyset position (moved_at, id) of a movement, JSON-serialisable"""
+    return [movement.moved_at.isoformat(), movement.id]
+
+def parse_position(position) -> tuple:
+    """Keyset position back from its cursor form; raises ValueError when malformed"""
+    try:
+        moved_at, movement_id = position
+        moved_at = datetime.fromisoformat(moved_at)
+        if moved_at.tzinfo is None:
+            raise ValueError("Invalid cursor")
+        return moved_at, int(movement_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def movement_page_query(query, after, limit: int):
+    """An InsightsData query narrowed to the page after a keyset position, in MOVEMENT_ORDER
+
+    The boundary is a row comparison on (moved_at, id), so every page is an
+    index range scan that starts where the previous one stopped - no OFFSET,
+    and the cost does not grow with depth. One row more than limit is
+    fetched to tell whether another page follows.
+    """
+    if after is not None:
+        query = query.filter(
+            tuple_(InsightsData.moved_at, InsightsData.id) < tuple_(*parse_position(after))
+        )
+    return query.order_by(*MOVEMENT_ORDER).limit(limit + 1)
+
+def fetch_movement_page(query, after, limit: int):
+    """One page of an InsightsData query (see movement_page_query)
+
+    Returns (movements, position of the last movement if more follow, else None).
+    """
+    rows = movement_page_query(query, after, limit).all()
+    if len(rows) > limit:
+        return rows[:limit], movement_position(rows[limit - 1])
+    return rows, None
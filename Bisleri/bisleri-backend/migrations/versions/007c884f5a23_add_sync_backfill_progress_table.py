@@ -0,0 +1,39 @@
+"""add sync backfill progress table
+
+Revision ID: 007c884f5a23
+Revises: bff9ca4c0204
+Create Date: 2025-08-07 15:02:33.671190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007c884f5a23'
+down_revision: Union[str, None] = 'bff9ca4c0204'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sync_backfill_progress',
+    sa.Column('source_table', sa.String(length=100), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('last_document_no', sa.String(length=255), nullable=True),
+    sa.Column('high_id', sa.Integer(), nullable=True),
+    sa.Column('documents_done', sa.Integer(), nullable=True),
+    sa.Column('rows_done', sa.Integer(), nullable=True),
+    sa.Column('chunks_done', sa.Integer(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('source_table')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sync_backfill_progress')
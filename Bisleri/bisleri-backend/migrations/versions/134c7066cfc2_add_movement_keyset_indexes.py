@@ -0,0 +1,43 @@
+"""add movement keyset indexes
+
+Revision ID: 134c7066cfc2
+Revises: 712b70143bfd
+Create Date: 2025-08-13 15:42:09.736518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '134c7066cfc2'
+down_revision: Union[str, None] = '712b70143bfd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Movement listings page by keyset on (date, time, id) newest first, so every
+    # access path ends in exactly that order and each page is one index range scan.
+
+    # /vehicle-history, vehicle status / previous KM reading
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_vehicle_key_date_time")
+    op.execute("CREATE INDEX ix_insights_data_vehicle_key_date_time ON insights_data (vehicle_key, date DESC, time DESC, id DESC)")
+    # /filtered-movements for a warehouse
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_warehouse_code_date")
+    op.execute("CREATE INDEX ix_insights_data_warehouse_code_date ON insights_data (warehouse_code, date DESC, time DESC, id DESC)")
+    # Admin (all-warehouse) listings; the btree serves the plain date windows as well.
+    # Early builds of 56672f2600e6 created a date BRIN, which cannot return rows in order
+    op.execute("DROP INDEX IF EXISTS brin_insights_data_date")
+    op.execute("CREATE INDEX ix_insights_data_date_time_id ON insights_data (date DESC, time DESC, id DESC)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_date_time_id")
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_warehouse_code_date")
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_vehicle_key_date_time")
+    op.execute("CREATE INDEX ix_insights_data_vehicle_key_date_time ON insights_data (vehicle_key, date DESC, time DESC)")
@@ -0,0 +1,56 @@
+"""add mfabric staging archive tables
+
+Revision ID: 1946cafcfac0
+Revises: 659ce1efb852
+Create Date: 2025-08-11 09:14:52.118034
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1946cafcfac0'
+down_revision: Union[str, None] = '659ce1efb852'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MFABRIC_TABLES = [
+    'mfabric_deliverychallan_data',
+    'mfabric_invoice_data',
+    'mfabric_transferorder_rgp_data',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Consolidated staging rows are moved here; same columns (ids kept, no sequence default),
+    # append-only so pages are packed full. Rows are still read back by document_no when a
+    # document gets new staging rows, so consolidation keeps aggregating its full history.
+    for table in MFABRIC_TABLES:
+        op.execute(f"""
+            CREATE TABLE {table}_archive (LIKE {table})
+            WITH (fillfactor = 100)
+        """)
+        op.execute(f"ALTER TABLE {table}_archive ADD COLUMN archived_at TIMESTAMP NOT NULL DEFAULT NOW()")
+        op.execute(f"ALTER TABLE {table}_archive ADD PRIMARY KEY (id)")
+        op.create_index(f'ix_{table}_archive_document_no', f'{table}_archive', ['document_no'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in MFABRIC_TABLES:
+        # Put archived rows back into staging so nothing is lost
+        op.execute(f"""
+            DO $$
+            DECLARE columns text;
+            BEGIN
+                SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position) INTO columns
+                FROM information_schema.columns
+                WHERE table_name = '{table}';
+                EXECUTE format('INSERT INTO {table} (%s) SELECT %s FROM {table}_archive', columns, columns);
+            END $$;
+        """)
+        op.drop_table(f'{table}_archive')
@@ -0,0 +1,42 @@
+"""add sync watermarks and mfabric document_no indexes
+
+Revision ID: 2382076f0370
+Revises: 03c919435c77
+Create Date: 2025-08-04 10:12:41.220913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2382076f0370'
+down_revision: Union[str, None] = '03c919435c77'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Per-source high-water mark for incremental consolidation
+    op.create_table('sync_watermarks',
+    sa.Column('source_table', sa.String(length=100), nullable=False),
+    sa.Column('last_id', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('source_table')
+    )
+
+    # Incremental sync re-aggregates by document_no, so staging tables need the lookup index
+    op.create_index('ix_mfabric_deliverychallan_data_document_no', 'mfabric_deliverychallan_data', ['document_no'])
+    op.create_index('ix_mfabric_invoice_data_document_no', 'mfabric_invoice_data', ['document_no'])
+    op.create_index('ix_mfabric_transferorder_rgp_data_document_no', 'mfabric_transferorder_rgp_data', ['document_no'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_mfabric_transferorder_rgp_data_document_no', table_name='mfabric_transferorder_rgp_data')
+    op.drop_index('ix_mfabric_invoice_data_document_no', table_name='mfabric_invoice_data')
+    op.drop_index('ix_mfabric_deliverychallan_data_document_no', table_name='mfabric_deliverychallan_data')
+    op.drop_table('sync_watermarks')
@@ -0,0 +1,93 @@
+"""partition document_data by document_date
+
+Revision ID: 4371f11c8633
+Revises: 007c884f5a23
+Create Date: 2025-08-08 10:41:19.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4371f11c8633'
+down_revision: Union[str, None] = '007c884f5a23'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DOCUMENT_COLUMNS = """
+    document_no, site, document_type, document_date, e_way_bill_no, transporter_name,
+    vehicle_no, irn_no, warehouse_code, warehouse_name, route_code, route_no,
+    customer_code, customer_name, direct_dispatch, total_quantity, gate_entry_no,
+    from_warehouse_code, to_warehouse_code, sub_document_type, salesman
+"""
+
+# Monthly partitions are created from the oldest document (at most 10 years back,
+# older rows go to the DEFAULT partition) up to 3 months ahead; the sync leader
+# keeps creating them ahead from then on.
+CREATE_MONTHLY_PARTITIONS = """
+    DO $$
+    DECLARE
+        month date;
+        last_month date := (date_trunc('month', CURRENT_DATE) + INTERVAL '3 months')::date;
+    BEGIN
+        SELECT GREATEST(
+            COALESCE(date_trunc('month', MIN(document_date))::date, date_trunc('month', CURRENT_DATE)::date),
+            (date_trunc('month', CURRENT_DATE) - INTERVAL '10 years')::date
+        ) INTO month
+        FROM document_data_unpartitioned;
+
+        WHILE month <= last_month LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF document_data FOR VALUES FROM (%L) TO (%L)',
+                'document_data_' || to_char(month, '"y"YYYY"m"MM'),
+                month,
+                (month + INTERVAL '1 month')::date
+            );
+            month := (month + INTERVAL '1 month')::date;
+        END LOOP;
+    END $$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE document_data RENAME TO document_data_unpartitioned")
+    op.execute("ALTER TABLE document_data_unpartitioned RENAME CONSTRAINT document_data_pkey TO document_data_unpartitioned_pkey")
+
+    # The partition key must be part of the primary key; document_no stays unique
+    # because consolidation moves a document between partitions when its date changes.
+    op.execute("""
+        CREATE TABLE document_data (LIKE document_data_unpartitioned INCLUDING DEFAULTS)
+        PARTITION BY RANGE (document_date)
+    """)
+    op.execute("ALTER TABLE document_data ALTER COLUMN document_date SET NOT NULL")
+    op.execute("ALTER TABLE document_data ADD CONSTRAINT document_data_pkey PRIMARY KEY (document_no, document_date)")
+    op.execute("CREATE TABLE document_data_default PARTITION OF document_data DEFAULT")
+    op.execute(CREATE_MONTHLY_PARTITIONS)
+
+    # Undated documents are filed under the day they were migrated (same rule as consolidation)
+    op.execute(f"""
+        INSERT INTO document_data ({DOCUMENT_COLUMNS})
+        SELECT {DOCUMENT_COLUMNS.replace('document_date,', "COALESCE(document_date, date_trunc('day', LOCALTIMESTAMP)),", 1)}
+        FROM document_data_unpartitioned
+    """)
+    op.drop_table('document_data_unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE document_data RENAME TO document_data_partitioned")
+    op.execute("ALTER TABLE document_data_partitioned RENAME CONSTRAINT document_data_pkey TO document_data_partitioned_pkey")
+    op.execute("CREATE TABLE document_data (LIKE document_data_partitioned INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE document_data ALTER COLUMN document_date DROP NOT NULL")
+    op.execute("ALTER TABLE document_data ADD CONSTRAINT document_data_pkey PRIMARY KEY (document_no)")
+    op.execute(f"""
+        INSERT INTO document_data ({DOCUMENT_COLUMNS})
+        SELECT DISTINCT ON (document_no) {DOCUMENT_COLUMNS}
+        FROM document_data_partitioned
+        ORDER BY document_no, document_date DESC
+    """)
+    op.execute("DROP TABLE document_data_partitioned CASCADE")
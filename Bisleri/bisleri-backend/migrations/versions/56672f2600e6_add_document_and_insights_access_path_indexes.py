@@ -0,0 +1,34 @@
+"""add insights gate entry index
+
+Revision ID: 56672f2600e6
+Revises: 1946cafcfac0
+Create Date: 2025-08-11 14:37:05.662190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '56672f2600e6'
+down_revision: Union[str, None] = '1946cafcfac0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # insights_data is partitioned, so the index is created on every partition
+    # (and automatically on partitions created later). The vehicle and date
+    # access paths get their indexes with the columns they key on (vehicle_key,
+    # moved_at) in 712b70143bfd, 134c7066cfc2 and 5866f6fab835.
+
+    # /update-operational-data, /km-reading-context
+    op.execute("CREATE INDEX ix_insights_data_gate_entry_no ON insights_data (gate_entry_no)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_gate_entry_no")
@@ -0,0 +1,46 @@
+"""add insights_data moved_at
+
+Revision ID: 5866f6fab835
+Revises: 134c7066cfc2
+Create Date: 2025-08-14 11:08:52.304917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5866f6fab835'
+down_revision: Union[str, None] = '134c7066cfc2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # moved_at = date + time (naive, recorded in MOVEMENT_TIMEZONE) as one timestamptz.
+    # Nullable without a default, so adding it does not rewrite the table; existing
+    # rows are filled (and the column made NOT NULL) by revision ab5f49e72374.
+    op.add_column('insights_data', sa.Column('moved_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Newest-first listings and latest-movement lookups order by (moved_at, id) instead of (date, time, id)
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_vehicle_key_date_time")
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_warehouse_code_date")
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_date_time_id")
+    op.execute("CREATE INDEX ix_insights_data_vehicle_key_moved_at ON insights_data (vehicle_key, moved_at DESC, id DESC)")
+    op.execute("CREATE INDEX ix_insights_data_warehouse_code_moved_at ON insights_data (warehouse_code, moved_at DESC, id DESC)")
+    op.execute("CREATE INDEX ix_insights_data_moved_at ON insights_data (moved_at DESC, id DESC)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_moved_at")
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_warehouse_code_moved_at")
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_vehicle_key_moved_at")
+    op.execute("CREATE INDEX ix_insights_data_date_time_id ON insights_data (date DESC, time DESC, id DESC)")
+    op.execute("CREATE INDEX ix_insights_data_warehouse_code_date ON insights_data (warehouse_code, date DESC, time DESC, id DESC)")
+    op.execute("CREATE INDEX ix_insights_data_vehicle_key_date_time ON insights_data (vehicle_key, date DESC, time DESC, id DESC)")
+
+    op.drop_column('insights_data', 'moved_at')
@@ -0,0 +1,96 @@
+"""partition insights_data by month
+
+Revision ID: 659ce1efb852
+Revises: 4371f11c8633
+Create Date: 2025-08-08 16:22:47.530981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '659ce1efb852'
+down_revision: Union[str, None] = '4371f11c8633'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INSIGHTS_COLUMNS = """
+    id, gate_entry_no, document_type, sub_document_type, vehicle_no, warehouse_name,
+    date, time, movement_type, remarks, warehouse_code, site_code, security_name,
+    security_username, document_date, driver_name, km_reading, loader_names,
+    last_edited_at, edit_count
+"""
+
+# Monthly partitions from the oldest movement (at most 10 years back, older rows
+# go to the DEFAULT partition) up to 3 months ahead; the sync leader keeps
+# creating them ahead from then on.
+CREATE_MONTHLY_PARTITIONS = """
+    DO $$
+    DECLARE
+        month date;
+        last_month date := (date_trunc('month', CURRENT_DATE) + INTERVAL '3 months')::date;
+    BEGIN
+        SELECT GREATEST(
+            COALESCE(date_trunc('month', MIN(date))::date, date_trunc('month', CURRENT_DATE)::date),
+            (date_trunc('month', CURRENT_DATE) - INTERVAL '10 years')::date
+        ) INTO month
+        FROM insights_data_unpartitioned;
+
+        WHILE month <= last_month LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF insights_data FOR VALUES FROM (%L) TO (%L)',
+                'insights_data_' || to_char(month, '"y"YYYY"m"MM'),
+                month,
+                (month + INTERVAL '1 month')::date
+            );
+            month := (month + INTERVAL '1 month')::date;
+        END LOOP;
+    END $$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE insights_data RENAME TO insights_data_unpartitioned")
+    op.execute("ALTER TABLE insights_data_unpartitioned RENAME CONSTRAINT insights_data_pkey TO insights_data_unpartitioned_pkey")
+    # Keep the id sequence when the old table is dropped
+    op.execute("ALTER SEQUENCE insights_data_id_seq OWNED BY NONE")
+
+    # Partitioned by movement date; the partition key must be part of the primary key
+    op.execute("""
+        CREATE TABLE insights_data (LIKE insights_data_unpartitioned INCLUDING DEFAULTS)
+        PARTITION BY RANGE (date)
+    """)
+    op.execute("ALTER TABLE insights_data ALTER COLUMN date SET NOT NULL")
+    op.execute("ALTER TABLE insights_data ADD CONSTRAINT insights_data_pkey PRIMARY KEY (id, date)")
+    op.execute("ALTER SEQUENCE insights_data_id_seq OWNED BY insights_data.id")
+    op.execute("CREATE TABLE insights_data_default PARTITION OF insights_data DEFAULT")
+    op.execute(CREATE_MONTHLY_PARTITIONS)
+
+    # Movements without a date never matched any date window; keep them under their edit time (or today)
+    op.execute(f"""
+        INSERT INTO insights_data ({INSIGHTS_COLUMNS})
+        SELECT {INSIGHTS_COLUMNS.replace('date,', "COALESCE(date, date_trunc('day', last_edited_at), date_trunc('day', LOCALTIMESTAMP)),", 1)}
+        FROM insights_data_unpartitioned
+    """)
+    op.drop_table('insights_data_unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE insights_data RENAME TO insights_data_partitioned")
+    op.execute("ALTER TABLE insights_data_partitioned RENAME CONSTRAINT insights_data_pkey TO insights_data_partitioned_pkey")
+    op.execute("ALTER SEQUENCE insights_data_id_seq OWNED BY NONE")
+    op.execute("CREATE TABLE insights_data (LIKE insights_data_partitioned INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE insights_data ALTER COLUMN date DROP NOT NULL")
+    op.execute("ALTER TABLE insights_data ADD CONSTRAINT insights_data_pkey PRIMARY KEY (id)")
+    op.execute("ALTER SEQUENCE insights_data_id_seq OWNED BY insights_data.id")
+    op.execute(f"""
+        INSERT INTO insights_data ({INSIGHTS_COLUMNS})
+        SELECT {INSIGHTS_COLUMNS}
+        FROM insights_data_partitioned
+    """)
+    op.execute("DROP TABLE insights_data_partitioned")
@@ -0,0 +1,52 @@
+"""add vehicle key columns
+
+Revision ID: 712b70143bfd
+Revises: c1f26b99c0af
+Create Date: 2025-08-13 09:21:44.180352
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '712b70143bfd'
+down_revision: Union[str, None] = 'c1f26b99c0af'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # vehicle_key = clean_vehicle_number(vehicle_no): upper case, alphanumerics only.
+    # Nullable without a default, so adding it does not rewrite the tables; existing
+    # rows are filled by revision 9a4b933d54be.
+    op.add_column('document_data', sa.Column('vehicle_key', sa.String(length=100), nullable=True))
+    op.add_column('insights_data', sa.Column('vehicle_key', sa.String(length=50), nullable=True))
+
+    # Vehicle lookups now match on vehicle_key, so the vehicle_no indexes move over
+    op.execute("DROP INDEX IF EXISTS ix_document_data_vehicle_no_document_date")
+    op.execute("DROP INDEX IF EXISTS ix_document_data_vehicle_no_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_vehicle_no_date_time")
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_vehicle_no_trgm")
+
+    op.execute("CREATE INDEX ix_document_data_vehicle_key_document_date ON document_data (vehicle_key, document_date DESC)")
+    op.execute("CREATE INDEX ix_document_data_vehicle_key_trgm ON document_data USING gin (vehicle_key gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_insights_data_vehicle_key_date_time ON insights_data (vehicle_key, date DESC, time DESC)")
+    op.execute("CREATE INDEX ix_insights_data_vehicle_key_trgm ON insights_data USING gin (vehicle_key gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_vehicle_key_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_vehicle_key_date_time")
+    op.execute("DROP INDEX IF EXISTS ix_document_data_vehicle_key_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_document_data_vehicle_key_document_date")
+
+    op.execute("CREATE INDEX ix_insights_data_vehicle_no_trgm ON insights_data USING gin (vehicle_no gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_document_data_vehicle_no_trgm ON document_data USING gin (vehicle_no gin_trgm_ops)")
+
+    op.drop_column('insights_data', 'vehicle_key')
+    op.drop_column('document_data', 'vehicle_key')
@@ -0,0 +1,59 @@
+"""unique document_no per partition
+
+Revision ID: 8eca155a1b88
+Revises: 8fe80877694f
+Create Date: 2025-08-18 18:03:27.615094
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8eca155a1b88'
+down_revision: Union[str, None] = '8fe80877694f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Every partition attached to document_data, the DEFAULT one included
+PARTITIONS = """
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.relname = 'document_data'
+    ORDER BY child.relname
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The primary key is (document_no, document_date) because document_date is the
+    # partition key, so it no longer keeps document_no unique on its own. Drop any
+    # document stored twice (keeping its newest document_date, as consolidation
+    # does), then enforce the invariant within each partition; partition_service
+    # creates the same index on every new partition.
+    op.execute("""
+        DELETE FROM document_data d
+        USING (
+            SELECT document_no, MAX(document_date) AS document_date
+            FROM document_data
+            GROUP BY document_no
+            HAVING COUNT(*) > 1
+        ) newest
+        WHERE d.document_no = newest.document_no
+        AND d.document_date < newest.document_date
+    """)
+
+    bind = op.get_bind()
+    for (partition,) in bind.execute(sa.text(PARTITIONS)).fetchall():
+        op.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {partition}_document_no_key ON {partition} (document_no)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    for (partition,) in bind.execute(sa.text(PARTITIONS)).fetchall():
+        op.execute(f"DROP INDEX IF EXISTS {partition}_document_no_key")
@@ -0,0 +1,31 @@
+"""add idempotency_keys claimed_at
+
+Revision ID: 8fe80877694f
+Revises: 9a4b933d54be
+Create Date: 2025-08-18 17:22:10.538914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8fe80877694f'
+down_revision: Union[str, None] = '9a4b933d54be'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Processing lease: a key still 'processing' after IDEMPOTENCY_PROCESSING_LEASE_SECONDS
+    # belongs to a request that died before committing, and a retry may claim it again
+    op.add_column('idempotency_keys', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE idempotency_keys SET claimed_at = created_at")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('idempotency_keys', 'claimed_at')
@@ -0,0 +1,71 @@
+"""backfill vehicle_key columns
+
+Revision ID: 9a4b933d54be
+Revises: ab5f49e72374
+Create Date: 2025-08-18 16:05:48.270631
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4b933d54be'
+down_revision: Union[str, None] = 'ab5f49e72374'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+# clean_vehicle_number(vehicle_no): upper case, alphanumerics only, NULL when nothing is left
+VEHICLE_KEY = "NULLIF(regexp_replace(UPPER(vehicle_no), '[^A-Z0-9]', '', 'g'), '')"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Vehicle lookups match on vehicle_key only, so rows written before the column
+    # existed would never be found. Fill them here; new writes maintain it themselves.
+    bind = op.get_bind()
+
+    # Keyset batches, each committed on its own so the tables are never locked as a whole
+    with op.get_context().autocommit_block():
+        after = ""
+        while True:
+            upper = bind.execute(sa.text("""
+                SELECT MAX(document_no) FROM (
+                    SELECT document_no FROM document_data
+                    WHERE document_no > :after
+                    ORDER BY document_no
+                    LIMIT :batch_size
+                ) batch
+            """), {"after": after, "batch_size": BATCH_SIZE}).scalar()
+            if upper is None:
+                break
+            bind.execute(sa.text(f"""
+                UPDATE document_data
+                SET vehicle_key = {VEHICLE_KEY}
+                WHERE document_no > :after AND document_no <= :upper
+                AND vehicle_key IS DISTINCT FROM {VEHICLE_KEY}
+            """), {"after": after, "upper": upper})
+            after = upper
+
+        max_id = bind.execute(sa.text("SELECT COALESCE(MAX(id), 0) FROM insights_data")).scalar()
+        for low_id in range(0, max_id, BATCH_SIZE):
+            bind.execute(sa.text(f"""
+                UPDATE insights_data
+                SET vehicle_key = {VEHICLE_KEY}
+                WHERE id > :low_id AND id <= :high_id
+                AND vehicle_key IS DISTINCT FROM {VEHICLE_KEY}
+            """), {"low_id": low_id, "high_id": low_id + BATCH_SIZE})
+
+    # Rows written by writers that predate vehicle_key while the batches ran
+    for table in ('document_data', 'insights_data'):
+        op.execute(f"UPDATE {table} SET vehicle_key = {VEHICLE_KEY} WHERE vehicle_key IS DISTINCT FROM {VEHICLE_KEY}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Data-only revision: the columns stay filled
+    pass
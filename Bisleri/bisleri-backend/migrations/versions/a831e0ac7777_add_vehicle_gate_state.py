@@ -0,0 +1,59 @@
+"""add vehicle gate state
+
+Revision ID: a831e0ac7777
+Revises: 0b3e446ec041
+Create Date: 2025-08-15 16:41:09.127734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a831e0ac7777'
+down_revision: Union[str, None] = '0b3e446ec041'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('vehicle_gate_state',
+    sa.Column('vehicle_key', sa.String(length=50), nullable=False),
+    sa.Column('vehicle_no', sa.String(length=50), nullable=True),
+    sa.Column('movement_type', sa.String(length=20), nullable=True),
+    sa.Column('gate_entry_no', sa.String(length=50), nullable=True),
+    sa.Column('warehouse_code', sa.String(length=50), nullable=True),
+    sa.Column('moved_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('vehicle_key')
+    )
+
+    # Seed each vehicle's latest movement. vehicle_key / moved_at are derived
+    # here for rows the column backfills have not reached yet. Run while gate
+    # writes are stopped, or movements written meanwhile are missed.
+    op.execute("""
+        INSERT INTO vehicle_gate_state (
+            vehicle_key, vehicle_no, movement_type, gate_entry_no,
+            warehouse_code, moved_at, updated_at
+        )
+        SELECT DISTINCT ON (movement_key)
+            movement_key, vehicle_no, movement_type, gate_entry_no,
+            warehouse_code, movement_instant, NOW()
+        FROM (
+            SELECT
+                COALESCE(vehicle_key, NULLIF(regexp_replace(UPPER(vehicle_no), '[^A-Z0-9]', '', 'g'), '')) AS movement_key,
+                COALESCE(moved_at, (date::date + COALESCE(time, TIME '00:00')) AT TIME ZONE 'Asia/Kolkata') AS movement_instant,
+                id, vehicle_no, movement_type, gate_entry_no, warehouse_code
+            FROM insights_data
+        ) movements
+        WHERE movement_key IS NOT NULL
+        ORDER BY movement_key, movement_instant DESC, id DESC
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('vehicle_gate_state')
@@ -0,0 +1,51 @@
+"""backfill insights_data moved_at
+
+Revision ID: ab5f49e72374
+Revises: e97437931327
+Create Date: 2025-08-18 14:40:06.913552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ab5f49e72374'
+down_revision: Union[str, None] = 'e97437931327'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+# date + time (naive, recorded in MOVEMENT_TIMEZONE) as one instant
+MOVED_AT = "(date::date + COALESCE(time, TIME '00:00')) AT TIME ZONE 'Asia/Kolkata'"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Listings page on (moved_at, id) and the edit rules compare moved_at, so rows
+    # still without one would break pagination or drop out of them. Fill every row
+    # (date is part of the primary key, so each one has an instant) and require it.
+    bind = op.get_bind()
+
+    # Id ranges, each committed on its own so the table is never locked as a whole
+    with op.get_context().autocommit_block():
+        max_id = bind.execute(sa.text("SELECT COALESCE(MAX(id), 0) FROM insights_data")).scalar()
+        for low_id in range(0, max_id, BATCH_SIZE):
+            bind.execute(sa.text(f"""
+                UPDATE insights_data
+                SET moved_at = {MOVED_AT}
+                WHERE id > :low_id AND id <= :high_id
+                AND moved_at IS NULL
+            """), {"low_id": low_id, "high_id": low_id + BATCH_SIZE})
+
+    # Rows written while the batches ran, then the constraint in the same transaction
+    op.execute(f"UPDATE insights_data SET moved_at = {MOVED_AT} WHERE moved_at IS NULL")
+    op.alter_column('insights_data', 'moved_at', existing_type=sa.DateTime(timezone=True), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('insights_data', 'moved_at', existing_type=sa.DateTime(timezone=True), nullable=True)
@@ -0,0 +1,46 @@
+"""add sync runs table
+
+Revision ID: bcf33c2f65af
+Revises: 2382076f0370
+Create Date: 2025-08-05 09:41:17.503228
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bcf33c2f65af'
+down_revision: Union[str, None] = '2382076f0370'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sync_runs',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('trigger', sa.String(length=50), nullable=True),
+    sa.Column('mode', sa.String(length=20), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('duration_ms', sa.Integer(), nullable=True),
+    sa.Column('rows_scanned', sa.Integer(), nullable=True),
+    sa.Column('rows_inserted', sa.Integer(), nullable=True),
+    sa.Column('rows_updated', sa.Integer(), nullable=True),
+    sa.Column('stage_timings', sa.JSON(), nullable=True),
+    sa.Column('source_stats', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Run history is always read newest first
+    op.create_index('ix_sync_runs_started_at', 'sync_runs', ['started_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sync_runs_started_at', table_name='sync_runs')
+    op.drop_table('sync_runs')
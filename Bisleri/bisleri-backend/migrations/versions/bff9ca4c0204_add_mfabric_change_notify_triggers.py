@@ -0,0 +1,51 @@
+"""add mfabric change notify triggers
+
+Revision ID: bff9ca4c0204
+Revises: bcf33c2f65af
+Create Date: 2025-08-06 11:27:05.814406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bff9ca4c0204'
+down_revision: Union[str, None] = 'bcf33c2f65af'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MFABRIC_TABLES = [
+    'mfabric_deliverychallan_data',
+    'mfabric_invoice_data',
+    'mfabric_transferorder_rgp_data',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # One notification per INSERT statement (not per row), payload = table name.
+    # NOTIFY also collapses duplicate payloads within a transaction, so bulk loads stay cheap.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_mfabric_change() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('mfabric_changes', TG_TABLE_NAME);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    for table in MFABRIC_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_notify
+            AFTER INSERT ON {table}
+            FOR EACH STATEMENT EXECUTE PROCEDURE notify_mfabric_change();
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in MFABRIC_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_notify ON {table};")
+    op.execute("DROP FUNCTION IF EXISTS notify_mfabric_change();")
@@ -0,0 +1,32 @@
+"""add trigram vehicle search indexes
+
+Revision ID: c1f26b99c0af
+Revises: 56672f2600e6
+Create Date: 2025-08-12 10:05:38.417263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1f26b99c0af'
+down_revision: Union[str, None] = '56672f2600e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Substring (ILIKE '%..%') and similarity vehicle search
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE INDEX ix_document_data_vehicle_no_trgm ON document_data USING gin (vehicle_no gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_insights_data_vehicle_no_trgm ON insights_data USING gin (vehicle_no gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_insights_data_vehicle_no_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_document_data_vehicle_no_trgm")
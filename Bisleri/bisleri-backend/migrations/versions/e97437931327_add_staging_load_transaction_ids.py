@@ -0,0 +1,52 @@
+"""add staging load transaction ids
+
+Revision ID: e97437931327
+Revises: 1ce5abd15c7d
+Create Date: 2025-08-18 10:12:31.448207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e97437931327'
+down_revision: Union[str, None] = '1ce5abd15c7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MFABRIC_TABLES = [
+    'mfabric_deliverychallan_data',
+    'mfabric_invoice_data',
+    'mfabric_transferorder_rgp_data',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Staging ids are taken when a row is inserted, not when it commits, so a long load can
+    # commit ids below a MAX(id) watermark that has already moved past them. Every new
+    # staging row records the transaction that loaded it instead, and the sync watermark
+    # only advances past transactions that have finished.
+    for table in MFABRIC_TABLES:
+        # Added without a default first so existing rows stay NULL (loaded before this
+        # revision, all committed) and the table is not rewritten
+        op.add_column(table, sa.Column('load_xact_id', sa.BigInteger(), nullable=True))
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN load_xact_id SET DEFAULT (pg_current_xact_id()::text::bigint)")
+        op.create_index(f'ix_{table}_load_xact_id', table, ['load_xact_id'], unique=False)
+        op.add_column(f'{table}_archive', sa.Column('load_xact_id', sa.BigInteger(), nullable=True))
+
+    op.add_column('sync_watermarks', sa.Column('last_xact_id', sa.BigInteger(), nullable=True))
+    op.add_column('sync_backfill_progress', sa.Column('high_xact_id', sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('sync_backfill_progress', 'high_xact_id')
+    op.drop_column('sync_watermarks', 'last_xact_id')
+    for table in MFABRIC_TABLES:
+        op.drop_column(f'{table}_archive', 'load_xact_id')
+        op.drop_index(f'ix_{table}_load_xact_id', table_name=table)
+        op.drop_column(table, 'load_xact_id')
@@ -0,0 +1,133 @@
+# test_consolidation.py
+# Consolidation invariant checks: document_data is keyed on (document_no,
+# document_date) so it can be partitioned by date, yet every document_no must
+# stay in exactly one row. Seeds staging (and document_data) rows inside a
+# transaction that is rolled back at the end, consolidates them with the same
+# statements the sync runs and fails if any document_no is left in two rows.
+# Run against a development/test database: python test_consolidation.py
+import os
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+# Add the app directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from app.database import engine
+    from app.services.consolidation import (
+        SYNC_SOURCES, DuplicateDocumentError, check_unique_documents, run_consolidation
+    )
+    print("✅ Successfully imported app modules")
+except ImportError as e:
+    print(f"❌ Import error: {e}")
+    print("Make sure you're running this from the project root directory")
+    sys.exit(1)
+
+PREFIX = "UNIQTEST"
+SELECTIONS = [(source, f"WHERE document_no LIKE '{PREFIX}%'") for source in SYNC_SOURCES]
+
+# Dates in the current and next monthly partitions (both always exist), plus a
+# second one in the current month. document_data.document_date is a naive
+# timestamp; the test session runs in UTC.
+EARLIER = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+SAME_MONTH = EARLIER.replace(day=10)
+LATER = (EARLIER + timedelta(days=32)).replace(day=15)
+
+def stage(conn, table, document_no, document_date):
+    conn.execute(text(f"""
+        INSERT INTO {table} (document_type, document_no, document_date, vehicle_no, site, total_quantity)
+        VALUES ('Invoice', :document_no, :document_date, 'UT 01 AB 1234', 'UTSITE', 1)
+    """), {"document_no": document_no, "document_date": document_date})
+
+def consolidate(conn):
+    run_consolidation(conn, SELECTIONS)
+    check_unique_documents(conn, SELECTIONS)
+
+def stored_rows(conn):
+    """document_no -> stored document_dates of the test documents"""
+    rows = conn.execute(text("""
+        SELECT document_no, array_agg(document_date ORDER BY document_date) AS dates
+        FROM document_data
+        WHERE document_no LIKE :prefix
+        GROUP BY document_no
+    """), {"prefix": f"{PREFIX}%"}).fetchall()
+    return {row.document_no: row.dates for row in rows}
+
+def check(name, rows, expected_documents):
+    """Return a list of problems: duplicated or missing test documents"""
+    problems = [f"{document_no} stored {len(dates)} times" for document_no, dates in rows.items() if len(dates) > 1]
+    missing = set(expected_documents) - set(rows)
+    if missing:
+        problems.append(f"missing {', '.join(sorted(missing))}")
+    print(f"  {'❌' if problems else '✅'} {name}{': ' + '; '.join(problems) if problems else ''}")
+    return problems
+
+def test_document_no_stays_unique():
+    """Consolidate date changes, multi-source documents and an existing duplicate"""
+    print("\n🔍 Checking document_no uniqueness after consolidation...")
+    deliverychallan, invoice = SYNC_SOURCES[0]["table"], SYNC_SOURCES[1]["table"]
+    documents = [f"{PREFIX}1", f"{PREFIX}2", f"{PREFIX}3", f"{PREFIX}4", f"{PREFIX}5"]
+    failures = []
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            conn.execute(text("SET LOCAL TIME ZONE 'UTC'"))
+            stage(conn, deliverychallan, f"{PREFIX}1", EARLIER)
+            stage(conn, deliverychallan, f"{PREFIX}5", EARLIER)
+            # Staged by two sources under different dates: the later source's date wins
+            stage(conn, deliverychallan, f"{PREFIX}2", EARLIER)
+            stage(conn, invoice, f"{PREFIX}2", LATER)
+            # Undated: filed under the day it is first consolidated, and kept there
+            stage(conn, deliverychallan, f"{PREFIX}3", None)
+            # Already stored twice (before the per-partition unique index existed)
+            stage(conn, invoice, f"{PREFIX}4", LATER)
+            conn.execute(text("""
+                INSERT INTO document_data (document_no, site, document_type, document_date)
+                VALUES (:document_no, 'UTSITE', 'Invoice', :earlier), (:document_no, 'UTSITE', 'Invoice', :later)
+            """), {"document_no": f"{PREFIX}4", "earlier": EARLIER, "later": LATER})
+
+            try:
+                check_unique_documents(conn, SELECTIONS)
+                failures.append("duplicate check missed a document stored twice")
+                print("  ❌ duplicate check missed a document stored twice")
+            except DuplicateDocumentError:
+                print("  ✅ duplicate check reports a document stored twice")
+
+            consolidate(conn)
+            failures += check("first consolidation", stored_rows(conn), documents)
+
+            # One document moves to another month's partition, the other stays in its partition
+            stage(conn, invoice, f"{PREFIX}1", LATER)
+            stage(conn, invoice, f"{PREFIX}5", SAME_MONTH)
+            consolidate(conn)
+            rows = stored_rows(conn)
+            failures += check("document_date changed", rows, documents)
+            for document_no, expected in ((f"{PREFIX}1", LATER), (f"{PREFIX}5", SAME_MONTH)):
+                if rows.get(document_no) != [expected]:
+                    failures.append(f"{document_no} not moved to its new date")
+                    print(f"  ❌ {document_no} stored under {rows.get(document_no)}, expected {expected:%Y-%m-%d}")
+
+            consolidate(conn)
+            failures += check("consolidated again (no changes)", stored_rows(conn), documents)
+        except DuplicateDocumentError as e:
+            failures.append(str(e))
+            print(f"  ❌ {e}")
+        finally:
+            transaction.rollback()
+    return not failures
+
+def main():
+    print("🚀 Consolidation invariant checks")
+    print("=" * 50)
+    try:
+        passed = test_document_no_stays_unique()
+    except Exception as e:
+        print(f"  ❌ Test failed with exception: {e}")
+        passed = False
+    print("\n" + "=" * 50)
+    print("✅ Every document_no is stored once" if passed else "⚠️  Consolidation left duplicate documents")
+    sys.exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# test_query_plans.py
+# Query-plan regression checks for the hot document_data / insights_data paths.
+# Seeds synthetic rows inside a transaction that is rolled back at the end, runs
+# EXPLAIN for the queries the routers issue (built by the same functions the
+# routers call, never copied SQL) and fails if one of them falls back
+# to a sequential scan (or scans more date partitions than its window needs).
+# Run against a development/test database: python test_query_plans.py
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Add the app directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from app.database import engine
+    from app.models import InsightsData
+    from app.services.vehicle_search import (
+        RECENT_DOCUMENTS_SQL, build_vehicle_match_sql, vehicle_documents_query, vehicle_movements_query
+    )
+    from app.services.movement_filters import ACCESS_PATHS, build_movement_sql
+    from app.services.edit_statistics import (
+        build_edit_statistics_sql, build_records_needing_completion_sql,
+        gate_entry_movement_query, previous_km_reading_query
+    )
+    from app.services.bulk_gate_entry import documents_query
+    from app.utils.pagination import movement_page_query, movement_position
+    print("✅ Successfully imported app modules")
+except ImportError as e:
+    print(f"❌ Import error: {e}")
+    print("Make sure you're running this from the project root directory")
+    sys.exit(1)
+
+SEED_ROWS = 50000
+HOT_TABLES = ("document_data", "insights_data")
+
+now = datetime.now()
+now_utc = datetime.now(timezone.utc)
+VEHICLE = "PT00000042"
+WAREHOUSE = "PTW7"
+
+# Queries are only built here, never run through it
+session = Session()
+
+# A movement of VEHICLE, as the record /km-reading-context starts from
+RECORD = InsightsData(id=25000, vehicle_no=VEHICLE, date=now - timedelta(days=1), time=now.time())
+
+# (name, SQL text or SQLAlchemy statement the router runs, params of SQL text,
+#  max partitions of one hot table the plan may touch)
+HOT_PATHS = [
+    (
+        "search-recent-documents (vehicle + 18h window)",
+        RECENT_DOCUMENTS_SQL.text,
+        {"vehicle_key": VEHICLE},
+        2,
+    ),
+    (
+        "batch gate entry (documents by document_no)",
+        documents_query(session, ["PLANTEST42", "PLANTEST43"]).statement,
+        None,
+        None,
+    ),
+    (
+        "documents (matched vehicles)",
+        vehicle_documents_query(session, [VEHICLE]).statement,
+        None,
+        None,
+    ),
+    (
+        "update-operational-data / km-reading-context (by gate_entry_no)",
+        gate_entry_movement_query(session, "PTGE42").limit(1).statement,
+        None,
+        None,
+    ),
+    (
+        "km-reading-context (previous reading of vehicle)",
+        previous_km_reading_query(session, RECORD).limit(1).statement,
+        None,
+        None,
+    ),
+    (
+        "documents (fuzzy vehicle match)",
+        build_vehicle_match_sql("document_data").text,
+        {"term": "00042", "pattern": "%00042%", "limit": 10},
+        None,
+    ),
+    (
+        "vehicle-history (fuzzy vehicle match)",
+        build_vehicle_match_sql("insights_data").text,
+        {"term": "00042", "pattern": "%00042%", "limit": 10},
+        None,
+    ),
+    (
+        "vehicle-history (one vehicle, first page)",
+        movement_page_query(vehicle_movements_query(session, VEHICLE), None, 50).statement,
+        None,
+        None,
+    ),
+    (
+        "vehicle-history (one vehicle, next keyset page)",
+        movement_page_query(vehicle_movements_query(session, VEHICLE), movement_position(RECORD), 50).statement,
+        None,
+        None,
+    ),
+]
+
+# Every statement /filtered-movements can compile to, with all optional filters switched off
+MOVEMENT_FILTER_PARAMS = {
+    "vehicle_pattern": "%00042%", "warehouse_code": WAREHOUSE,
+    "from_date": now - timedelta(days=10), "to_date": now + timedelta(days=1),
+    "site_code": None, "movement_type": None, "document_type": None,
+    "sub_document_type": None, "completion_status": None, "limit": 501,
+    "from_instant": now_utc - timedelta(days=10), "to_instant": now_utc + timedelta(days=1),
+    "after_moved_at": now_utc - timedelta(days=5), "after_id": 25000,
+}
+for path in ACCESS_PATHS:
+    for paged in (False, True):
+        name, sql = build_movement_sql(path, paged)
+        HOT_PATHS.append((f"filtered-movements ({name})", sql, MOVEMENT_FILTER_PARAMS, None if path == "vehicle" else 2))
+
+# /edit-statistics and /records-needing-completion for one warehouse
+EDIT_RULE_PARAMS = {
+    "now": now_utc, "warehouse_code": WAREHOUSE,
+    "since": now - timedelta(days=30), "since_day": now - timedelta(days=1),
+    "today": now.replace(hour=0, minute=0, second=0, microsecond=0),
+    "tomorrow": now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1),
+}
+HOT_PATHS.append(("edit-statistics (warehouse, 30 days)", build_edit_statistics_sql(True).text, EDIT_RULE_PARAMS, None))
+HOT_PATHS.append(("records-needing-completion (warehouse, edit window)", build_records_needing_completion_sql(True).text, EDIT_RULE_PARAMS, 2))
+
+def seed_data(conn):
+    """Insert synthetic documents and movements spread over the last 90 days"""
+    conn.execute(text("""
+        INSERT INTO document_data (document_no, site, document_type, document_date, vehicle_no, vehicle_key, gate_entry_no, total_quantity)
+        SELECT 'PLANTEST' || n, 'PTSITE', 'Invoice',
+               LOCALTIMESTAMP - (n % 2160) * INTERVAL '1 hour',
+               'PT ' || lpad((n % 500)::text, 8, '0'),
+               'PT' || lpad((n % 500)::text, 8, '0'),
+               CASE WHEN n % 3 = 0 THEN 'PTGE' || n END,
+               '1'
+        FROM generate_series(1, :rows) n
+    """), {"rows": SEED_ROWS})
+    conn.execute(text("""
+        INSERT INTO insights_data (gate_entry_no, vehicle_no, vehicle_key, date, time, moved_at, movement_type, warehouse_code, km_reading, edit_count)
+        SELECT 'PTGE' || n,
+               'PT-' || lpad((n % 500)::text, 8, '0'),
+               'PT' || lpad((n % 500)::text, 8, '0'),
+               date_trunc('day', LOCALTIMESTAMP - (n % 90) * INTERVAL '1 day'),
+               make_time(n % 24, n % 60, 0),
+               date_trunc('day', LOCALTIMESTAMP - (n % 90) * INTERVAL '1 day') + make_time(n % 24, n % 60, 0),
+               CASE WHEN n % 2 = 0 THEN 'Gate-In' ELSE 'Gate-Out' END,
+               'PTW' || (n % 20),
+               (n % 100000)::text,
+               0
+        FROM generate_series(1, :rows) n
+    """), {"rows": SEED_ROWS})
+    conn.execute(text("ANALYZE document_data"))
+    conn.execute(text("ANALYZE insights_data"))
+
+def plan_nodes(plan):
+    """Yield every node of an EXPLAIN (FORMAT JSON) plan tree"""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+def explain(conn, sql, params):
+    """EXPLAIN (FORMAT JSON) of SQL text with its params, or of a SQLAlchemy statement"""
+    if isinstance(sql, str):
+        return conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+    compiled = sql.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    return conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+
+def check_plan(conn, name, sql, params, max_partitions):
+    """Return a list of problems found in the plan of one query"""
+    plan = explain(conn, sql, params)[0]["Plan"]
+    problems = []
+    partitions = {table: set() for table in HOT_TABLES}
+    for node in plan_nodes(plan):
+        relation = node.get("Relation Name", "")
+        table = next((t for t in HOT_TABLES if relation.startswith(t)), None)
+        if not table:
+            continue
+        partitions[table].add(relation)
+        if node["Node Type"] == "Seq Scan":
+            problems.append(f"sequential scan on {relation}")
+    if max_partitions is not None:
+        for table, scanned in partitions.items():
+            if len(scanned) > max_partitions:
+                problems.append(f"{len(scanned)} {table} partitions scanned (expected <= {max_partitions})")
+    return problems
+
+def test_query_plans():
+    """EXPLAIN every hot path on seeded data; seq scans are disabled so any Seq Scan means no usable index"""
+    print("\n🔍 Checking query plans...")
+    failures = 0
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            seed_data(conn)
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+            for name, sql, params, max_partitions in HOT_PATHS:
+                problems = check_plan(conn, name, sql, params, max_partitions)
+                if problems:
+                    failures += 1
+                    print(f"  ❌ {name}: {'; '.join(problems)}")
+                else:
+                    print(f"  ✅ {name}")
+        finally:
+            transaction.rollback()
+    return failures == 0
+
+def main():
+    print("🚀 Query plan regression checks")
+    print("=" * 50)
+    try:
+        passed = test_query_plans()
+    except Exception as e:
+        print(f"  ❌ Test failed with exception: {e}")
+        passed = False
+    print("\n" + "=" * 50)
+    print("✅ All hot paths use indexes" if passed else "⚠️  Hot path plan regressions found")
+    sys.exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
@@ -55,6 +55,30 @@ api.interceptors.response.use(
   }
 );
 
+// Idempotency-Key for one gate-entry / operational-data write. Retries reuse
+// the key, so the backend replays the first result instead of writing twice.
+const newIdempotencyKey = () =>
+  `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+
+const MAX_WRITE_ATTEMPTS = 3;
+
+// Send a write, retrying with the same key when no response arrived (timeout,
+// dropped yard Wi-Fi) or the first attempt is still being processed (409)
+const idempotentWrite = async (method, url, data) => {
+  const headers = { 'Idempotency-Key': newIdempotencyKey() };
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await api.request({ method, url, data, headers });
+    } catch (error) {
+      const retryable = !error.response || error.response.status === 409;
+      if (!retryable || attempt >= MAX_WRITE_ATTEMPTS) {
+        throw error;
+      }
+      await new Promise((resolve) => setTimeout(resolve, 1000 * attempt));
+    }
+  }
+};
+
 // Auth APIs
 export const authAPI = {
   login: async (credentials) => {
@@ -101,7 +125,7 @@ export const gateAPI = {
       throw new Error('At least one document must be selected');
     }
     
-    const response = await api.post('/enhanced-batch-gate-entry', batchData);
+    const response = await idempotentWrite('post', '/enhanced-batch-gate-entry', batchData);
     return response.data;
   },
 
@@ -115,7 +139,7 @@ export const gateAPI = {
       throw new Error('At least one document must be selected');
     }
     
-    const response = await api.post('/batch-gate-entry', batchData);
+    const response = await idempotentWrite('post', '/batch-gate-entry', batchData);
     return response.data;
   },
   
@@ -125,7 +149,7 @@ export const gateAPI = {
       throw new Error('Vehicle number is required');
     }
     
-    const response = await api.post('/enhanced-manual-gate-entry', manualEntryData);
+    const response = await idempotentWrite('post', '/enhanced-manual-gate-entry', manualEntryData);
     return response.data;
   },
 
@@ -135,7 +159,7 @@ export const gateAPI = {
       throw new Error('Vehicle number is required');
     }
     
-    const response = await api.post('/manual-gate-entry', manualEntryData);
+    const response = await idempotentWrite('post', '/manual-gate-entry', manualEntryData);
     return response.data;
   },
   
@@ -162,8 +186,11 @@ export const gateAPI = {
   },
   
   // Get vehicle movement history
-  getVehicleHistory: async (vehicleNo) => {
-    const response = await api.get(`/vehicle-history/${vehicleNo}`);
+  // Paged: pass the previous response's next_cursor to load older movements
+  getVehicleHistory: async (vehicleNo, cursor = null) => {
+    const response = await api.get(`/vehicle-history/${vehicleNo}`, {
+      params: cursor ? { cursor } : {}
+    });
     return response.data;
   },
 
@@ -196,7 +223,8 @@ export const insightsAPI = {
       movement_type: filters.movementType || null,
       vehicle_no: filters.vehicleNo || null,
       manual_only: filters.manualOnly || false,
-      needs_edit: filters.needsEdit || false
+      needs_edit: filters.needsEdit || false,
+      cursor: filters.cursor || null
     };
     
     const response = await api.post('/filtered-movements', filterData);
@@ -220,7 +248,7 @@ export const insightsAPI = {
       throw new Error(`Validation failed: ${Object.values(validationErrors.errors).join(', ')}`);
     }
 
-    const response = await api.put('/update-operational-data', editData);
+    const response = await idempotentWrite('put', '/update-operational-data', editData);
     return response.data;
   },
 
@@ -692,7 +720,10 @@ export const gateHelpers = {
       return `Manual ${result.movement_type} completed successfully!\nGate Entry No: ${result.gate_entry_no}\nVehicle: ${result.vehicle_no}`;
     }
 
-    return `${result.movement_type} completed successfully!\nProcessed: ${result.records_processed}/${result.total_requested} documents\nGate Entry No: ${result.gate_entry_no}`;
+    const missing = result.missing_documents?.length
+      ? `\nNot found: ${result.missing_documents.join(', ')}`
+      : '';
+    return `${result.movement_type} completed successfully!\nProcessed: ${result.records_processed}/${result.total_requested} documents${missing}\nGate Entry No: ${result.gate_entry_no}`;
   },
 
   // Check if gate type is valid for vehicle